@@ -1,27 +1,29 @@
-from flask import Flask, jsonify, request, render_template_string, send_from_directory
+from flask import Flask, jsonify, request, render_template_string, send_from_directory, Response, has_request_context
 import base64
+import bisect
+import gzip
+import hashlib
+import importlib
 import threading
 try:
-    import webview
+    import brotli
 except Exception:
-    webview = None
-try:
-    import tkinter as tk
-except Exception:
-    tk = None
-try:
-    from PySide6 import QtWidgets, QtCore, QtGui
-except Exception:
-    QtWidgets = None
+    brotli = None
 from flask_cors import CORS
 import config
-from pymongo import MongoClient
+from cache import BoardCache
+from events import EventBus, watch_changes
+from memstore import MemoryStore
+from localstore import LocalStore, SyncEngine
+from serializers import TASK_PROJECTION, COLUMN_PROJECTION, TASKLIST_PROJECTION, task_to_dict, column_to_dict, tasklist_to_dict, dumps
+from pymongo import MongoClient, ReturnDocument, UpdateOne, ASCENDING
+from pymongo.errors import DuplicateKeyError
 from bson.objectid import ObjectId
 import os
+import socket
 import sys
 import glob
-from PIL import Image, ImageDraw, ImageFont
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import time
 from urllib.request import urlopen
@@ -49,32 +51,161 @@ def _static_base():
         base = os.path.join(sys._MEIPASS, 'static')
     return base
 
+def _mongo_options():
+    return {
+        'maxPoolSize': getattr(config, 'MONGO_MAX_POOL_SIZE', 100),
+        'minPoolSize': getattr(config, 'MONGO_MIN_POOL_SIZE', 0),
+        'maxIdleTimeMS': getattr(config, 'MONGO_MAX_IDLE_MS', None),
+        'waitQueueTimeoutMS': getattr(config, 'MONGO_WAIT_QUEUE_TIMEOUT_MS', None),
+    }
+
 def _get_mongo_client():
+    opts = _mongo_options()
     uri = getattr(config, 'MONGO_URI', None)
     if uri:
         try:
-            c = MongoClient(uri, serverSelectionTimeoutMS=3000)
+            c = MongoClient(uri, serverSelectionTimeoutMS=getattr(config, 'MONGO_SELECT_TIMEOUT_MS', 3000), **opts)
             c.admin.command('ping')
-            return c
+            return c, uri
         except Exception:
             pass
     local_uri = getattr(config, 'MONGO_LOCAL_URI', 'mongodb://localhost:27017')
-    return MongoClient(local_uri)
+    return MongoClient(local_uri, **opts), local_uri
+
+def _connect_remote():
+    # unlike _get_mongo_client, only ever hand back a server that answered
+    timeout = getattr(config, 'MONGO_SELECT_TIMEOUT_MS', 3000)
+    err = None
+    for uri in filter(None, (getattr(config, 'MONGO_URI', None), getattr(config, 'MONGO_LOCAL_URI', 'mongodb://localhost:27017'))):
+        c = MongoClient(uri, serverSelectionTimeoutMS=timeout, **_mongo_options())
+        try:
+            c.admin.command('ping')
+            return c[db_name]
+        except Exception as e:
+            c.close()
+            err = e
+    raise err
 
 app = Flask(__name__, static_folder=_static_base())
-CORS(app)
-client = _get_mongo_client()
+CORS(app, expose_headers=['X-Next-Cursor', 'ETag'])
 db_name = getattr(config, 'MONGO_DB', 'tasklist')
-mdb = client[db_name]
-tasklists_col = mdb['tasklists']
-columns_col = mdb['columns']
-tasks_col = mdb['tasks']
+_db_lock = threading.Lock()
+_db_state = {'pid': None, 'client': None, 'db': None, 'uri': None, 'sync': None, 'txn': None}
+LOCAL_STORE = getattr(config, 'LOCAL_STORE', None)
+# 'mongo' (the server), 'local' (offline-first SQLite + sync) or 'memory' (process-local, nothing persisted)
+STORAGE = getattr(config, 'STORAGE', 'local' if LOCAL_STORE else 'mongo')
+
+def _on_connect(db):
+    if getattr(config, 'AUTO_INDEXES', True):
+        try:
+            ensure_indexes(db)
+        except Exception:
+            pass
+    if STORAGE == 'mongo' and EVENTS_BACKEND == 'mongo':
+        enable_change_preimages(db)
+    # resume purging anything a previous process tombstoned
+    _start_reaper()
+    # a fresh local store gets its lists from the server on the first sync
+    if STORAGE != 'local' and db['tasklists'].count_documents({}) == 0:
+        now = datetime.utcnow()
+        db['tasklists'].insert_one({'id': 1, 'title': 'TaskList 1', 'created_at': now, 'updated_at': now})
+
+def get_db():
+    st = _db_state
+    if st['db'] is not None and st['pid'] == os.getpid():
+        return st['db']
+    with _db_lock:
+        if st['db'] is None or st['pid'] != os.getpid():
+            # first use in this process (or first use after fork): connect, index, seed
+            _ENGINES[STORAGE]()
+    return st['db']
+
+def _open_mongo():
+    client, uri = _get_mongo_client()
+    db = client[db_name]
+    _on_connect(db)
+    _db_state.update(pid=os.getpid(), client=client, db=db, uri=uri, txn=None)
+
+def _open_memory():
+    db = MemoryStore(db_name)
+    _on_connect(db)
+    _db_state.update(pid=os.getpid(), client=None, db=db, uri=None)
+
+def _on_remote_change(list_ids):
+    touch_lists()
+    for list_id in list_ids:
+        notify_change(list_id, 'board.reset', {})
+
+def _open_local_store():
+    # offline-first: every read and write hits the embedded store; a background thread replicates to Mongo
+    db = LocalStore(LOCAL_STORE, db_name)
+    engine = SyncEngine(db, _connect_remote, notify=_on_remote_change,
+                        interval=getattr(config, 'SYNC_INTERVAL', 5.0), batch=getattr(config, 'SYNC_BATCH', 500),
+                        full_every=getattr(config, 'SYNC_FULL_EVERY', 20), id_lease=getattr(config, 'SYNC_ID_LEASE', 1000))
+    _on_connect(db)
+    _db_state.update(pid=os.getpid(), client=None, db=db, uri=None, sync=engine)
+    engine.start()
+
+_ENGINES = {'mongo': _open_mongo, 'memory': _open_memory, 'local': _open_local_store}
+
+class _LazyCollection:
+    def __init__(self, name):
+        self.name = name
+    def __getattr__(self, attr):
+        return getattr(get_db()[self.name], attr)
+
+tasklists_col = _LazyCollection('tasklists')
+columns_col = _LazyCollection('columns')
+tasks_col = _LazyCollection('tasks')
+
+counters_col = _LazyCollection('counters')
+_id_lock = threading.Lock()
+_id_blocks = {}
+_id_seeded = set()
+_id_pid = os.getpid()
+
+POSITION_STEP = 1024
+MIN_POSITION_GAP = 1e-6
+_rebalance_lock = threading.Lock()
+_rebalance_pending = set()
+# striped: a move and a renumber of the same column or list never interleave within this process
+_scope_locks = [threading.RLock() for _ in range(64)]
+
+def _seed_counter(name, col):
+    if name in _id_seeded:
+        return
+    doc = col.find_one(sort=[('id', -1)], projection={'id': 1})
+    counters_col.update_one({'_id': name}, {'$max': {'seq': doc['id'] if doc else 0}}, upsert=True)
+    _id_seeded.add(name)
+
+def reserve_ids(col, n):
+    name = col.name
+    db = get_db()
+    if hasattr(db, 'reserve_ids'):
+        return db.reserve_ids(name, n)
+    _seed_counter(name, col)
+    doc = counters_col.find_one_and_update({'_id': name}, {'$inc': {'seq': n}}, upsert=True, return_document=ReturnDocument.AFTER)
+    end = doc['seq']
+    return range(end - n + 1, end + 1)
 
 def next_id(col):
-    doc = col.find_one(sort=[('id', -1)])
-    return (doc['id'] + 1) if doc else 1
+    global _id_pid
+    block_size = max(1, int(getattr(config, 'ID_BLOCK_SIZE', 1)))
+    with _id_lock:
+        if _id_pid != os.getpid():
+            # forked worker: never reuse ids reserved by the parent
+            _id_blocks.clear()
+            _id_pid = os.getpid()
+        it = _id_blocks.get(col.name)
+        nid = next(it, None) if it is not None else None
+        if nid is None:
+            it = iter(reserve_ids(col, block_size))
+            _id_blocks[col.name] = it
+            nid = next(it)
+        return nid
 
 def ensure_logo():
+    from PIL import Image, ImageDraw, ImageFont
     src_static = os.path.join(os.path.dirname(__file__), 'static')
     os.makedirs(src_static, exist_ok=True)
     logo_path = os.path.join(src_static, 'logo.png')
@@ -129,6 +260,7 @@ def ensure_ico():
             break
     if not src:
         return
+    from PIL import Image
     img = Image.open(src).convert('RGBA')
     sizes = [(16,16),(24,24),(32,32),(48,48),(64,64),(128,128),(256,256)]
     img.save(ico_path, format='ICO', sizes=sizes)
@@ -150,49 +282,396 @@ def get_logo_data_url():
         # Fallback: small embedded pixel
         return 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVQYV2NgYGD4DwAB6gG9oPLw6wAAAABJRU5ErkJggg=='
 
-# Database Models
-if tasklists_col.count_documents({}) == 0:
-    tasklists_col.insert_one({'id': 1, 'title': 'TaskList 1', 'created_at': datetime.utcnow()})
+INDEXES = {
+    'tasklists': [
+        ([('id', ASCENDING)], {'unique': True}),
+        ([('created_at', ASCENDING), ('id', ASCENDING)], {}),
+        ([('deleted_at', ASCENDING)], {'sparse': True}),
+    ],
+    'columns': [
+        ([('id', ASCENDING)], {'unique': True}),
+        ([('task_list_id', ASCENDING), ('position', ASCENDING), ('id', ASCENDING)], {}),
+        ([('deleted_at', ASCENDING)], {'sparse': True}),
+    ],
+    'tasks': [
+        ([('id', ASCENDING)], {'unique': True}),
+        ([('column_id', ASCENDING), ('position', ASCENDING), ('id', ASCENDING)], {}),
+    ],
+}
+
+def ensure_indexes(db=None, log=None):
+    db = db if db is not None else get_db()
+    errors = []
+    for name, specs in INDEXES.items():
+        for keys, opts in specs:
+            try:
+                idx = db[name].create_index(keys, **opts)
+                if log:
+                    log(f'{name}: {idx}')
+            except Exception as e:
+                errors.append((name, keys, e))
+                if log:
+                    log(f'{name}: FAILED {keys} ({e})')
+    return errors
+
+# collections whose change-stream deletes must say where the document was (a delete event carries only its _id)
+PREIMAGE_COLLECTIONS = ('tasks',)
+
+def enable_change_preimages(db):
+    # MongoDB 6.0+; older servers leave the option off and the watcher skips deletes it cannot place
+    for name in PREIMAGE_COLLECTIONS:
+        try:
+            db.command('collMod', name, changeStreamPreAndPostImages={'enabled': True})
+        except Exception:
+            try:
+                db.create_collection(name, changeStreamPreAndPostImages={'enabled': True})
+            except Exception:
+                pass
+
+def _plan_stages(plan):
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan.get('stage')]
+    for k in ('inputStage', 'queryPlan'):
+        stages += _plan_stages(plan.get(k))
+    for sub in plan.get('inputStages', []):
+        stages += _plan_stages(sub)
+    return stages
+
+def explain_hot_queries():
+    probe_list = tasklists_col.find_one(projection={'id': 1}) or {'id': 0}
+    probe_col = columns_col.find_one(projection={'id': 1}) or {'id': 0}
+    probes = [
+        ('tasklists by created_at', tasklists_col.find({}).sort('created_at', 1)),
+        ('tasklists by id', tasklists_col.find({'id': probe_list['id']})),
+        ('columns of list', columns_col.find({'task_list_id': probe_list['id']}).sort('position', 1)),
+        ('columns by id', columns_col.find({'id': probe_col['id']})),
+        ('tasks of board', tasks_col.find({'column_id': {'$in': [probe_col['id']]}}).sort('position', 1)),
+        ('tasks by id', tasks_col.find({'id': 0})),
+    ]
+    report = []
+    for label, cursor in probes:
+        plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        stages = [st for st in _plan_stages(plan) if st]
+        report.append((label, 'COLLSCAN' in stages, ' <- '.join(stages)))
+    return report
+
+def json_response(obj, status=200):
+    return Response(dumps(obj), status=status, mimetype='application/json')
+
+# lists and columns being purged by the reaper carry deleted_at; every read skips them
+LIVE = {'deleted_at': None}
+
+def _board_filter(list_id):
+    return dict(LIVE, task_list_id=list_id) if list_id is not None else dict(LIVE)
+
+def _load_board(list_id):
+    q = _board_filter(list_id)
+    cols = list(columns_col.find(q, projection=COLUMN_PROJECTION).sort('position', 1))
+    by_col = {c['id']: [] for c in cols}
+    if by_col:
+        for t in tasks_col.find({'column_id': {'$in': list(by_col)}}, projection=TASK_PROJECTION).sort('position', 1):
+            by_col[t['column_id']].append(t)
+    now = datetime.utcnow()
+    return [column_to_dict(c, by_col[c['id']], now) for c in cols]
+
+board_cache = BoardCache(max_bytes=getattr(config, 'BOARD_CACHE_BYTES', 64 * 1024 * 1024), ttl=getattr(config, 'BOARD_CACHE_TTL', 60))
+bus = EventBus(maxsize=getattr(config, 'EVENTS_QUEUE_SIZE', 1000))
+# 'memory' (in-process bus, one worker), 'mongo' (change streams, any number of workers)
+# or 'poll' (no push: clients poll the board's ETag, any number of workers, no replica set needed)
+EVENTS_BACKEND = getattr(config, 'EVENTS_BACKEND', 'memory')
+SSE_KEEPALIVE = getattr(config, 'SSE_KEEPALIVE', 15)
+THREADS = max(2, int(getattr(config, 'THREADS', 4)))
+# each open stream pins a worker thread; past the cap clients get a 503 and fall back to polling
+SSE_MAX_STREAMS = int(getattr(config, 'SSE_MAX_STREAMS', max(1, THREADS // 2)))
+_sse_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+_column_lists = {}
+_watcher_lock = threading.Lock()
+_watcher = {'pid': None}
+
+def _column_list_id(column_id):
+    if column_id in _column_lists:
+        return _column_lists[column_id]
+    c = columns_col.find_one({'id': column_id}, projection={'task_list_id': 1})
+    lid = c.get('task_list_id') if c else None
+    if len(_column_lists) > 10000:
+        _column_lists.clear()
+    _column_lists[column_id] = lid
+    return lid
+
+def _live_list(list_id):
+    return list_id is None or tasklists_col.find_one(dict(LIVE, id=list_id), projection={'_id': 1}) is not None
+
+def _live_column(column_id):
+    # tombstoned columns (or columns of a tombstoned list) wait for the reaper; nothing may write into them meanwhile
+    c = columns_col.find_one(dict(LIVE, id=column_id), projection={'_id': 0, 'id': 1, 'task_list_id': 1})
+    if c is None or not _live_list(c.get('task_list_id')):
+        return None
+    _column_lists[column_id] = c.get('task_list_id')
+    return c
+
+LISTS_VERSION_KEY = 'version:tasklists'
+
+def touch_list(list_id):
+    if list_id is not None:
+        tasklists_col.update_one({'id': list_id}, {'$inc': {'version': 1}})
+
+def touch_lists():
+    counters_col.update_one({'_id': LISTS_VERSION_KEY}, {'$inc': {'seq': 1}}, upsert=True)
+
+def notify_change(list_id, kind, data):
+    touch_list(list_id)
+    board_cache.invalidate(list_id)
+    if EVENTS_BACKEND != 'memory' or list_id is None or not bus.subscriber_count(list_id):
+        return
+    origin = request.headers.get('X-Client-Id') if has_request_context() else None
+    bus.publish(list_id, kind, data, origin=origin)
+
+def notify_task_change(kind, data, column_id=None):
+    notify_change(_column_list_id(column_id if column_id is not None else data.get('column_id')), kind, data)
+
+def _resolve_change(coll, doc, kind):
+    if coll in ('columns', 'tasklists') and doc.get('deleted_at') is not None:
+        kind = 'deleted'
+    if coll == 'tasks':
+        return _column_list_id(doc.get('column_id')), 'task.' + kind, task_to_dict(doc) if kind != 'deleted' else {'id': doc.get('id'), 'column_id': doc.get('column_id')}
+    if coll == 'columns':
+        _column_lists.pop(doc.get('id'), None)
+        return doc.get('task_list_id'), 'column.' + kind, column_to_dict(doc) if kind != 'deleted' else {'id': doc.get('id')}
+    if coll == 'tasklists' and kind != 'created':
+        return doc.get('id'), 'tasklist.' + kind, tasklist_to_dict(doc) if kind != 'deleted' else {'id': doc.get('id')}
+    return None
+
+def _watch_forever():
+    while True:
+        try:
+            watch_changes(get_db(), bus, _resolve_change)
+        except Exception:
+            time.sleep(1)
+
+def _start_change_watcher():
+    if EVENTS_BACKEND != 'mongo' or STORAGE != 'mongo' or _watcher['pid'] == os.getpid():
+        return
+    with _watcher_lock:
+        if _watcher['pid'] != os.getpid():
+            threading.Thread(target=_watch_forever, daemon=True).start()
+            _watcher['pid'] = os.getpid()
+
+def _variant():
+    return hashlib.sha1(request.query_string).hexdigest()[:12]
+
+def conditional(etag, build):
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = build()
+        if isinstance(resp, tuple):
+            return resp
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+MAX_PAGE_LIMIT = 1000
+
+def encode_cursor(key, doc_id):
+    if isinstance(key, datetime):
+        key = {'$date': key.isoformat()}
+    return base64.urlsafe_b64encode(dumps([key, doc_id])).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        key, doc_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if isinstance(key, dict):
+            key = datetime.fromisoformat(key['$date'])
+        return key, doc_id
+    except Exception:
+        return None
+
+def _after(field, cursor):
+    key, doc_id = cursor
+    if key is None:
+        # documents without the sort field sort first, so every document that has it is still ahead
+        return {'$or': [{field: {'$ne': None}}, {field: None, 'id': {'$gt': doc_id}}]}
+    return {'$or': [{field: {'$gt': key}}, {field: key, 'id': {'$gt': doc_id}}]}
+
+def _page_args():
+    return parse_page_args(request.args.get('limit', type=int), request.args.get('after'))
+
+def parse_page_args(limit, after):
+    after = after or None
+    cursor = decode_cursor(after) if after else None
+    if after and cursor is None:
+        return None, None, False
+    if limit is not None or cursor is not None:
+        limit = max(1, min(limit or MAX_PAGE_LIMIT, MAX_PAGE_LIMIT))
+    return limit, cursor, True
+
+def _paged(col, q, field, projection, to_dict):
+    limit, cursor, ok = _page_args()
+    if not ok:
+        return jsonify({'error': 'invalid cursor'}), 400
+    if cursor is not None:
+        q = {'$and': [q, _after(field, cursor)]}
+    # never unbounded: without a limit the client gets the largest page and follows X-Next-Cursor
+    limit = limit or MAX_PAGE_LIMIT
+    found = col.find(q, projection=projection).sort([(field, 1), ('id', 1)])
+    now = datetime.utcnow()
+    docs = list(found.limit(limit + 1))
+    resp = json_response([to_dict(d, now) for d in docs[:limit]])
+    if len(docs) > limit:
+        last = docs[limit - 1]
+        resp.headers['X-Next-Cursor'] = encode_cursor(last.get(field), last['id'])
+    return resp
+
+def _load_board_page(list_id, limit, cursor, task_limit, stats=False):
+    # not getattr(db, 'engine'): a pymongo Database answers any attribute with a collection
+    if STORAGE != 'mongo':
+        return shape_board_page(_board_page_docs(list_id, limit, cursor, task_limit, stats), limit, task_limit)
+    cols = list(columns_col.aggregate(board_page_pipeline(list_id, limit, cursor, task_limit, stats)))
+    return shape_board_page(cols, limit, task_limit)
+
+def column_stats(column_id):
+    total = tasks_col.count_documents({'column_id': column_id})
+    return {'total': total, 'completed': tasks_col.count_documents({'column_id': column_id, 'completed': True}) if total else 0}
+
+def _board_page_docs(list_id, limit, cursor, task_limit, stats=False):
+    # the same shape board_page_pipeline produces, from plain finds (the embedded engines have no $lookup)
+    q = _board_filter(list_id)
+    if cursor is not None:
+        q = {'$and': [q, _after('position', cursor)]}
+    found = columns_col.find(q, projection=COLUMN_PROJECTION).sort([('position', 1), ('id', 1)])
+    cols = list(found.limit(limit + 1) if limit is not None else found)
+    for c in cols:
+        ts = tasks_col.find({'column_id': c['id']}, projection=TASK_PROJECTION).sort([('position', 1), ('id', 1)])
+        c['tasks'] = list(ts.limit(task_limit + 1) if task_limit is not None else ts)
+        if stats:
+            c['stats'] = [column_stats(c['id'])]
+    return cols
+
+def board_page_pipeline(list_id, limit, cursor, task_limit, stats=False):
+    q = _board_filter(list_id)
+    if cursor is not None:
+        q = {'$and': [q, _after('position', cursor)]}
+    tasks_pipeline = [
+        {'$match': {'$expr': {'$eq': ['$column_id', '$$cid']}}},
+        {'$sort': {'position': 1, 'id': 1}},
+        {'$project': TASK_PROJECTION},
+    ]
+    if task_limit is not None:
+        tasks_pipeline.append({'$limit': task_limit + 1})
+    pipeline = [{'$match': q}, {'$sort': {'position': 1, 'id': 1}}]
+    if limit is not None:
+        pipeline.append({'$limit': limit + 1})
+    pipeline += [
+        {'$project': COLUMN_PROJECTION},
+        {'$lookup': {'from': tasks_col.name, 'let': {'cid': '$id'}, 'pipeline': tasks_pipeline, 'as': 'tasks'}},
+    ]
+    if stats:
+        # reads every task of every column on the page: only on request
+        pipeline.append({'$lookup': {'from': tasks_col.name, 'let': {'cid': '$id'}, 'pipeline': [
+            {'$match': {'$expr': {'$eq': ['$column_id', '$$cid']}}},
+            {'$group': {'_id': None, 'total': {'$sum': 1}, 'completed': {'$sum': {'$cond': [{'$ifNull': ['$completed', False]}, 1, 0]}}}},
+        ], 'as': 'stats'}})
+    return pipeline
+
+def shape_board_page(cols, limit, task_limit):
+    more = limit is not None and len(cols) > limit
+    if more:
+        cols = cols[:limit]
+    now = datetime.utcnow()
+    result = []
+    for c in cols:
+        ts = c['tasks']
+        next_cursor = None
+        if task_limit is not None and len(ts) > task_limit:
+            ts = ts[:task_limit]
+            next_cursor = encode_cursor(ts[-1].get('position'), ts[-1]['id'])
+        d = column_to_dict(c, ts, now)
+        if 'stats' in c:
+            stats = c['stats'][0] if c['stats'] else {'total': 0, 'completed': 0}
+        elif next_cursor is None:
+            # the whole column is on the page, so its counts cost nothing
+            stats = {'total': len(ts), 'completed': sum(1 for t in ts if t.get('completed'))}
+        else:
+            # a truncated column: the client asks /api/columns/<id>/stats (or passes stats=1)
+            stats = {'total': None, 'completed': None}
+        d['task_count'] = stats['total']
+        d['completed_count'] = stats['completed']
+        d['next_cursor'] = next_cursor
+        result.append(d)
+    next_page = encode_cursor(cols[-1].get('position'), cols[-1]['id']) if more else None
+    return result, next_page
 
 # API Routes for Columns
 @app.route('/api/columns', methods=['GET'])
 def get_columns():
     list_id = request.args.get('list_id', type=int)
-    q = {'task_list_id': list_id} if list_id is not None else {}
-    cols = list(columns_col.find(q).sort('position', 1))
-    result = []
-    for c in cols:
-        ts = list(tasks_col.find({'column_id': c['id']}).sort('position', 1))
-        result.append({
-            'id': c['id'],
-            'title': c.get('title', ''),
-            'position': c.get('position', 0),
-            'created_at': c.get('created_at', datetime.utcnow()).isoformat(),
-            'tasks': [{
-                'id': t['id'],
-                'title': t.get('title', ''),
-                'description': t.get('description', ''),
-                'completed': t.get('completed', False),
-                'position': t.get('position', 0),
-                'column_id': t.get('column_id'),
-                'created_at': t.get('created_at', datetime.utcnow()).isoformat(),
-                'updated_at': t.get('updated_at', t.get('created_at', datetime.utcnow())).isoformat()
-            } for t in ts]
-        })
-    return jsonify(result)
+    if list_id is None:
+        return _get_columns(None)
+    tl = tasklists_col.find_one({'id': list_id}, projection={'_id': 0, 'version': 1})
+    if not tl:
+        return conditional(f'L{list_id}-x-{_variant()}', lambda: _get_columns(list_id))
+    # the version is part of the key, so entries written by other workers' changes are never served
+    key = (list_id, tl.get('version', 0), _variant())
+    return conditional('L%s-%s-%s' % key, lambda: _get_columns(list_id, key))
+
+def _get_columns(list_id, cache_key=None):
+    cached = board_cache.get(cache_key) if cache_key else None
+    if cached is None:
+        task_limit = request.args.get('task_limit', type=int)
+        limit, cursor, ok = _page_args()
+        if not ok:
+            return jsonify({'error': 'invalid cursor'}), 400
+        next_page = None
+        if limit is None and task_limit is None:
+            result = _load_board(list_id)
+        else:
+            if task_limit is not None:
+                task_limit = max(1, min(task_limit, MAX_PAGE_LIMIT))
+            result, next_page = _load_board_page(list_id, limit, cursor, task_limit, bool(request.args.get('stats', type=int)))
+        cached = (dumps(result), next_page)
+        if cache_key:
+            board_cache.put(cache_key, *cached)
+    body, next_page = cached
+    resp = Response(body, mimetype='application/json')
+    if next_page:
+        resp.headers['X-Next-Cursor'] = next_page
+    return resp
+
+@app.route('/api/columns/<int:column_id>/stats', methods=['GET'])
+def get_column_stats(column_id):
+    stats = column_stats(column_id)
+    return jsonify({'id': column_id, 'task_count': stats['total'], 'completed_count': stats['completed']})
+
+@app.route('/api/metrics/cache', methods=['GET'])
+def cache_metrics():
+    return jsonify(board_cache.stats())
+
+@app.route('/api/metrics/sync', methods=['GET'])
+def sync_metrics():
+    get_db()
+    engine = _db_state['sync']
+    if engine is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(engine.status, enabled=True, pending=len(engine.store.pending)))
 
 @app.route('/api/columns', methods=['POST'])
 def create_column():
     data = request.get_json()
     title = data.get('title', 'New Column')
     list_id = data.get('task_list_id')
+    if not _live_list(list_id):
+        return jsonify({'error':'not found'}), 404
     filt = {'task_list_id': list_id} if list_id is not None else {}
-    last = columns_col.find_one(filt, sort=[('position', -1)])
-    pos = (last['position'] + 1) if last else 1
+    last = columns_col.find_one(filt, sort=[('position', -1)], projection={'position': 1})
+    pos = (last['position'] + POSITION_STEP) if last else POSITION_STEP
     new_id = next_id(columns_col)
-    doc = {'id': new_id, 'title': title, 'position': pos, 'created_at': datetime.utcnow(), 'task_list_id': list_id}
+    now = datetime.utcnow()
+    doc = {'id': new_id, 'title': title, 'position': pos, 'created_at': now, 'updated_at': now, 'task_list_id': list_id}
     columns_col.insert_one(doc)
-    return jsonify({'id': doc['id'], 'title': doc['title'], 'position': doc['position'], 'created_at': doc['created_at'].isoformat(), 'tasks': []}), 201
+    _column_lists[new_id] = list_id
+    notify_change(list_id, 'column.created', column_to_dict(doc))
+    return json_response(column_to_dict(doc), 201)
 
 @app.route('/api/columns/<int:column_id>', methods=['PUT'])
 def update_column(column_id):
@@ -201,39 +680,97 @@ def update_column(column_id):
     if 'title' in data: update['title'] = data['title']
     if 'position' in data: update['position'] = data['position']
     if 'task_list_id' in data: update['task_list_id'] = data['task_list_id']
-    columns_col.update_one({'id': column_id}, {'$set': update})
-    c = columns_col.find_one({'id': column_id})
-    ts = list(tasks_col.find({'column_id': column_id}).sort('position', 1))
-    return jsonify({'id': c['id'], 'title': c.get('title',''), 'position': c.get('position',0), 'created_at': c.get('created_at', datetime.utcnow()).isoformat(), 'tasks': [{
-        'id': t['id'], 'title': t.get('title',''), 'description': t.get('description',''), 'completed': t.get('completed',False), 'position': t.get('position',0), 'column_id': t.get('column_id'), 'created_at': t.get('created_at', datetime.utcnow()).isoformat(), 'updated_at': t.get('updated_at', t.get('created_at', datetime.utcnow())).isoformat()
-    } for t in ts]})
+    moving = 'task_list_id' in update
+    if update:
+        update['updated_at'] = datetime.utcnow()
+    if moving and not _live_list(update['task_list_id']):
+        return jsonify({'error':'not found'}), 404
+    if _live_column(column_id) is None:
+        return jsonify({'error':'not found'}), 404
+    if update:
+        c = columns_col.find_one_and_update(dict(LIVE, id=column_id), {'$set': update}, projection=COLUMN_PROJECTION, return_document=ReturnDocument.BEFORE if moving else ReturnDocument.AFTER)
+    else:
+        c = columns_col.find_one(dict(LIVE, id=column_id), projection=COLUMN_PROJECTION)
+    if not c:
+        return jsonify({'error':'not found'}), 404
+    if moving:
+        old_list = c.get('task_list_id')
+        c.update(update)
+        if old_list != c.get('task_list_id'):
+            # the source board lost a column: its version (and so its ETag) has to move too
+            notify_change(old_list, 'column.deleted', {'id': column_id})
+    _column_lists[column_id] = c.get('task_list_id')
+    notify_change(c.get('task_list_id'), 'column.updated', {'id': column_id, 'title': c.get('title', ''), 'position': c.get('position', 0)})
+    ts = tasks_col.find({'column_id': column_id}, projection=TASK_PROJECTION).sort('position', 1)
+    return json_response(column_to_dict(c, ts))
 
 @app.route('/api/columns/<int:column_id>', methods=['DELETE'])
 def delete_column(column_id):
-    tasks_col.delete_many({'column_id': column_id})
-    columns_col.delete_one({'id': column_id})
+    list_id = _column_list_id(column_id)
+    tombstone_column(column_id)
+    _column_lists.pop(column_id, None)
+    notify_change(list_id, 'column.deleted', {'id': column_id})
     return '', 204
 
 # API Routes for Tasks
 @app.route('/api/columns/<int:column_id>/tasks', methods=['GET'])
 def get_tasks(column_id):
-    ts = list(tasks_col.find({'column_id': column_id}).sort('position', 1))
-    return jsonify([{
-        'id': t['id'], 'title': t.get('title',''), 'description': t.get('description',''), 'completed': t.get('completed',False), 'position': t.get('position',0), 'column_id': t.get('column_id'), 'created_at': t.get('created_at', datetime.utcnow()).isoformat(), 'updated_at': t.get('updated_at', t.get('created_at', datetime.utcnow())).isoformat()
-    } for t in ts])
+    if _live_column(column_id) is None:
+        return jsonify({'error':'not found'}), 404
+    return _paged(tasks_col, {'column_id': column_id}, 'position', TASK_PROJECTION, task_to_dict)
 
 @app.route('/api/columns/<int:column_id>/tasks', methods=['POST'])
 def create_task(column_id):
+    if _live_column(column_id) is None:
+        return jsonify({'error':'not found'}), 404
     data = request.get_json()
     title = data.get('title', 'New Task')
     description = data.get('description', '')
-    last = tasks_col.find_one({'column_id': column_id}, sort=[('position', -1)])
-    pos = (last['position'] + 1) if last else 1
+    last = tasks_col.find_one({'column_id': column_id}, sort=[('position', -1)], projection={'position': 1})
+    pos = (last['position'] + POSITION_STEP) if last else POSITION_STEP
     new_id = next_id(tasks_col)
     now = datetime.utcnow()
     doc = {'id': new_id, 'title': title, 'description': description, 'completed': False, 'position': pos, 'column_id': column_id, 'created_at': now, 'updated_at': now}
     tasks_col.insert_one(doc)
-    return jsonify({'id': doc['id'], 'title': doc['title'], 'description': doc['description'], 'completed': doc['completed'], 'position': doc['position'], 'column_id': doc['column_id'], 'created_at': doc['created_at'].isoformat(), 'updated_at': doc['updated_at'].isoformat()}), 201
+    notify_task_change('task.created', task_to_dict(doc))
+    return json_response(task_to_dict(doc), 201)
+
+MAX_BATCH_TASKS = 10000
+BATCH_TASK_FIELDS = ('title', 'description')
+
+@app.route('/api/columns/<int:column_id>/tasks:batch', methods=['POST'])
+def create_tasks_batch(column_id):
+    data = request.get_json()
+    items = data.get('tasks') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return jsonify({'error': 'expected a list of tasks'}), 400
+    if not all(isinstance(i, (str, dict)) for i in items):
+        return jsonify({'error': 'each task must be a title string or an object'}), 400
+    items = [{'title': i} if isinstance(i, str) else i for i in items]
+    extra = sorted({k for i in items for k in i} - set(BATCH_TASK_FIELDS))
+    if extra:
+        # the same fields create_task takes; anything else would be dropped without a word
+        return jsonify({'error': f"unsupported task fields: {', '.join(extra)}; allowed: {', '.join(BATCH_TASK_FIELDS)}"}), 400
+    for k, i in enumerate(items):
+        if 'title' in i and not (isinstance(i['title'], str) and i['title'].strip()):
+            return jsonify({'error': f'task {k}: title must be a non-empty string'}), 400
+        if not isinstance(i.get('description', ''), str):
+            return jsonify({'error': f'task {k}: description must be a string'}), 400
+    if not items:
+        return json_response([], 201)
+    if len(items) > MAX_BATCH_TASKS:
+        return jsonify({'error': f'at most {MAX_BATCH_TASKS} tasks per batch'}), 400
+    if _live_column(column_id) is None:
+        return jsonify({'error':'not found'}), 404
+    last = tasks_col.find_one({'column_id': column_id}, sort=[('position', -1)], projection={'position': 1})
+    base = last['position'] if last else 0
+    now = datetime.utcnow()
+    docs = [{'id': new_id, 'title': i.get('title', 'New Task'), 'description': i.get('description', ''), 'completed': False, 'position': base + k * POSITION_STEP, 'column_id': column_id, 'created_at': now, 'updated_at': now}
+            for k, (new_id, i) in enumerate(zip(reserve_ids(tasks_col, len(items)), items), start=1)]
+    tasks_col.insert_many(docs, ordered=True)
+    out = [task_to_dict(d, now) for d in docs]
+    notify_task_change('task.batch', {'column_id': column_id, 'tasks': out})
+    return json_response(out, 201)
 
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
 def update_task(task_id):
@@ -242,72 +779,526 @@ def update_task(task_id):
     for k in ['title','description','completed','position','column_id']:
         if k in data: update[k] = data[k]
     update['updated_at'] = datetime.utcnow()
-    tasks_col.update_one({'id': task_id}, {'$set': update})
-    t = tasks_col.find_one({'id': task_id})
-    return jsonify({'id': t['id'], 'title': t.get('title',''), 'description': t.get('description',''), 'completed': t.get('completed',False), 'position': t.get('position',0), 'column_id': t.get('column_id'), 'created_at': t.get('created_at', datetime.utcnow()).isoformat(), 'updated_at': t.get('updated_at', datetime.utcnow()).isoformat()})
+    moving = 'column_id' in update
+    if moving and _live_column(update['column_id']) is None:
+        return jsonify({'error':'not found'}), 404
+    t = tasks_col.find_one_and_update({'id': task_id}, {'$set': update}, projection=TASK_PROJECTION, return_document=ReturnDocument.BEFORE if moving else ReturnDocument.AFTER)
+    if not t:
+        return jsonify({'error':'not found'}), 404
+    if moving:
+        old_list = _column_list_id(t.get('column_id'))
+        t.update(update)
+        if old_list != _column_list_id(t.get('column_id')):
+            notify_change(old_list, 'task.deleted', {'id': task_id})
+    notify_task_change('task.updated', task_to_dict(t))
+    return json_response(task_to_dict(t))
+
+def _toggle_pipeline():
+    return [{'$set': {'completed': {'$not': [{'$ifNull': ['$completed', False]}]}, 'updated_at': datetime.utcnow()}}]
 
 @app.route('/api/tasks/<int:task_id>/toggle', methods=['POST'])
 def toggle_task(task_id):
-    t = tasks_col.find_one({'id': task_id})
+    t = tasks_col.find_one_and_update({'id': task_id}, _toggle_pipeline(), projection=TASK_PROJECTION, return_document=ReturnDocument.AFTER)
     if not t:
         return jsonify({'error':'not found'}), 404
-    tasks_col.update_one({'id': task_id}, {'$set': {'completed': not t.get('completed', False), 'updated_at': datetime.utcnow()}})
-    t = tasks_col.find_one({'id': task_id})
-    return jsonify({'id': t['id'], 'title': t.get('title',''), 'description': t.get('description',''), 'completed': t.get('completed',False), 'position': t.get('position',0), 'column_id': t.get('column_id'), 'created_at': t.get('created_at', datetime.utcnow()).isoformat(), 'updated_at': t.get('updated_at', datetime.utcnow()).isoformat()})
+    notify_task_change('task.updated', task_to_dict(t))
+    return json_response(task_to_dict(t))
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
-    tasks_col.delete_one({'id': task_id})
+    t = tasks_col.find_one_and_delete({'id': task_id}, projection={'_id': 0, 'column_id': 1})
+    if t:
+        notify_task_change('task.deleted', {'id': task_id, 'column_id': t.get('column_id')})
     return '', 204
 
+def _bulk_update(col, updates):
+    # (filter, update) pairs; the embedded engines take them as they are, Mongo wants UpdateOne
+    if STORAGE == 'mongo':
+        updates = [UpdateOne(f, u) for f, u in updates]
+    return col.bulk_write(updates, ordered=False)
+
+def _apply_positions(col, wanted):
+    if not wanted:
+        return 0
+    current = {d['id']: d for d in col.find({'id': {'$in': list(wanted)}}, projection={'_id': 0, 'id': 1, 'position': 1, 'column_id': 1})}
+    ops = []
+    now = datetime.utcnow()
+    for doc_id, fields in wanted.items():
+        cur = current.get(doc_id)
+        if cur is None:
+            continue
+        changed = {k: v for k, v in fields.items() if cur.get(k) != v}
+        if changed:
+            ops.append(({'id': doc_id}, {'$set': dict(changed, updated_at=now)}))
+    if not ops:
+        return 0
+    return _bulk_update(col, ops).modified_count
+
+def _scope_lock(col, scope):
+    return _scope_locks[hash((col.name, tuple(sorted(scope.items())))) % len(_scope_locks)]
+
+def _rebalance(col, scope):
+    modified = 0
+    with _scope_lock(col, scope):
+        for _ in range(3):
+            docs = col.find(scope, projection={'_id': 0, 'id': 1, 'position': 1}).sort([('position', 1), ('id', 1)])
+            # each write matches the position it was read with: a move from another worker that lands in between is kept, not overwritten
+            now = datetime.utcnow()
+            ops = [(dict(scope, id=d['id'], position=d.get('position')), {'$set': {'position': idx * POSITION_STEP, 'updated_at': now}})
+                   for idx, d in enumerate(docs, start=1) if d.get('position') != idx * POSITION_STEP]
+            if not ops:
+                break
+            res = _bulk_update(col, ops)
+            modified += res.modified_count
+            if res.matched_count == len(ops):
+                break
+    if modified:
+        touch_list(scope['task_list_id'] if 'task_list_id' in scope else _column_list_id(scope.get('column_id')))
+    return modified
+
+def _rebalance_worker(col, scope, key):
+    try:
+        _rebalance(col, scope)
+    except Exception:
+        pass
+    finally:
+        with _rebalance_lock:
+            _rebalance_pending.discard(key)
+
+def _schedule_rebalance(col, scope):
+    key = (col.name, tuple(sorted(scope.items())))
+    with _rebalance_lock:
+        if key in _rebalance_pending:
+            return
+        _rebalance_pending.add(key)
+    threading.Thread(target=_rebalance_worker, args=(col, scope, key), daemon=True).start()
+
+def _position_between(col, scope, doc_id, after_id, before_id, retry=True):
+    # None when a neighbour is the document itself, lives in another column/list, or the two are out of order;
+    # a neighbour that no longer exists is ignored
+    if doc_id in (after_id, before_id):
+        return None
+    ids = [i for i in (after_id, before_id) if i is not None]
+    found = list(col.find({'id': {'$in': ids}}, projection=dict({'_id': 0, 'id': 1, 'position': 1}, **{k: 1 for k in scope}))) if ids else []
+    if any(d.get(k) != v for d in found for k, v in scope.items()):
+        return None
+    known = {d['id']: d.get('position', 0) for d in found}
+    lo = known.get(after_id)
+    hi = known.get(before_id)
+    if lo is None and hi is None:
+        last = col.find_one(dict(scope, id={'$ne': doc_id}), sort=[('position', -1)], projection={'position': 1})
+        return (last['position'] + POSITION_STEP) if last else POSITION_STEP
+    if hi is None:
+        # the client may only have loaded part of the column: find the real successor
+        nxt = col.find_one(dict(scope, id={'$ne': doc_id}, position={'$gt': lo}), sort=[('position', 1)], projection={'position': 1})
+        if not nxt:
+            return lo + POSITION_STEP
+        hi = nxt['position']
+    if lo is None:
+        prev = col.find_one(dict(scope, id={'$ne': doc_id}, position={'$lt': hi}), sort=[('position', -1)], projection={'position': 1})
+        if not prev:
+            return hi - POSITION_STEP
+        lo = prev['position']
+    pos = (lo + hi) / 2
+    if not lo < pos < hi:
+        if not retry:
+            return None
+        # out of float precision (or tied legacy positions): renumber now, then retry once
+        _rebalance(col, scope)
+        return _position_between(col, scope, doc_id, after_id, before_id, retry=False)
+    if hi - lo < MIN_POSITION_GAP:
+        _schedule_rebalance(col, scope)
+    return pos
+
+@app.route('/api/tasks/<int:task_id>/move', methods=['POST'])
+def move_task(task_id):
+    data = request.get_json() or {}
+    t = tasks_col.find_one({'id': task_id}, projection={'column_id': 1})
+    if not t:
+        return jsonify({'error':'not found'}), 404
+    column_id = data.get('column_id', t.get('column_id'))
+    if _live_column(column_id) is None:
+        return jsonify({'error':'not found'}), 404
+    scope = {'column_id': column_id}
+    with _scope_lock(tasks_col, scope):
+        pos = _position_between(tasks_col, scope, task_id, data.get('after_id'), data.get('before_id'))
+        if pos is None:
+            return jsonify({'error': 'after_id and before_id must be other tasks of the target column, in order'}), 400
+        tasks_col.update_one({'id': task_id}, {'$set': {'column_id': column_id, 'position': pos, 'updated_at': datetime.utcnow()}})
+    old_list = _column_list_id(t.get('column_id'))
+    if old_list != _column_list_id(column_id):
+        notify_change(old_list, 'task.deleted', {'id': task_id})
+    notify_task_change('task.updated', {'id': task_id, 'column_id': column_id, 'position': pos})
+    return jsonify({'id': task_id, 'column_id': column_id, 'position': pos})
+
+@app.route('/api/columns/<int:column_id>/move', methods=['POST'])
+def move_column(column_id):
+    data = request.get_json() or {}
+    c = _live_column(column_id)
+    if not c:
+        return jsonify({'error':'not found'}), 404
+    scope = {'task_list_id': c.get('task_list_id')}
+    with _scope_lock(columns_col, scope):
+        pos = _position_between(columns_col, scope, column_id, data.get('after_id'), data.get('before_id'))
+        if pos is None:
+            return jsonify({'error': 'after_id and before_id must be other columns of the same list, in order'}), 400
+        columns_col.update_one({'id': column_id}, {'$set': {'position': pos, 'updated_at': datetime.utcnow()}})
+    notify_change(c.get('task_list_id'), 'column.updated', {'id': column_id, 'position': pos})
+    return jsonify({'id': column_id, 'position': pos})
+
 @app.route('/api/columns/reorder', methods=['POST'])
 def reorder_columns():
     data = request.get_json()
     ordered_ids = data.get('ordered_ids', [])
-    for idx, col_id in enumerate(ordered_ids, start=1):
-        columns_col.update_one({'id': col_id}, {'$set': {'position': idx}})
-    return jsonify({'status': 'ok'})
+    wanted = {col_id: {'position': idx * POSITION_STEP} for idx, col_id in enumerate(ordered_ids, start=1)}
+    modified = _apply_positions(columns_col, wanted)
+    if modified and ordered_ids:
+        notify_change(_column_list_id(ordered_ids[0]), 'board.reset', {})
+    return jsonify({'status': 'ok', 'modified': modified})
 
 @app.route('/api/tasks/reorder', methods=['POST'])
 def reorder_tasks():
     data = request.get_json()
     changes = data.get('changes', [])
+    wanted = {}
     for change in changes:
         column_id = change.get('column_id')
         ordered_ids = change.get('ordered_ids', [])
         for idx, task_id in enumerate(ordered_ids, start=1):
-            tasks_col.update_one({'id': task_id}, {'$set': {'column_id': column_id, 'position': idx}})
-    return jsonify({'status': 'ok'})
+            wanted[task_id] = {'column_id': column_id, 'position': idx * POSITION_STEP}
+    if any(_live_column(c) is None for c in {change.get('column_id') for change in changes}):
+        return jsonify({'error':'not found'}), 404
+    modified = _apply_positions(tasks_col, wanted)
+    if modified:
+        for list_id in {_column_list_id(change.get('column_id')) for change in changes}:
+            notify_change(list_id, 'board.reset', {})
+    return jsonify({'status': 'ok', 'modified': modified})
 
 @app.route('/api/tasklists', methods=['GET'])
 def get_tasklists():
-    lists = list(tasklists_col.find({}).sort('created_at', 1))
-    return jsonify([{'id': l['id'], 'title': l.get('title',''), 'created_at': l.get('created_at', datetime.utcnow()).isoformat()} for l in lists])
+    v = counters_col.find_one({'_id': LISTS_VERSION_KEY}, projection={'seq': 1})
+    return conditional(f"T{v['seq'] if v else 0}-{_variant()}", lambda: _paged(tasklists_col, dict(LIVE), 'created_at', TASKLIST_PROJECTION, tasklist_to_dict))
 
 @app.route('/api/tasklists', methods=['POST'])
 def create_tasklist():
     data = request.get_json()
     title = data.get('title', 'TaskList')
     new_id = next_id(tasklists_col)
-    doc = {'id': new_id, 'title': title, 'created_at': datetime.utcnow()}
+    now = datetime.utcnow()
+    doc = {'id': new_id, 'title': title, 'created_at': now, 'updated_at': now}
     tasklists_col.insert_one(doc)
-    return jsonify({'id': doc['id'], 'title': doc['title'], 'created_at': doc['created_at'].isoformat()}), 201
+    touch_lists()
+    return json_response(tasklist_to_dict(doc), 201)
 
 @app.route('/api/tasklists/<int:list_id>', methods=['PUT'])
 def update_tasklist(list_id):
     data = request.get_json()
-    tasklists_col.update_one({'id': list_id}, {'$set': {'title': data.get('title')}})
-    tl = tasklists_col.find_one({'id': list_id})
-    return jsonify({'id': tl['id'], 'title': tl.get('title',''), 'created_at': tl.get('created_at', datetime.utcnow()).isoformat()})
+    tl = tasklists_col.find_one_and_update({'id': list_id}, {'$set': {'title': data.get('title'), 'updated_at': datetime.utcnow()}}, projection=TASKLIST_PROJECTION, return_document=ReturnDocument.AFTER)
+    if not tl:
+        return jsonify({'error':'not found'}), 404
+    touch_lists()
+    notify_change(list_id, 'tasklist.updated', tasklist_to_dict(tl))
+    return json_response(tasklist_to_dict(tl))
 
 @app.route('/api/tasklists/<int:list_id>', methods=['DELETE'])
 def delete_tasklist(list_id):
-    col_ids = [c['id'] for c in columns_col.find({'task_list_id': list_id})]
-    tasks_col.delete_many({'column_id': {'$in': col_ids}})
-    columns_col.delete_many({'task_list_id': list_id})
-    tasklists_col.delete_one({'id': list_id})
+    tombstone_tasklist(list_id)
+    touch_lists()
+    notify_change(list_id, 'tasklist.deleted', {'id': list_id})
     return '', 204
 
+@app.route('/api/deletions', methods=['GET'])
+def deletions():
+    return jsonify(reap_status())
+
+REAP_BATCH = getattr(config, 'REAP_BATCH', 1000)
+REAP_INTERVAL = getattr(config, 'REAP_INTERVAL', 30)
+REAP_PAUSE = getattr(config, 'REAP_PAUSE', 0.05)
+REAP_LEASE = getattr(config, 'REAP_LEASE', max(60, REAP_INTERVAL * 3))
+REAP_LEASE_KEY = 'reaper'
+_reaper = {'pid': None}
+_reaper_lock = threading.Lock()
+_reap_wake = threading.Event()
+_reap_state = {'purged': 0, 'last_run': None, 'error': None}
+TOMBSTONED = {'deleted_at': {'$exists': True}}
+
+def tombstone_column(column_id):
+    now = datetime.utcnow()
+    c = columns_col.find_one_and_update(dict(LIVE, id=column_id), {'$set': {'deleted_at': now, 'updated_at': now, 'purged': 0}}, projection={'_id': 0, 'id': 1})
+    _start_reaper()
+    return c
+
+def tombstone_tasklist(list_id):
+    now = datetime.utcnow()
+    tl = tasklists_col.find_one_and_update(dict(LIVE, id=list_id), {'$set': {'deleted_at': now, 'updated_at': now}}, projection={'_id': 0, 'id': 1})
+    if tl:
+        # if this second write is lost, the reaper repeats it from the list's tombstone
+        columns_col.update_many(_board_filter(list_id), {'$set': {'deleted_at': now, 'updated_at': now, 'purged': 0}})
+    _start_reaper()
+    return tl
+
+def _session_kw(session):
+    return {'session': session} if session is not None else {}
+
+def _transactions_supported():
+    # only a replica set member or mongos with sessions has transactions; the embedded engines have no client at all
+    client = _db_state['client']
+    if client is None:
+        return False
+    if _db_state['txn'] is None:
+        try:
+            hello = client.admin.command('hello')
+        except Exception:
+            return False
+        _db_state['txn'] = hello.get('logicalSessionTimeoutMinutes') is not None and bool(hello.get('setName') or hello.get('msg') == 'isdbgrid')
+    return _db_state['txn']
+
+def _in_transaction(fn):
+    # standalone servers and the embedded engines have no transactions: each batch is then a plain delete
+    if not getattr(config, 'REAP_TRANSACTIONS', True) or not _transactions_supported():
+        return fn(None)
+    with _db_state['client'].start_session() as session:
+        return session.with_transaction(fn)
+
+def _purge_column_batch(column_id, batch):
+    ids = [t['id'] for t in tasks_col.find({'column_id': column_id}, projection={'_id': 0, 'id': 1}).limit(batch)]
+    def run(session):
+        kw = _session_kw(session)
+        n = tasks_col.delete_many({'id': {'$in': ids}, 'column_id': column_id}, **kw).deleted_count if ids else 0
+        if len(ids) < batch:
+            # last batch: the column goes in the same transaction as its final tasks
+            n += columns_col.delete_one(dict(TOMBSTONED, id=column_id), **kw).deleted_count
+        else:
+            columns_col.update_one({'id': column_id}, {'$inc': {'purged': n}}, **kw)
+        return n
+    return _in_transaction(run)
+
+def reap_once(batch=None):
+    # one bounded step; returns (documents removed, what was worked on) or (0, None) when idle
+    batch = batch or REAP_BATCH
+    for tl in tasklists_col.find(TOMBSTONED, projection={'_id': 0, 'id': 1, 'deleted_at': 1}):
+        columns_col.update_many(_board_filter(tl['id']), {'$set': {'deleted_at': tl['deleted_at'], 'updated_at': datetime.utcnow(), 'purged': 0}})
+    c = columns_col.find_one(TOMBSTONED, projection={'_id': 0, 'id': 1, 'task_list_id': 1})
+    if c:
+        return _purge_column_batch(c['id'], batch), ('column', c['id'])
+    for tl in tasklists_col.find(TOMBSTONED, projection={'_id': 0, 'id': 1}):
+        if not columns_col.find_one({'task_list_id': tl['id']}, projection={'_id': 1}):
+            tasklists_col.delete_one(dict(TOMBSTONED, id=tl['id']))
+            return 1, ('tasklist', tl['id'])
+    return 0, None
+
+def _reap_owner():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+def claim_reap_lease():
+    # one reaper per deployment: every process runs the loop, only the lease holder purges
+    if STORAGE != 'mongo':
+        return True
+    now = datetime.utcnow()
+    try:
+        counters_col.find_one_and_update({'_id': REAP_LEASE_KEY, '$or': [{'owner': _reap_owner()}, {'expires': {'$lt': now}}]},
+                                         {'$set': {'owner': _reap_owner(), 'expires': now + timedelta(seconds=REAP_LEASE)}}, upsert=True)
+    except DuplicateKeyError:
+        return False
+    return True
+
+def reap_status():
+    lists = [{'id': tl['id'], 'deleted_at': tl['deleted_at'], 'columns_left': columns_col.count_documents({'task_list_id': tl['id']})}
+             for tl in tasklists_col.find(TOMBSTONED, projection={'_id': 0, 'id': 1, 'deleted_at': 1})]
+    cols = [{'id': c['id'], 'task_list_id': c.get('task_list_id'), 'deleted_at': c['deleted_at'], 'purged': c.get('purged', 0),
+             'remaining': tasks_col.count_documents({'column_id': c['id']})}
+            for c in columns_col.find(TOMBSTONED, projection={'_id': 0, 'id': 1, 'task_list_id': 1, 'deleted_at': 1, 'purged': 1})]
+    lease = counters_col.find_one({'_id': REAP_LEASE_KEY}, projection={'_id': 0, 'owner': 1, 'expires': 1})
+    return dict(_reap_state, tasklists=lists, columns=cols, running=_reaper['pid'] == os.getpid(), lease=lease)
+
+def _reap_forever():
+    while True:
+        try:
+            while claim_reap_lease():
+                n, _ = reap_once()
+                if not n:
+                    break
+                _reap_state['purged'] += n
+                # bounded batches with a pause between them leave room for foreground traffic
+                time.sleep(REAP_PAUSE)
+            _reap_state.update(last_run=datetime.utcnow(), error=None)
+        except Exception as e:
+            _reap_state['error'] = str(e) or e.__class__.__name__
+        _reap_wake.wait(REAP_INTERVAL)
+        _reap_wake.clear()
+
+def _start_reaper():
+    if not getattr(config, 'REAPER', True):
+        return
+    if _reaper['pid'] != os.getpid():
+        with _reaper_lock:
+            if _reaper['pid'] != os.getpid():
+                threading.Thread(target=_reap_forever, name='tasklist-reaper', daemon=True).start()
+                _reaper['pid'] = os.getpid()
+    _reap_wake.set()
+
+def sse_frame(sub, ev):
+    if sub.overflowed:
+        sub.overflowed = False
+        return b'event: board.reset\ndata: {"data":{}}\n\n'
+    if ev is None:
+        return b': keepalive\n\n'
+    return f"id: {ev['seq']}\nevent: {ev['kind']}\ndata: ".encode('ascii') + dumps({'origin': ev['origin'], 'data': ev['data']}) + b'\n\n'
+
+@app.route('/api/tasklists/<int:list_id>/events', methods=['GET'])
+def tasklist_events(list_id):
+    if EVENTS_BACKEND == 'poll':
+        # 204 tells EventSource not to reconnect; the page polls the board instead
+        return '', 204
+    if not _sse_slots.acquire(blocking=False):
+        resp = jsonify({'error': 'too many open event streams'})
+        resp.status_code = 503
+        resp.headers['Retry-After'] = str(SSE_KEEPALIVE)
+        return resp
+    _start_change_watcher()
+    sub = bus.subscribe(list_id)
+
+    def stream():
+        yield b'retry: 3000\n\n'
+        while True:
+            ev = sub.get(SSE_KEEPALIVE)
+            yield sse_frame(sub, ev)
+
+    def close():
+        bus.unsubscribe(sub)
+        _sse_slots.release()
+
+    resp = Response(stream(), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    # runs when the server closes the response, even if the stream was never started
+    resp.call_on_close(close)
+    return resp
+
+IMPORT_BATCH = 1000
+
+def export_tasklist(list_id):
+    tl = tasklists_col.find_one({'id': list_id}, projection=TASKLIST_PROJECTION)
+    if not tl:
+        return
+    yield dumps(dict(tl, type='tasklist')) + b'\n'
+    col_ids = []
+    for c in columns_col.find(_board_filter(list_id), projection=COLUMN_PROJECTION).sort([('position', 1), ('id', 1)]):
+        col_ids.append(c['id'])
+        yield dumps(dict(c, type='column')) + b'\n'
+    if not col_ids:
+        return
+    buf = []
+    for t in tasks_col.find({'column_id': {'$in': col_ids}}, projection=TASK_PROJECTION, batch_size=IMPORT_BATCH).sort([('column_id', 1), ('position', 1), ('id', 1)]):
+        buf.append(dumps(dict(t, type='task')))
+        if len(buf) >= IMPORT_BATCH:
+            yield b'\n'.join(buf) + b'\n'
+            buf = []
+    if buf:
+        yield b'\n'.join(buf) + b'\n'
+
+def _parse_dt(v):
+    if v is None:
+        return datetime.utcnow()
+    try:
+        return datetime.fromisoformat(v)
+    except (TypeError, ValueError):
+        raise ValueError(f'invalid timestamp {v!r}') from None
+
+def import_tasklist(lines, title=None):
+    stats = {'tasklist': None, 'columns': 0, 'tasks': 0, 'skipped': 0}
+    # each IMPORT_BATCH is its own write: a million-task board would outlive any transaction.
+    # All or nothing comes from the tombstone instead: a failed import hides its list and the reaper takes it away
+    try:
+        _import_records(lines, title, stats)
+    except Exception:
+        if stats['tasklist'] is not None:
+            tombstone_tasklist(stats['tasklist'])
+            touch_lists()
+        raise
+    if stats['tasklist'] is not None:
+        touch_lists()
+    return stats
+
+def _import_records(lines, title, stats):
+    # created_at comes from the file; updated_at is the import, so incremental sync pulls the new board
+    now = datetime.utcnow()
+    col_map = {}
+    pending_cols = []
+    pending_tasks = []
+
+    def flush_columns():
+        if not pending_cols:
+            return
+        for new_id, c in zip(reserve_ids(columns_col, len(pending_cols)), pending_cols):
+            col_map[c.pop('_old_id')] = new_id
+            c['id'] = new_id
+        columns_col.insert_many(pending_cols, ordered=False)
+        stats['columns'] += len(pending_cols)
+        pending_cols.clear()
+
+    def flush_tasks():
+        if not pending_tasks:
+            return
+        for new_id, t in zip(reserve_ids(tasks_col, len(pending_tasks)), pending_tasks):
+            t['id'] = new_id
+        tasks_col.insert_many(pending_tasks, ordered=False)
+        stats['tasks'] += len(pending_tasks)
+        pending_tasks.clear()
+
+    for n, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rec = json.loads(line)
+            kind = rec.get('type')
+        except Exception:
+            stats['skipped'] += 1
+            continue
+        try:
+            if kind == 'tasklist' and stats['tasklist'] is None:
+                new_id = next_id(tasklists_col)
+                tasklists_col.insert_one({'id': new_id, 'title': title or rec.get('title', 'TaskList'), 'created_at': now, 'updated_at': now})
+                stats['tasklist'] = new_id
+            elif kind == 'column' and stats['tasklist'] is not None:
+                pending_cols.append({'_old_id': rec.get('id'), 'title': rec.get('title', ''), 'position': rec.get('position', 0), 'created_at': _parse_dt(rec.get('created_at')), 'updated_at': now, 'task_list_id': stats['tasklist']})
+                if len(pending_cols) >= IMPORT_BATCH:
+                    flush_columns()
+            elif kind == 'task':
+                flush_columns()
+                cid = col_map.get(rec.get('column_id'))
+                if cid is None:
+                    stats['skipped'] += 1
+                    continue
+                pending_tasks.append({'title': rec.get('title', ''), 'description': rec.get('description', ''), 'completed': bool(rec.get('completed', False)), 'position': rec.get('position', 0), 'column_id': cid, 'created_at': _parse_dt(rec.get('created_at')), 'updated_at': now})
+                if len(pending_tasks) >= IMPORT_BATCH:
+                    flush_tasks()
+            else:
+                stats['skipped'] += 1
+        except ValueError as e:
+            raise ValueError(f'line {n}: {e}') from None
+    flush_columns()
+    flush_tasks()
+
+@app.route('/api/tasklists/<int:list_id>/export', methods=['GET'])
+def export_tasklist_route(list_id):
+    if not tasklists_col.find_one(dict(LIVE, id=list_id), projection={'_id': 1}):
+        return jsonify({'error':'not found'}), 404
+    resp = Response(export_tasklist(list_id), mimetype='application/x-ndjson')
+    resp.headers['Content-Disposition'] = f'attachment; filename=tasklist-{list_id}.ndjson'
+    return resp
+
+@app.route('/api/tasklists/import', methods=['POST'])
+def import_tasklist_route():
+    try:
+        stats = import_tasklist(request.stream, title=request.args.get('title'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if stats['tasklist'] is None:
+        return jsonify({'error': 'no tasklist record', **stats}), 400
+    return jsonify(stats), 201
+
 # Frontend HTML Template
 HTML_TEMPLATE = '''
 <!DOCTYPE html>
@@ -419,6 +1410,8 @@ HTML_TEMPLATE = '''
 
         .task-list {
             min-height: 100px;
+            max-height: 70vh;
+            overflow-y: auto;
             margin-bottom: 12px;
         }
 
@@ -735,12 +1728,16 @@ HTML_TEMPLATE = '''
                 <input type="hidden" id="taskColumnId" name="column_id">
                 <div class="form-group">
                     <label for="taskTitle">Tiêu đề công việc:</label>
-                    <input type="text" id="taskTitle" name="title" required>
+                    <input type="text" id="taskTitle" name="title">
                 </div>
                 <div class="form-group">
                     <label for="taskDescription">Mô tả:</label>
                     <textarea id="taskDescription" name="description"></textarea>
                 </div>
+                <div class="form-group">
+                    <label for="taskBulk">Thêm nhiều (mỗi dòng một công việc):</label>
+                    <textarea id="taskBulk" name="bulk"></textarea>
+                </div>
                 <button type="submit" class="btn btn-primary btn-icon" title="Thêm"><svg class="icon" viewBox="0 0 24 24"><path d="M11 11V5h2v6h6v2h-6v6h-2v-6H5v-2h6z"/></svg></button>
             </form>
         </div>
@@ -796,6 +1793,12 @@ HTML_TEMPLATE = '''
     </div>
 
     <script>
+        const TASK_PAGE_SIZE = 50;
+        const CLIENT_ID = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : String(Math.random()).slice(2);
+        function apiFetch(url, options = {}) {
+            options.headers = Object.assign({ 'X-Client-Id': CLIENT_ID }, options.headers || {});
+            return fetch(url, options);
+        }
         let currentColumnId = null;
         let currentListId = null;
         let splashStart = null;
@@ -814,10 +1817,15 @@ HTML_TEMPLATE = '''
         }
 
         // API functions
+        let boardEtag = null;
+        function boardUrl() {
+            return `/api/columns?list_id=${currentListId ?? ''}&task_limit=${TASK_PAGE_SIZE}`;
+        }
         async function fetchColumns() {
             try {
-                const response = await fetch(`/api/columns?list_id=${currentListId ?? ''}`);
+                const response = await apiFetch(boardUrl());
                 if (!response.ok) throw new Error('Failed to fetch columns');
+                boardEtag = response.headers.get('ETag');
                 return await response.json();
             } catch (error) {
                 showError('Không thể tải dữ liệu: ' + error.message);
@@ -827,9 +1835,15 @@ HTML_TEMPLATE = '''
 
         async function fetchLists() {
             try {
-                const response = await fetch('/api/tasklists');
-                if (!response.ok) throw new Error('Failed to fetch lists');
-                return await response.json();
+                const lists = [];
+                let cursor = '';
+                do {
+                    const response = await apiFetch('/api/tasklists' + (cursor ? `?after=${encodeURIComponent(cursor)}` : ''));
+                    if (!response.ok) throw new Error('Failed to fetch lists');
+                    lists.push(...await response.json());
+                    cursor = response.headers.get('X-Next-Cursor') || '';
+                } while (cursor);
+                return lists;
             } catch (error) {
                 showError('Không thể tải danh sách: ' + error.message);
                 return [];
@@ -837,24 +1851,24 @@ HTML_TEMPLATE = '''
         }
 
         async function createList(title) {
-            const res = await fetch('/api/tasklists', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ title }) });
+            const res = await apiFetch('/api/tasklists', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ title }) });
             if (!res.ok) return null;
             return await res.json();
         }
 
         async function updateList(id, title) {
-            const res = await fetch(`/api/tasklists/${id}`, { method: 'PUT', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ title }) });
+            const res = await apiFetch(`/api/tasklists/${id}`, { method: 'PUT', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ title }) });
             return res.ok;
         }
 
         async function deleteList(id) {
-            const res = await fetch(`/api/tasklists/${id}`, { method: 'DELETE' });
+            const res = await apiFetch(`/api/tasklists/${id}`, { method: 'DELETE' });
             return res.ok;
         }
 
         async function createColumn(title) {
             try {
-                const response = await fetch('/api/columns', {
+                const response = await apiFetch('/api/columns', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json',
@@ -871,7 +1885,7 @@ HTML_TEMPLATE = '''
 
         async function deleteColumn(columnId) {
             try {
-                const response = await fetch(`/api/columns/${columnId}`, {
+                const response = await apiFetch(`/api/columns/${columnId}`, {
                     method: 'DELETE',
                 });
                 if (!response.ok) throw new Error('Failed to delete column');
@@ -884,7 +1898,7 @@ HTML_TEMPLATE = '''
 
         async function createTask(columnId, title, description) {
             try {
-                const response = await fetch(`/api/columns/${columnId}/tasks`, {
+                const response = await apiFetch(`/api/columns/${columnId}/tasks`, {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json',
@@ -899,9 +1913,26 @@ HTML_TEMPLATE = '''
             }
         }
 
+        async function createTasksBatch(columnId, tasks) {
+            try {
+                const response = await apiFetch(`/api/columns/${columnId}/tasks:batch`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ tasks }),
+                });
+                if (!response.ok) throw new Error('Failed to create tasks');
+                return await response.json();
+            } catch (error) {
+                showError('Không thể tạo công việc: ' + error.message);
+                return null;
+            }
+        }
+
         async function toggleTask(taskId) {
             try {
-                const response = await fetch(`/api/tasks/${taskId}/toggle`, {
+                const response = await apiFetch(`/api/tasks/${taskId}/toggle`, {
                     method: 'POST',
                 });
                 if (!response.ok) throw new Error('Failed to toggle task');
@@ -914,7 +1945,7 @@ HTML_TEMPLATE = '''
 
         async function deleteTask(taskId) {
             try {
-                const response = await fetch(`/api/tasks/${taskId}`, {
+                const response = await apiFetch(`/api/tasks/${taskId}`, {
                     method: 'DELETE',
                 });
                 if (!response.ok) throw new Error('Failed to delete task');
@@ -952,8 +1983,8 @@ HTML_TEMPLATE = '''
         }
 
         function renderColumn(column) {
-            const completed = column.tasks.filter(t => t.completed).length;
-            const total = column.tasks.length;
+            const completed = column.completed_count ?? column.tasks.filter(t => t.completed).length;
+            const total = column.task_count ?? column.tasks.length;
             const percent = total ? Math.round((completed / total) * 100) : 0;
             const barColor = percent === 100 ? '#4CAF50' : '#2196F3';
             return `
@@ -969,7 +2000,7 @@ HTML_TEMPLATE = '''
                         <div class="progress"><div class="progress-fill" style="width: ${percent}%; background: ${barColor}"></div></div>
                         <div class="progress-text"><span>${completed}/${total}</span><span>${percent}%</span></div>
                     </div>
-                    <div class="task-list" data-column-id="${column.id}">
+                    <div class="task-list" data-column-id="${column.id}" data-next-cursor="${column.next_cursor || ''}">
                         ${column.tasks.map(task => renderTask(task)).join('')}
                     </div>
                 </div>
@@ -994,44 +2025,235 @@ HTML_TEMPLATE = '''
             `;
         }
 
-        let hasLoaded = false;
-        async function loadBoard() {
-            if (!hasLoaded) {
-                document.getElementById('board').style.display = 'none';
-                splashStart = performance.now();
+        // In-memory board model; mutations patch it and the affected DOM nodes only
+        const boardModel = { columns: new Map(), tasks: new Map() };
+        let dragState = null;
+
+        function htmlToElement(html) {
+            const tpl = document.createElement('template');
+            tpl.innerHTML = html.trim();
+            return tpl.content.firstElementChild;
+        }
+
+        function columnEl(columnId) {
+            return document.querySelector(`.column[data-column-id="${columnId}"]`);
+        }
+
+        function taskEl(taskId) {
+            return document.querySelector(`.task[data-task-id="${taskId}"]`);
+        }
+
+        function modelAddColumn(column) {
+            column.task_count = column.task_count ?? column.tasks.length;
+            column.completed_count = column.completed_count ?? column.tasks.filter(t => t.completed).length;
+            boardModel.columns.set(column.id, column);
+            column.tasks.forEach(t => boardModel.tasks.set(t.id, t));
+        }
+
+        function updateProgress(columnId) {
+            const column = boardModel.columns.get(columnId);
+            const el = columnEl(columnId);
+            if (!column || !el) return;
+            const completed = column.completed_count;
+            const total = column.task_count;
+            const percent = total ? Math.round((completed / total) * 100) : 0;
+            const fill = el.querySelector('.progress-fill');
+            fill.style.width = percent + '%';
+            fill.style.background = percent === 100 ? '#4CAF50' : '#2196F3';
+            const spans = el.querySelectorAll('.progress-text span');
+            spans[0].textContent = `${completed}/${total}`;
+            spans[1].textContent = `${percent}%`;
+        }
+
+        async function loadColumnStats(columnId) {
+            try {
+                const response = await apiFetch(`/api/columns/${columnId}/stats`);
+                if (!response.ok) return;
+                const stats = await response.json();
+                const column = boardModel.columns.get(columnId);
+                if (!column) return;
+                column.task_count = stats.task_count;
+                column.completed_count = stats.completed_count;
+                updateProgress(columnId);
+            } catch (error) {
+                // the header keeps the loaded-task counts
             }
-            
-            if (!hasLoaded) setSplashProgress(5);
-            const lists = await fetchLists();
-            if (!hasLoaded) setSplashProgress(40);
-            const listsContainer = document.getElementById('lists');
-            if (currentListId === null && lists.length > 0) {
-                currentListId = lists[0].id;
+        }
+
+        function adjustCounts(columnId, dTotal, dCompleted) {
+            const column = boardModel.columns.get(columnId);
+            if (!column) return;
+            column.task_count += dTotal;
+            column.completed_count += dCompleted;
+            updateProgress(columnId);
+        }
+
+        function patchTask(task) {
+            const prev = boardModel.tasks.get(task.id);
+            boardModel.tasks.set(task.id, Object.assign(prev || {}, task));
+            const el = taskEl(task.id);
+            if (el) el.replaceWith(htmlToElement(renderTask(boardModel.tasks.get(task.id))));
+        }
+
+        function addTasks(columnId, tasks) {
+            const list = document.querySelector(`.task-list[data-column-id="${columnId}"]`);
+            let completed = 0;
+            tasks.forEach(t => {
+                if (t.completed) completed++;
+                // tasks past an unloaded tail arrive when the user scrolls there
+                if (!list || list.dataset.nextCursor) return;
+                boardModel.tasks.set(t.id, t);
+                list.appendChild(htmlToElement(renderTask(t)));
+            });
+            adjustCounts(columnId, tasks.length, completed);
+        }
+
+        function removeTask(taskId) {
+            const task = boardModel.tasks.get(taskId);
+            const el = taskEl(taskId);
+            const columnId = task ? task.column_id : (el ? parseInt(el.closest('.task-list').dataset.columnId) : null);
+            if (el) el.remove();
+            boardModel.tasks.delete(taskId);
+            if (columnId !== null) adjustCounts(columnId, -1, task && task.completed ? -1 : 0);
+        }
+
+        function addColumn(column) {
+            modelAddColumn(column);
+            const board = document.getElementById('board');
+            board.insertBefore(htmlToElement(renderColumn(column)), board.querySelector('.add-column'));
+        }
+
+        function removeColumn(columnId) {
+            const el = columnEl(columnId);
+            if (el) el.remove();
+            boardModel.columns.delete(columnId);
+            for (const [id, t] of boardModel.tasks) {
+                if (t.column_id === columnId) boardModel.tasks.delete(id);
             }
+        }
 
+        function placeTask(task) {
+            let el = taskEl(task.id);
+            const list = document.querySelector(`.task-list[data-column-id="${task.column_id}"]`);
+            if (!list) {
+                if (el) el.remove();
+                return;
+            }
+            if (!el) el = htmlToElement(renderTask(task));
+            const next = [...list.querySelectorAll('.task')].find(o => o !== el && (boardModel.tasks.get(parseInt(o.dataset.taskId)) || {}).position > task.position);
+            if (next) {
+                list.insertBefore(el, next);
+            } else if (list.dataset.nextCursor) {
+                el.remove();
+            } else {
+                list.appendChild(el);
+            }
+        }
+
+        function applyTask(t) {
+            const prev = boardModel.tasks.get(t.id);
+            if (!prev) {
+                if (t.title === undefined || !boardModel.columns.has(t.column_id)) return;
+                boardModel.tasks.set(t.id, t);
+                placeTask(t);
+                adjustCounts(t.column_id, 1, t.completed ? 1 : 0);
+                return;
+            }
+            const oldColumn = prev.column_id, oldPosition = prev.position, wasCompleted = prev.completed;
+            patchTask(t);
+            const task = boardModel.tasks.get(t.id);
+            if (task.column_id !== oldColumn || task.position !== oldPosition) placeTask(task);
+            if (task.column_id !== oldColumn) {
+                adjustCounts(oldColumn, -1, wasCompleted ? -1 : 0);
+                adjustCounts(task.column_id, 1, task.completed ? 1 : 0);
+            } else if (task.completed !== wasCompleted) {
+                adjustCounts(task.column_id, 0, task.completed ? 1 : -1);
+            }
+        }
+
+        function applyColumn(c) {
+            let column = boardModel.columns.get(c.id);
+            if (!column) {
+                if (c.title === undefined) return;
+                addColumn(Object.assign({ tasks: [] }, c));
+                column = boardModel.columns.get(c.id);
+            } else {
+                Object.assign(column, c, { tasks: column.tasks });
+                const title = columnEl(c.id).querySelector('.column-title');
+                if (title) title.textContent = column.title;
+            }
+            const el = columnEl(c.id);
+            const board = document.getElementById('board');
+            const next = [...board.querySelectorAll('.column')].find(o => o !== el && (boardModel.columns.get(parseInt(o.dataset.columnId)) || {}).position > column.position);
+            board.insertBefore(el, next || board.querySelector('.add-column'));
+        }
+
+        // Live updates pushed by other clients for the open list
+        let eventSource = null;
+        let eventListId = null;
+        let boardPoll = null;
+        const BOARD_POLL_MS = 5000;
+        function pollBoard() {
+            // without a stream (server full, or EVENTS_BACKEND = 'poll') the board's ETag says when to reload
+            if (boardPoll) return;
+            boardPoll = setInterval(async () => {
+                if (!currentListId || !boardEtag || document.hidden) return;
+                try {
+                    const res = await apiFetch(boardUrl(), { headers: { 'If-None-Match': boardEtag }, cache: 'no-store' });
+                    if (res.status === 200 && res.headers.get('ETag') !== boardEtag) loadBoard();
+                } catch (e) { }
+            }, BOARD_POLL_MS);
+        }
+        function subscribeBoard() {
+            if (eventListId === currentListId && eventSource) return;
+            if (eventSource) eventSource.close();
+            eventSource = null;
+            clearInterval(boardPoll);
+            boardPoll = null;
+            eventListId = currentListId;
+            if (!currentListId) return;
+            if (!window.EventSource) return pollBoard();
+            const source = new EventSource(`/api/tasklists/${currentListId}/events`);
+            eventSource = source;
+            // a 503 or 204 closes the stream for good; dropped connections reconnect by themselves
+            source.onerror = () => { if (source.readyState === EventSource.CLOSED && eventSource === source) pollBoard(); };
+            const on = (kind, fn) => eventSource.addEventListener(kind, e => {
+                const msg = JSON.parse(e.data);
+                if (msg.origin && msg.origin === CLIENT_ID) return;
+                fn(msg.data);
+            });
+            on('task.created', applyTask);
+            on('task.updated', applyTask);
+            on('task.batch', d => d.tasks.forEach(applyTask));
+            on('task.deleted', d => { if (boardModel.tasks.has(d.id) || taskEl(d.id)) removeTask(d.id); });
+            on('column.created', applyColumn);
+            on('column.updated', applyColumn);
+            on('column.deleted', d => removeColumn(d.id));
+            on('tasklist.updated', d => {
+                const item = document.querySelector(`.list-item[data-id="${d.id}"] > div`);
+                if (item) item.textContent = d.title;
+            });
+            on('tasklist.deleted', () => { currentListId = null; loadBoard(); });
+            on('board.reset', () => loadBoard());
+        }
+
+        function renderLists(lists) {
             const renderListItem = (l) => `
                 <div class="list-item ${l.id === currentListId ? 'active' : ''}" data-id="${l.id}">
                     <div>${l.title}</div>
                     <div class="list-actions">
-                        <button class="btn btn-small btn-icon" onclick="renameList(${l.id})" title="Sửa"><svg class="icon" viewBox="0 0 24 24"><path d="M3 17.25V21h3.75L17.81 9.94l-3.75-3.75L3 17.25zM20.71 7.04a1 1 0 0 0 0-1.41l-2.34-2.34a1 1 0 0 0-1.41 0l-1.83 1.83 3.75 3.75 1.83-1.83z"/></svg></button>
-                        <button class="btn btn-danger btn-small btn-icon" onclick="deleteListHandler(${l.id})" title="Xóa"><svg class="icon" viewBox="0 0 24 24"><path d="M9 3h6l1 2h4v2H4V5h4l1-2zm1 6h2v8h-2V9zm4 0h2v8h-2V9zM7 9h2v8H7V9z"/></svg></button>
+                        <button class="btn btn-small btn-icon" onclick="event.stopPropagation(); renameList(${l.id})" title="Sửa"><svg class="icon" viewBox="0 0 24 24"><path d="M3 17.25V21h3.75L17.81 9.94l-3.75-3.75L3 17.25zM20.71 7.04a1 1 0 0 0 0-1.41l-2.34-2.34a1 1 0 0 0-1.41 0l-1.83 1.83 3.75 3.75 1.83-1.83z"/></svg></button>
+                        <button class="btn btn-danger btn-small btn-icon" onclick="event.stopPropagation(); deleteListHandler(${l.id})" title="Xóa"><svg class="icon" viewBox="0 0 24 24"><path d="M9 3h6l1 2h4v2H4V5h4l1-2zm1 6h2v8h-2V9zm4 0h2v8h-2V9zM7 9h2v8H7V9z"/></svg></button>
                     </div>
                 </div>
             `;
+            document.getElementById('lists').innerHTML = lists.map(renderListItem).join('');
+        }
 
-            listsContainer.innerHTML = lists.map(renderListItem).join('');
-
-            listsContainer.querySelectorAll('.list-item').forEach(item => {
-                item.addEventListener('click', () => {
-                    currentListId = parseInt(item.dataset.id);
-                    loadBoard();
-                });
-            });
-
-            const columns = await fetchColumns();
-            if (!hasLoaded) setSplashProgress(90);
+        function renderBoard(columns) {
             const board = document.getElementById('board');
-            
+            boardModel.columns.clear();
+            boardModel.tasks.clear();
             if (!currentListId) {
                 board.innerHTML = `
                     <div class="board-toolbar" style="margin-bottom:12px; display:flex; justify-content:flex-end;">
@@ -1039,20 +2261,43 @@ HTML_TEMPLATE = '''
                     </div>
                     <div style="color:white; font-weight:500;">Chọn hoặc tạo TaskList ở leftbar để thêm cột</div>
                 `;
-            } else {
-                board.innerHTML = `` +
-                columns.map(column => renderColumn(column)).join('') + `
-                    <div class="add-column" onclick="openModal('addColumnModal')">
-                        <div style="display:flex;align-items:center;gap:8px;">
-                            <svg class="icon" viewBox="0 0 24 24"><path d="M11 11V5h2v6h6v2h-6v6h-2v-6H5v-2h6z"/></svg>
-                            <span>Cột Mới</span>
-                        </div>
+                return;
+            }
+            // truncated columns come without counts; fetch those after the board is on screen
+            const uncounted = columns.filter(c => c.task_count == null).map(c => c.id);
+            columns.forEach(modelAddColumn);
+            board.innerHTML = `` +
+            columns.map(column => renderColumn(column)).join('') + `
+                <div class="add-column" onclick="openModal('addColumnModal')">
+                    <div style="display:flex;align-items:center;gap:8px;">
+                        <svg class="icon" viewBox="0 0 24 24"><path d="M11 11V5h2v6h6v2h-6v6h-2v-6H5v-2h6z"/></svg>
+                        <span>Cột Mới</span>
                     </div>
-                `;
-                const addTop = document.getElementById('addColumnTop');
-                if (addTop) addTop.addEventListener('click', () => openModal('addColumnModal'));
+                </div>
+            `;
+            uncounted.forEach(loadColumnStats);
+        }
+
+        let hasLoaded = false;
+        async function loadBoard() {
+            if (!hasLoaded) {
+                document.getElementById('board').style.display = 'none';
+                splashStart = performance.now();
             }
             
+            if (!hasLoaded) setSplashProgress(5);
+            const lists = await fetchLists();
+            if (!hasLoaded) setSplashProgress(40);
+            if (currentListId === null && lists.length > 0) {
+                currentListId = lists[0].id;
+            }
+            renderLists(lists);
+
+            const columns = await fetchColumns();
+            if (!hasLoaded) setSplashProgress(90);
+            renderBoard(columns);
+            subscribeBoard();
+            
             if (!hasLoaded && !nativeSplash) {
                 setSplashProgress(100);
                 const splash = document.getElementById('splash');
@@ -1067,14 +2312,13 @@ HTML_TEMPLATE = '''
                 hasLoaded = true;
             }
             document.getElementById('board').style.display = 'flex';
-            setupDragAndDrop();
         }
 
         // Event handlers
         async function deleteColumnHandler(columnId) {
             openConfirmModal('Bạn có chắc chắn muốn xóa cột này? Tất cả công việc trong cột sẽ bị xóa.', async () => {
                 if (await deleteColumn(columnId)) {
-                    loadBoard();
+                    removeColumn(columnId);
                 }
             });
         }
@@ -1082,14 +2326,17 @@ HTML_TEMPLATE = '''
         async function toggleTaskHandler(taskId) {
             const task = await toggleTask(taskId);
             if (task) {
-                loadBoard();
+                const prev = boardModel.tasks.get(taskId);
+                const was = prev ? prev.completed : !task.completed;
+                patchTask(task);
+                if (was !== task.completed) adjustCounts(task.column_id, 0, task.completed ? 1 : -1);
             }
         }
 
         async function deleteTaskHandler(taskId) {
             openConfirmModal('Bạn có chắc chắn muốn xóa công việc này?', async () => {
                 if (await deleteTask(taskId)) {
-                    loadBoard();
+                    removeTask(taskId);
                 }
             });
         }
@@ -1108,10 +2355,11 @@ HTML_TEMPLATE = '''
                 showError('Hãy chọn TaskList trước khi thêm cột');
                 return;
             }
-            if (await createColumn(title)) {
+            const column = await createColumn(title);
+            if (column) {
                 closeModal('addColumnModal');
                 document.getElementById('addColumnForm').reset();
-                loadBoard();
+                addColumn(column);
             }
         });
 
@@ -1119,13 +2367,33 @@ HTML_TEMPLATE = '''
             e.preventDefault();
             const title = document.getElementById('taskTitle').value;
             const description = document.getElementById('taskDescription').value;
-            if (await createTask(currentColumnId, title, description)) {
+            const lines = document.getElementById('taskBulk').value.split(/\\r?\\n/).map(l => l.trim()).filter(Boolean);
+            if (!lines.length && !title.trim()) {
+                showError('Hãy nhập tiêu đề công việc');
+                return;
+            }
+            const batch = lines.map(line => ({ title: line }));
+            // the typed title (and its description) goes first, ahead of the pasted lines
+            if (batch.length && title.trim()) batch.unshift({ title: title.trim(), description });
+            const created = batch.length
+                ? await createTasksBatch(currentColumnId, batch)
+                : await createTask(currentColumnId, title, description);
+            if (created) {
                 closeModal('addTaskModal');
                 document.getElementById('addTaskForm').reset();
-                loadBoard();
+                addTasks(currentColumnId, Array.isArray(created) ? created : [created]);
             }
         });
 
+        document.getElementById('taskTitle').addEventListener('paste', (e) => {
+            const text = (e.clipboardData || window.clipboardData).getData('text');
+            if (!/\\r?\\n/.test(text.trim())) return;
+            e.preventDefault();
+            const bulk = document.getElementById('taskBulk');
+            bulk.value = (bulk.value ? bulk.value + '\\n' : '') + text.trim();
+            bulk.focus();
+        });
+
         // Close modals when clicking outside
         window.onclick = function(event) {
             if (event.target.classList.contains('modal')) {
@@ -1146,6 +2414,13 @@ HTML_TEMPLATE = '''
             openModal('addListModal');
         });
 
+        document.getElementById('lists').addEventListener('click', (e) => {
+            const item = e.target.closest('.list-item');
+            if (!item) return;
+            currentListId = parseInt(item.dataset.id);
+            loadBoard();
+        });
+
         window.renameList = (id) => {
             const item = document.querySelector(`.list-item[data-id="${id}"]`);
             const currentTitle = item ? item.querySelector('div').textContent : '';
@@ -1182,7 +2457,8 @@ HTML_TEMPLATE = '''
             if (await updateList(id, title)) {
                 closeModal('editListModal');
                 document.getElementById('editListForm').reset();
-                loadBoard();
+                const item = document.querySelector(`.list-item[data-id="${id}"] > div`);
+                if (item) item.textContent = title;
             }
         });
 
@@ -1228,134 +2504,440 @@ HTML_TEMPLATE = '''
             }, { offset: Number.NEGATIVE_INFINITY, element: null }).element;
         }
 
-        async function reorderColumns(orderedIds) {
-            await fetch('/api/columns/reorder', {
+        async function moveTask(taskId, columnId, afterId, beforeId) {
+            const response = await apiFetch(`/api/tasks/${taskId}/move`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ ordered_ids: orderedIds })
+                body: JSON.stringify({ column_id: columnId, after_id: afterId, before_id: beforeId })
             });
+            return response.ok ? await response.json() : null;
         }
 
-        async function reorderTasks(changes) {
-            await fetch('/api/tasks/reorder', {
+        async function moveColumn(columnId, afterId, beforeId) {
+            const response = await apiFetch(`/api/columns/${columnId}/move`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ changes })
+                body: JSON.stringify({ after_id: afterId, before_id: beforeId })
             });
+            return response.ok ? await response.json() : null;
+        }
+
+        function neighborIds(el, selector, key) {
+            let prev = el.previousElementSibling;
+            while (prev && !prev.matches(selector)) prev = prev.previousElementSibling;
+            let next = el.nextElementSibling;
+            while (next && !next.matches(selector)) next = next.nextElementSibling;
+            return [prev ? parseInt(prev.dataset[key]) : null, next ? parseInt(next.dataset[key]) : null];
+        }
+
+        async function loadMoreTasks(list) {
+            const cursor = list.dataset.nextCursor;
+            if (!cursor || list.dataset.loading) return;
+            list.dataset.loading = '1';
+            try {
+                const response = await apiFetch(`/api/columns/${list.dataset.columnId}/tasks?limit=${TASK_PAGE_SIZE}&after=${encodeURIComponent(cursor)}`);
+                if (!response.ok) throw new Error('Failed to fetch tasks');
+                const tasks = await response.json();
+                list.dataset.nextCursor = response.headers.get('X-Next-Cursor') || '';
+                const tpl = document.createElement('template');
+                tpl.innerHTML = tasks.map(renderTask).join('');
+                tasks.forEach(t => boardModel.tasks.set(t.id, t));
+                list.appendChild(tpl.content);
+            } catch (error) {
+                showError('Không thể tải thêm công việc: ' + error.message);
+            } finally {
+                delete list.dataset.loading;
+            }
         }
 
+        // Delegated listeners, bound once on the board container
         function setupDragAndDrop() {
-            document.querySelectorAll('.task').forEach(task => {
-                task.addEventListener('dragstart', e => {
-                    task.classList.add('dragging');
-                    const sourceColumn = task.closest('.column').dataset.columnId;
-                    e.dataTransfer.setData('text/plain', JSON.stringify({ type: 'task', taskId: task.dataset.taskId, sourceColumnId: sourceColumn }));
-                });
-                task.addEventListener('dragend', () => {
-                    task.classList.remove('dragging');
-                });
+            const board = document.getElementById('board');
+
+            board.addEventListener('scroll', e => {
+                const list = e.target;
+                if (!list.classList || !list.classList.contains('task-list')) return;
+                if (list.scrollTop + list.clientHeight >= list.scrollHeight - 200) loadMoreTasks(list);
+            }, true);
+
+            board.addEventListener('dragstart', e => {
+                const el = e.target;
+                if (!el.classList) return;
+                if (el.classList.contains('task')) {
+                    el.classList.add('dragging');
+                    const list = el.closest('.task-list');
+                    dragState = { type: 'task', el, columnId: parseInt(list.dataset.columnId), neighbors: neighborIds(el, '.task', 'taskId') };
+                    e.dataTransfer.setData('text/plain', JSON.stringify({ type: 'task', taskId: el.dataset.taskId }));
+                } else if (el.classList.contains('column')) {
+                    el.classList.add('dragging');
+                    dragState = { type: 'column', el, neighbors: neighborIds(el, '.column', 'columnId') };
+                    e.dataTransfer.setData('text/plain', JSON.stringify({ type: 'column', columnId: el.dataset.columnId }));
+                }
             });
 
-            document.querySelectorAll('.task-list').forEach(list => {
-                list.addEventListener('dragover', e => {
-                    e.preventDefault();
+            board.addEventListener('dragover', e => {
+                e.preventDefault();
+                if (!dragState) return;
+                if (dragState.type === 'task') {
+                    const list = e.target.closest('.task-list');
+                    if (!list) return;
                     const afterElement = getTaskAfterElement(list, e.clientY);
-                    const dragging = document.querySelector('.task.dragging');
-                    if (!dragging) return;
                     if (afterElement == null) {
-                        list.appendChild(dragging);
+                        list.appendChild(dragState.el);
                     } else {
-                        list.insertBefore(dragging, afterElement);
+                        list.insertBefore(dragState.el, afterElement);
                     }
-                });
-                list.addEventListener('drop', async e => {
-                    e.preventDefault();
-                    const data = JSON.parse(e.dataTransfer.getData('text/plain') || '{}');
-                    if (data.type !== 'task') return;
-                    const destColumnId = parseInt(list.dataset.columnId);
-                    const destTasks = Array.from(list.querySelectorAll('.task')).map(el => parseInt(el.dataset.taskId));
-                    const changes = [{ column_id: destColumnId, ordered_ids: destTasks }];
-                    const sourceList = document.querySelector(`.task-list[data-column-id="${data.sourceColumnId}"]`);
-                    if (sourceList && sourceList !== list) {
-                        const sourceTasks = Array.from(sourceList.querySelectorAll('.task')).map(el => parseInt(el.dataset.taskId));
-                        changes.push({ column_id: parseInt(data.sourceColumnId), ordered_ids: sourceTasks });
-                    }
-                    await reorderTasks(changes);
-                    loadBoard();
-                });
-            });
-
-            const board = document.getElementById('board');
-            document.querySelectorAll('.column').forEach(column => {
-                column.addEventListener('dragstart', () => {
-                    column.classList.add('dragging');
-                });
-                column.addEventListener('dragend', async () => {
-                    column.classList.remove('dragging');
-                    const orderedIds = Array.from(board.querySelectorAll('.column')).map(el => parseInt(el.dataset.columnId));
-                    await reorderColumns(orderedIds);
-                    loadBoard();
-                });
+                } else {
+                    const afterElement = getColumnAfterElement(board, e.clientX);
+                    board.insertBefore(dragState.el, afterElement || board.querySelector('.add-column'));
+                }
             });
 
-            board.addEventListener('dragover', e => {
-                e.preventDefault();
-                const afterElement = getColumnAfterElement(board, e.clientX);
-                const dragging = document.querySelector('.column.dragging');
-                const addTile = board.querySelector('.add-column');
-                if (!dragging) return;
-                if (afterElement == null) {
-                    board.insertBefore(dragging, addTile);
+            board.addEventListener('drop', e => e.preventDefault());
+
+            board.addEventListener('dragend', async () => {
+                const state = dragState;
+                dragState = null;
+                if (!state) return;
+                state.el.classList.remove('dragging');
+                if (state.type === 'task') {
+                    const taskId = parseInt(state.el.dataset.taskId);
+                    const columnId = parseInt(state.el.closest('.task-list').dataset.columnId);
+                    const [afterId, beforeId] = neighborIds(state.el, '.task', 'taskId');
+                    if (columnId === state.columnId && afterId === state.neighbors[0] && beforeId === state.neighbors[1]) return;
+                    const moved = await moveTask(taskId, columnId, afterId, beforeId);
+                    if (!moved) return loadBoard();
+                    const task = boardModel.tasks.get(taskId);
+                    if (task) {
+                        task.column_id = moved.column_id;
+                        task.position = moved.position;
+                    }
+                    if (columnId !== state.columnId) {
+                        const done = task && task.completed ? 1 : 0;
+                        adjustCounts(state.columnId, -1, -done);
+                        adjustCounts(columnId, 1, done);
+                    }
                 } else {
-                    board.insertBefore(dragging, afterElement);
+                    const [afterId, beforeId] = neighborIds(state.el, '.column', 'columnId');
+                    if (afterId === state.neighbors[0] && beforeId === state.neighbors[1]) return;
+                    if (!await moveColumn(parseInt(state.el.dataset.columnId), afterId, beforeId)) loadBoard();
                 }
             });
         }
+        setupDragAndDrop();
     </script>
 </body>
 </html>
 '''
 
+_index_lock = threading.Lock()
+_index_page = None
+
+def _build_index_page(key):
+    html = HTML_TEMPLATE.replace('__LOGO_URL__', get_logo_data_url()).encode('utf-8')
+    digest = hashlib.sha256(html).hexdigest()[:32]
+    variants = {'identity': (html, digest), 'gzip': (gzip.compress(html, 9), digest + '-gz')}
+    if brotli is not None:
+        variants['br'] = (brotli.compress(html), digest + '-br')
+    return {'key': key, 'variants': variants}
+
+def get_index_page():
+    global _index_page
+    path = os.path.join(app.static_folder, _current_logo_name())
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    key = (path, mtime)
+    page = _index_page
+    if page is None or page['key'] != key:
+        with _index_lock:
+            page = _index_page
+            if page is None or page['key'] != key:
+                page = _index_page = _build_index_page(key)
+    return page
+
 @app.route('/')
 def index():
-    logo_url = get_logo_data_url()
-    return HTML_TEMPLATE.replace('__LOGO_URL__', logo_url)
-
-def _run_server():
-    pass
+    variants = get_index_page()['variants']
+    enc = request.accept_encodings.best_match([e for e in ('br', 'gzip') if e in variants]) or 'identity'
+    body, etag = variants[enc]
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(body, mimetype='text/html')
+        if enc != 'identity':
+            resp.headers['Content-Encoding'] = enc
+    resp.set_etag(etag)
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+def _reset_after_fork():
+    # a MongoClient is not fork-safe: drop the parent's handle so the worker opens its own pool
+    _db_state.update(pid=None, client=None, db=None)
+    _id_blocks.clear()
+
+# reloaded from disk in every gunicorn worker, so a HUP serves the code (and config) that is deployed now
+_SERVED_MODULES = ('config', 'serializers', 'cache', 'events', 'memstore', 'localstore', 'app')
+
+def _load_served_app():
+    for name in _SERVED_MODULES:
+        sys.modules.pop(name, None)
+    importlib.invalidate_caches()
+    return importlib.import_module('app').app
+
+def _served_module():
+    return sys.modules.get('app') or sys.modules[__name__]
+
+def _serve_wsgi(host, port):
+    workers = int(getattr(config, 'WORKERS', 0) or 0)
+    default_workers = (os.cpu_count() or 1) * 2 + 1
+    # every open /api/tasklists/<id>/events stream holds a thread for its lifetime (up to SSE_MAX_STREAMS of them)
+    threads = THREADS
+    keepalive = int(getattr(config, 'KEEPALIVE', 5))
+    try:
+        from gunicorn.app.base import BaseApplication
+    except Exception:
+        BaseApplication = None
+    if BaseApplication is not None:
+        if STORAGE != 'mongo':
+            # the embedded engines live in this process's memory; a second worker would see a different board
+            workers = 1
+        elif EVENTS_BACKEND == 'memory':
+            # the in-process EventBus only reaches the SSE clients of the worker that made the write.
+            # BoardCache needs no such care: its keys carry the list version stored in Mongo
+            if workers > 1:
+                print(f"WORKERS={workers} needs EVENTS_BACKEND = 'mongo' (change streams, replica set) or 'poll' (clients poll for changes)", file=sys.stderr)
+                return 1
+            workers = 1
+        else:
+            workers = workers or default_workers
+        class TaskListServer(BaseApplication):
+            def __init__(self, options):
+                self.options = options
+                super().__init__()
+            def load_config(self):
+                for k, v in self.options.items():
+                    if v is not None:
+                        self.cfg.set(k, v)
+            def load(self):
+                return _load_served_app()
+        TaskListServer({
+            'bind': f'{host}:{port}',
+            'workers': workers,
+            'threads': threads,
+            'worker_class': 'gthread',
+            'keepalive': keepalive,
+            'backlog': int(getattr(config, 'BACKLOG', 2048)),
+            'timeout': int(getattr(config, 'WORKER_TIMEOUT', 30)),
+            'graceful_timeout': int(getattr(config, 'GRACEFUL_TIMEOUT', 30)),
+            'max_requests': int(getattr(config, 'MAX_REQUESTS', 0)),
+            'max_requests_jitter': int(getattr(config, 'MAX_REQUESTS_JITTER', 0)),
+            # without preload every worker imports the code itself, so SIGHUP also picks up a new deploy
+            'preload_app': bool(getattr(config, 'PRELOAD_APP', False)),
+            'pidfile': getattr(config, 'PIDFILE', None),
+            'loglevel': getattr(config, 'LOG_LEVEL', 'info'),
+            'post_fork': lambda arbiter, worker: _served_module()._reset_after_fork(),
+            'post_worker_init': lambda worker: _served_module().get_db(),
+        }).run()
+        return 0
+    try:
+        from waitress import serve
+    except Exception:
+        print('gunicorn/waitress not installed (pip install -r requirements.txt); falling back to the threaded Flask server', file=sys.stderr)
+        app.run(host=host, port=port, threaded=True)
+        return 0
+    # waitress is single-process (the Windows path): all concurrency comes from its thread pool
+    serve(app, host=host, port=port, threads=(workers or default_workers) * threads, backlog=int(getattr(config, 'BACKLOG', 2048)),
+          channel_timeout=keepalive)
+    return 0
+
+def _reload_main(pidfile=None):
+    pidfile = pidfile or getattr(config, 'PIDFILE', None)
+    if not pidfile or not os.path.exists(pidfile):
+        print('no pidfile; set PIDFILE in config and start with: python app.py serve', file=sys.stderr)
+        return 1
+    import signal
+    with open(pidfile) as f:
+        pid = int(f.read().strip())
+    # HUP: the master keeps the listening socket, starts fresh workers, then lets the old ones drain
+    os.kill(pid, signal.SIGHUP)
+    print(f'reload signalled to {pid}')
+    return 0
+
+def _run_server(host=None, port=None, mode=None):
+    host = host or getattr(config, 'HOST', '127.0.0.1')
+    port = int(port or getattr(config, 'PORT', 5000))
+    mode = mode or getattr(config, 'SERVER_MODE', 'async')
+    if mode == 'async' and STORAGE != 'mongo':
+        print(f'async mode reads Mongo directly; with STORAGE={STORAGE} the WSGI server is used', file=sys.stderr)
+        mode = 'wsgi'
+    if mode == 'wsgi':
+        return _serve_wsgi(host, port)
+    if mode == 'async':
+        try:
+            import uvicorn
+            import asgi
+        except Exception as e:
+            print(f'async mode unavailable ({e}; pip install -r requirements-async.txt); falling back to the threaded Flask server', file=sys.stderr)
+        else:
+            if asgi.AsyncIOMotorClient is None or asgi.WsgiToAsgi is None:
+                print('async mode needs motor and asgiref installed (pip install -r requirements-async.txt)', file=sys.stderr)
+                return 1
+            uvicorn.run('asgi:application', host=host, port=port, log_level=getattr(config, 'LOG_LEVEL', 'info'),
+                        timeout_keep_alive=getattr(config, 'KEEPALIVE', 5), backlog=getattr(config, 'BACKLOG', 2048))
+            return 0
+    app.run(host=host, port=port, threaded=True)
+    return 0
+
+def _longest_increasing(seq):
+    # indexes into seq of one longest strictly increasing subsequence
+    tails, tail_idx, prev = [], [], [None] * len(seq)
+    for i, v in enumerate(seq):
+        k = bisect.bisect_left(tails, v)
+        if k == len(tails):
+            tails.append(v)
+            tail_idx.append(i)
+        else:
+            tails[k] = v
+            tail_idx[k] = i
+        prev[i] = tail_idx[k - 1] if k else None
+    out = []
+    i = tail_idx[-1] if tail_idx else None
+    while i is not None:
+        out.append(i)
+        i = prev[i]
+    return out[::-1]
 
 def qt_ui_main():
-    if QtWidgets is None:
+    try:
+        from PySide6 import QtWidgets, QtCore, QtGui
+    except Exception:
         return False
-    class TaskWidget(QtWidgets.QWidget):
-        toggled = QtCore.Signal(int)
-        deleted = QtCore.Signal(int)
-        def __init__(self, task, parent=None):
+    class _Relay(QtCore.QObject):
+        done = QtCore.Signal(object)
+        failed = QtCore.Signal(str)
+    class DbJob(QtCore.QRunnable):
+        def __init__(self, fn):
+            super().__init__()
+            self.fn = fn
+            self.relay = _Relay()
+        def run(self):
+            try:
+                res = self.fn()
+            except Exception as e:
+                self.relay.failed.emit(str(e) or e.__class__.__name__)
+                return
+            self.relay.done.emit(res)
+    class Db(QtCore.QObject):
+        error = QtCore.Signal(str)
+        busy = QtCore.Signal(bool)
+        def __init__(self, parent=None):
             super().__init__(parent)
-            self.task = task
-            hb = QtWidgets.QHBoxLayout(self)
-            self.cb = QtWidgets.QCheckBox()
-            self.cb.setChecked(bool(task.get('completed', False)))
-            self.cb.stateChanged.connect(self.on_toggle)
-            self.title = QtWidgets.QLabel(task.get('title',''))
-            btn = QtWidgets.QPushButton('Xóa')
-            btn.setStyleSheet('background:#f44336;color:#fff;border:none;padding:4px 8px;')
-            btn.clicked.connect(self.on_delete)
-            hb.addWidget(self.cb)
-            hb.addWidget(self.title)
-            hb.addStretch(1)
-            hb.addWidget(btn)
-        def on_toggle(self, _):
-            self.toggled.emit(self.task['id'])
-        def on_delete(self):
-            self.deleted.emit(self.task['id'])
+            # one thread: jobs run in submission order, so a reload queued after a write sees it
+            self.pool = QtCore.QThreadPool(self)
+            self.pool.setMaxThreadCount(1)
+            self.jobs = set()
+        def run(self, fn, done=None, failed=None):
+            job = DbJob(fn)
+            job.setAutoDelete(False)
+            self.jobs.add(job)
+            if len(self.jobs) == 1:
+                self.busy.emit(True)
+            def finish(res):
+                self._release(job)
+                if done:
+                    done(res)
+            def fail(msg):
+                self._release(job)
+                if failed:
+                    failed(msg)
+                self.error.emit(msg)
+            # queued: the callbacks run on the GUI thread, which owns the relay
+            job.relay.done.connect(finish, QtCore.Qt.QueuedConnection)
+            job.relay.failed.connect(fail, QtCore.Qt.QueuedConnection)
+            self.pool.start(job)
+        def _release(self, job):
+            self.jobs.discard(job)
+            if not self.jobs:
+                self.busy.emit(False)
+    class TaskModel(QtCore.QAbstractListModel):
+        toggle_requested = QtCore.Signal(int)
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.tasks = []
+        def rowCount(self, parent=QtCore.QModelIndex()):
+            return 0 if parent.isValid() else len(self.tasks)
+        def data(self, index, role=QtCore.Qt.DisplayRole):
+            if not index.isValid():
+                return None
+            t = self.tasks[index.row()]
+            if role == QtCore.Qt.DisplayRole:
+                return t.get('title', '')
+            if role == QtCore.Qt.ToolTipRole:
+                return t.get('description') or None
+            if role == QtCore.Qt.CheckStateRole:
+                return QtCore.Qt.Checked if t.get('completed', False) else QtCore.Qt.Unchecked
+            if role == QtCore.Qt.UserRole:
+                return t['id']
+            return None
+        def flags(self, index):
+            f = super().flags(index)
+            return f | QtCore.Qt.ItemIsUserCheckable if index.isValid() else f
+        def setData(self, index, value, role=QtCore.Qt.EditRole):
+            if role != QtCore.Qt.CheckStateRole or not index.isValid():
+                return False
+            # the column does the write; the row changes when the stored task comes back through upsert()
+            self.toggle_requested.emit(self.tasks[index.row()]['id'])
+            return False
+        def sync(self, tasks):
+            # the server's order (position, then id), the same as the web board
+            wanted = sorted(tasks, key=lambda t: (t.get('position', 0), t['id']))
+            keep = {t['id'] for t in wanted}
+            root = QtCore.QModelIndex()
+            for row in reversed(range(len(self.tasks))):
+                if self.tasks[row]['id'] not in keep:
+                    self.beginRemoveRows(root, row, row)
+                    del self.tasks[row]
+                    self.endRemoveRows()
+            # rows on the longest run already in target order stay put; every other row moves once
+            order = {t['id']: i for i, t in enumerate(wanted)}
+            stable = _longest_increasing([order[t['id']] for t in self.tasks])
+            stable = {self.tasks[k]['id'] for k in stable}
+            for i, t in enumerate(wanted):
+                if t['id'] in stable:
+                    continue
+                prev = self._row(wanted[i - 1]['id']) if i else -1
+                j = self._row(t['id'])
+                if j is None:
+                    self.beginInsertRows(root, prev + 1, prev + 1)
+                    self.tasks.insert(prev + 1, t)
+                    self.endInsertRows()
+                elif j != prev + 1:
+                    self.beginMoveRows(root, j, j, root, prev + 1)
+                    self.tasks.insert(prev + 1 if j > prev else prev, self.tasks.pop(j))
+                    self.endMoveRows()
+            for i, t in enumerate(wanted):
+                if self.tasks[i] != t:
+                    self.tasks[i] = t
+                    idx = self.index(i)
+                    self.dataChanged.emit(idx, idx)
+        def _row(self, tid):
+            return next((k for k, t in enumerate(self.tasks) if t['id'] == tid), None)
+        def upsert(self, task):
+            self.sync([t for t in self.tasks if t['id'] != task['id']] + [task])
+        def remove(self, tid):
+            self.sync([t for t in self.tasks if t['id'] != tid])
     class ColumnWidget(QtWidgets.QGroupBox):
         add_task = QtCore.Signal(int)
         delete_column = QtCore.Signal(int)
-        refresh = QtCore.Signal()
-        def __init__(self, column, tasks, parent=None):
+        def __init__(self, column, list_id, db, parent=None):
             super().__init__(parent)
             self.column = column
+            self.list_id = list_id
+            self.db = db
+            self.closed = False
             self.setTitle(column.get('title',''))
             v = QtWidgets.QVBoxLayout(self)
             hv = QtWidgets.QHBoxLayout()
@@ -1369,28 +2951,70 @@ def qt_ui_main():
             hv.addWidget(btn_del)
             hv.addStretch(1)
             v.addLayout(hv)
+            self.bar = QtWidgets.QProgressBar()
+            self.bar.setRange(0,100)
+            v.addWidget(self.bar)
+            self.lbl = QtWidgets.QLabel()
+            self.lbl.setAlignment(QtCore.Qt.AlignRight)
+            v.addWidget(self.lbl)
+            self.model = TaskModel(self)
+            self.view = QtWidgets.QListView()
+            self.view.setModel(self.model)
+            self.view.setUniformItemSizes(True)
+            act = QtGui.QAction('Xóa', self.view)
+            act.setShortcut(QtGui.QKeySequence.Delete)
+            act.setShortcutContext(QtCore.Qt.WidgetShortcut)
+            act.triggered.connect(self.on_delete_selected)
+            self.view.addAction(act)
+            self.view.setContextMenuPolicy(QtCore.Qt.ActionsContextMenu)
+            v.addWidget(self.view, 1)
+            self.model.toggle_requested.connect(self.on_toggle)
+            for sig in (self.model.rowsInserted, self.model.rowsRemoved, self.model.dataChanged, self.model.modelReset):
+                sig.connect(self.update_progress)
+            self.update_progress()
+        def set_column(self, column):
+            if column.get('title') != self.column.get('title'):
+                self.setTitle(column.get('title',''))
+            self.column = column
+        def update_progress(self, *_):
+            tasks = self.model.tasks
             comp = sum(1 for t in tasks if t.get('completed', False))
             total = len(tasks)
             percent = int(round((comp/total)*100)) if total else 0
-            bar = QtWidgets.QProgressBar()
-            bar.setRange(0,100)
-            bar.setValue(percent)
-            v.addWidget(bar)
-            lbl = QtWidgets.QLabel(f"{comp}/{total}   {percent}%")
-            lbl.setAlignment(QtCore.Qt.AlignRight)
-            v.addWidget(lbl)
-            for t in tasks:
-                tw = TaskWidget(t)
-                tw.toggled.connect(self.on_toggle)
-                tw.deleted.connect(self.on_delete)
-                v.addWidget(tw)
-            v.addStretch(1)
+            self.bar.setValue(percent)
+            self.lbl.setText(f"{comp}/{total}   {percent}%")
         def on_toggle(self, tid):
-            tasks_col.update_one({'id': tid}, {'$set': {'completed': not tasks_col.find_one({'id': tid}).get('completed', False), 'updated_at': datetime.utcnow()}})
-            self.refresh.emit()
+            before = next((t for t in self.model.tasks if t['id'] == tid), None)
+            if before is None or tid < 0:
+                return
+            self.model.upsert(dict(before, completed=not before.get('completed', False)))
+            list_id = self.list_id
+            def write():
+                t = tasks_col.find_one_and_update({'id': tid}, _toggle_pipeline(), projection=TASK_PROJECTION, return_document=ReturnDocument.AFTER)
+                touch_list(list_id)
+                return t
+            def done(t):
+                if self.closed:
+                    return
+                if t:
+                    self.model.upsert(task_to_dict(t))
+                else:
+                    self.model.remove(tid)
+            self.db.run(write, done, lambda _: self.closed or self.model.upsert(before))
+        def on_delete_selected(self):
+            idx = self.view.currentIndex()
+            if idx.isValid():
+                self.on_delete(idx.data(QtCore.Qt.UserRole))
         def on_delete(self, tid):
-            tasks_col.delete_one({'id': tid})
-            self.refresh.emit()
+            before = next((t for t in self.model.tasks if t['id'] == tid), None)
+            if before is None or tid < 0:
+                return
+            self.model.remove(tid)
+            list_id = self.list_id
+            def write():
+                tasks_col.delete_one({'id': tid})
+                touch_list(list_id)
+            self.db.run(write, failed=lambda _: self.closed or self.model.upsert(before))
     class Main(QtWidgets.QMainWindow):
         def __init__(self):
             super().__init__()
@@ -1460,6 +3084,12 @@ def qt_ui_main():
             tb.addWidget(self.btn_add_column)
             v.addLayout(tb)
             self.current_list_id = None
+            self.columns = {}
+            self.board_seq = 0
+            self.temp_ids = 0
+            self.db = Db(self)
+            self.db.error.connect(lambda msg: self.statusBar().showMessage(f'Lỗi cơ sở dữ liệu: {msg}', 8000))
+            self.db.busy.connect(lambda on: self.statusBar().showMessage('Đang tải…') if on else self.statusBar().clearMessage())
             self.btn_add_list.clicked.connect(self.add_list)
             self.btn_rename.clicked.connect(self.rename_list)
             self.btn_delete.clicked.connect(self.delete_list)
@@ -1467,8 +3097,10 @@ def qt_ui_main():
             self.lists.itemSelectionChanged.connect(self.on_select_list)
             self.reload_lists()
         def reload_lists(self):
+            self.db.run(lambda: list(tasklists_col.find(dict(LIVE), projection=TASKLIST_PROJECTION).sort('created_at', 1)), self.show_lists)
+        def show_lists(self, ls):
+            self.lists.blockSignals(True)
             self.lists.clear()
-            ls = list(tasklists_col.find({}).sort('created_at', 1))
             for l in ls:
                 it = QtWidgets.QListWidgetItem(f"{l['id']}|{l.get('title','')}")
                 self.lists.addItem(it)
@@ -1479,6 +3111,7 @@ def qt_ui_main():
                     if l['id'] == self.current_list_id:
                         self.lists.setCurrentRow(i)
                         break
+            self.lists.blockSignals(False)
             self.reload_board()
         def on_select_list(self):
             it = self.lists.currentItem()
@@ -1490,29 +3123,60 @@ def qt_ui_main():
                 self.current_list_id = None
             self.reload_board()
         def reload_board(self):
-            for i in reversed(range(self.board_layout.count()-1)):
-                w = self.board_layout.itemAt(i).widget()
-                if w:
-                    w.setParent(None)
-            if not self.current_list_id:
-                return
-            cols = list(columns_col.find({'task_list_id': self.current_list_id}).sort('position', 1))
-            for c in cols:
-                ts = list(tasks_col.find({'column_id': c['id']}).sort([('completed', 1), ('position', 1)]))
-                cw = ColumnWidget(c, ts)
-                cw.add_task.connect(self.add_task)
-                cw.delete_column.connect(self.delete_column)
-                cw.refresh.connect(self.reload_board)
-                self.board_layout.insertWidget(self.board_layout.count()-1, cw)
+            self.board_seq += 1
+            seq, list_id = self.board_seq, self.current_list_id
+            def done(cols):
+                # a newer reload (or a list switch) supersedes this one
+                if seq == self.board_seq:
+                    self.show_board(cols)
+            self.db.run(lambda: _load_board(list_id) if list_id else [], done)
+        def show_board(self, cols):
+            # diff against the widgets already on screen: unchanged columns and rows are left alone
+            bar = self.board_scroll.horizontalScrollBar()
+            x = bar.value()
+            wanted = {c['id'] for c in cols}
+            for cid in [cid for cid in self.columns if cid not in wanted]:
+                self.remove_column_widget(cid)
+            for i, c in enumerate(cols):
+                cw = self.columns.get(c['id'])
+                if cw is None or cw.list_id != self.current_list_id:
+                    if cw is not None:
+                        self.remove_column_widget(c['id'])
+                    cw = self.column_widget(c)
+                cw.set_column(c)
+                cw.model.sync(c['tasks'])
+                if self.board_layout.indexOf(cw) != i:
+                    self.board_layout.removeWidget(cw)
+                    self.board_layout.insertWidget(i, cw)
+            bar.setValue(x)
+        def column_widget(self, c):
+            cw = ColumnWidget(c, self.current_list_id, self.db)
+            cw.add_task.connect(self.add_task)
+            cw.delete_column.connect(self.delete_column)
+            self.columns[c['id']] = cw
+            self.board_layout.insertWidget(self.board_layout.count()-1, cw)
+            return cw
+        def remove_column_widget(self, cid):
+            cw = self.columns.pop(cid, None)
+            if cw is not None:
+                # jobs still in flight check this before touching the deleted widget
+                cw.closed = True
+                self.board_layout.removeWidget(cw)
+                cw.deleteLater()
         def add_list(self):
             title, ok = QtWidgets.QInputDialog.getText(self, 'Danh sách', 'Tên danh sách:')
             if not ok or not title:
                 return
-            new_id = next_id(tasklists_col)
-            doc = {'id': new_id, 'title': title, 'created_at': datetime.utcnow()}
-            tasklists_col.insert_one(doc)
-            self.current_list_id = new_id
-            self.reload_lists()
+            def write():
+                new_id = next_id(tasklists_col)
+                now = datetime.utcnow()
+                tasklists_col.insert_one({'id': new_id, 'title': title, 'created_at': now, 'updated_at': now})
+                touch_lists()
+                return new_id
+            def done(new_id):
+                self.current_list_id = new_id
+                self.reload_lists()
+            self.db.run(write, done)
         def rename_list(self):
             it = self.lists.currentItem()
             if not it:
@@ -1521,8 +3185,11 @@ def qt_ui_main():
             title, ok = QtWidgets.QInputDialog.getText(self, 'Sửa', 'Tên danh sách:')
             if not ok or not title:
                 return
-            tasklists_col.update_one({'id': lid}, {'$set': {'title': title}})
-            self.reload_lists()
+            it.setText(f"{lid}|{title}")
+            def write():
+                tasklists_col.update_one({'id': lid}, {'$set': {'title': title, 'updated_at': datetime.utcnow()}})
+                touch_lists()
+            self.db.run(write, failed=lambda _: self.reload_lists())
         def delete_list(self):
             it = self.lists.currentItem()
             if not it:
@@ -1531,11 +3198,12 @@ def qt_ui_main():
             m = QtWidgets.QMessageBox.question(self, 'Xác nhận', 'Xóa danh sách này?')
             if m != QtWidgets.QMessageBox.Yes:
                 return
-            col_ids = [c['id'] for c in columns_col.find({'task_list_id': lid})]
-            tasks_col.delete_many({'column_id': {'$in': col_ids}})
-            columns_col.delete_many({'task_list_id': lid})
-            tasklists_col.delete_one({'id': lid})
+            def write():
+                tombstone_tasklist(lid)
+                touch_lists()
+            self.lists.takeItem(self.lists.row(it))
             self.current_list_id = None
+            self.db.run(write)
             self.reload_lists()
         def add_column(self):
             if not self.current_list_id:
@@ -1543,12 +3211,19 @@ def qt_ui_main():
             title, ok = QtWidgets.QInputDialog.getText(self, 'Cột', 'Tiêu đề cột:')
             if not ok or not title:
                 return
-            last = columns_col.find_one({'task_list_id': self.current_list_id}, sort=[('position', -1)])
-            pos = (last['position'] + 1) if last else 1
-            new_id = next_id(columns_col)
-            doc = {'id': new_id, 'title': title, 'position': pos, 'created_at': datetime.utcnow(), 'task_list_id': self.current_list_id}
-            columns_col.insert_one(doc)
-            self.reload_board()
+            list_id = self.current_list_id
+            def write():
+                last = columns_col.find_one({'task_list_id': list_id}, sort=[('position', -1)])
+                pos = (last['position'] + POSITION_STEP) if last else POSITION_STEP
+                now = datetime.utcnow()
+                doc = {'id': next_id(columns_col), 'title': title, 'position': pos, 'created_at': now, 'updated_at': now, 'task_list_id': list_id}
+                columns_col.insert_one(doc)
+                touch_list(list_id)
+                return column_to_dict(doc)
+            def done(c):
+                if list_id == self.current_list_id and c['id'] not in self.columns:
+                    self.column_widget(c)
+            self.db.run(write, done)
         def add_task(self, cid):
             title, ok = QtWidgets.QInputDialog.getText(self, 'Công việc', 'Tiêu đề công việc:')
             if not ok:
@@ -1556,20 +3231,38 @@ def qt_ui_main():
             desc, ok2 = QtWidgets.QInputDialog.getText(self, 'Công việc', 'Mô tả:')
             if not ok2:
                 return
-            last = tasks_col.find_one({'column_id': cid}, sort=[('position', -1)])
-            pos = (last['position'] + 1) if last else 1
-            new_id = next_id(tasks_col)
+            cw = self.columns.get(cid)
+            if cw is None:
+                return
+            # show the row at once under a temporary negative id; the stored task replaces it
+            self.temp_ids -= 1
+            temp_id = self.temp_ids
             now = datetime.utcnow()
-            doc = {'id': new_id, 'title': title or 'New Task', 'description': desc or '', 'completed': False, 'position': pos, 'column_id': cid, 'created_at': now, 'updated_at': now}
-            tasks_col.insert_one(doc)
-            self.reload_board()
+            last_pos = max((t.get('position', 0) for t in cw.model.tasks), default=0)
+            cw.model.upsert(task_to_dict({'id': temp_id, 'title': title or 'New Task', 'description': desc or '', 'position': last_pos + POSITION_STEP, 'column_id': cid}, now))
+            list_id = self.current_list_id
+            def write():
+                last = tasks_col.find_one({'column_id': cid}, sort=[('position', -1)])
+                pos = (last['position'] + POSITION_STEP) if last else POSITION_STEP
+                doc = {'id': next_id(tasks_col), 'title': title or 'New Task', 'description': desc or '', 'completed': False, 'position': pos, 'column_id': cid, 'created_at': now, 'updated_at': now}
+                tasks_col.insert_one(doc)
+                touch_list(list_id)
+                return task_to_dict(doc)
+            def done(t):
+                if not cw.closed:
+                    cw.model.remove(temp_id)
+                    cw.model.upsert(t)
+            self.db.run(write, done, lambda _: cw.closed or cw.model.remove(temp_id))
         def delete_column(self, cid):
             m = QtWidgets.QMessageBox.question(self, 'Xác nhận', 'Xóa cột này?')
             if m != QtWidgets.QMessageBox.Yes:
                 return
-            tasks_col.delete_many({'column_id': cid})
-            columns_col.delete_one({'id': cid})
-            self.reload_board()
+            list_id = self.current_list_id
+            def write():
+                tombstone_column(cid)
+                touch_list(list_id)
+            self.remove_column_widget(cid)
+            self.db.run(write, failed=lambda _: self.reload_board())
     appq = QtWidgets.QApplication(sys.argv)
     try:
         import base64 as _b64
@@ -1585,7 +3278,96 @@ def qt_ui_main():
     appq.exec()
     return True
 
+def _indexes_main():
+    errors = ensure_indexes(log=print)
+    for label, scan, stages in explain_hot_queries():
+        print(f"{'COLLSCAN' if scan else 'ok':>8}  {label}: {stages}")
+    return 1 if errors else 0
+
+def _reap_main(batch=None):
+    batch = int(batch) if batch else None
+    total = 0
+    while True:
+        if not claim_reap_lease():
+            lease = counters_col.find_one({'_id': REAP_LEASE_KEY})
+            print(f"reaper lease held by {lease['owner']} until {lease['expires']:%Y-%m-%d %H:%M:%S} UTC", file=sys.stderr)
+            return 1
+        n, what = reap_once(batch)
+        if not n:
+            break
+        total += n
+        left = ''
+        if what[0] == 'column':
+            left = f", {tasks_col.count_documents({'column_id': what[1]})} tasks left"
+        print(f'{total:>10} purged  ({what[0]} {what[1]}{left})')
+    print(f'done: {total} documents purged')
+    return 0
+
+def _export_main(list_id, path=None):
+    out = open(path, 'wb') if path else sys.stdout.buffer
+    try:
+        for chunk in export_tasklist(int(list_id)):
+            out.write(chunk)
+    finally:
+        if path:
+            out.close()
+    return 0
+
+def _import_main(path, title=None):
+    try:
+        with open(path, 'rb') as f:
+            stats = import_tasklist(f, title=title)
+    except ValueError as e:
+        print(f'import failed: {e}', file=sys.stderr)
+        return 1
+    print(json.dumps(stats))
+    return 0 if stats['tasklist'] is not None else 1
+
+_STARTUP_PROBE = '''
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+c = app.app.test_client()
+r1 = c.get('/api/tasklists')
+t2 = time.perf_counter()
+r2 = c.get('/api/tasklists')
+t3 = time.perf_counter()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'first_request_ms': (t2 - t1) * 1000, 'warm_request_ms': (t3 - t2) * 1000, 'status': [r1.status_code, r2.status_code]}))
+'''
+
+def _startup_main(runs=5):
+    import subprocess
+    here = os.path.dirname(os.path.abspath(__file__))
+    rows = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', _STARTUP_PROBE], cwd=here, capture_output=True, text=True)
+        if out.returncode != 0:
+            print(out.stderr, file=sys.stderr)
+            return 1
+        rows.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    for k in ('import_ms', 'first_request_ms', 'warm_request_ms'):
+        vals = sorted(r[k] for r in rows)
+        print(f"{k:>18}: min {vals[0]:8.1f}  median {vals[len(vals)//2]:8.1f}  max {vals[-1]:8.1f}")
+    return 0
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'indexes':
+        sys.exit(_indexes_main())
+    if len(sys.argv) > 1 and sys.argv[1] == 'startup-timing':
+        sys.exit(_startup_main())
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        sys.exit(_run_server(*sys.argv[2:4], mode='wsgi'))
+    if len(sys.argv) > 1 and sys.argv[1] == 'reload':
+        sys.exit(_reload_main(*sys.argv[2:3]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve-async':
+        sys.exit(_run_server(*sys.argv[2:4], mode='async'))
+    if len(sys.argv) > 1 and sys.argv[1] == 'reap':
+        sys.exit(_reap_main(*sys.argv[2:3]))
+    if len(sys.argv) > 2 and sys.argv[1] == 'export':
+        sys.exit(_export_main(*sys.argv[2:4]))
+    if len(sys.argv) > 2 and sys.argv[1] == 'import':
+        sys.exit(_import_main(*sys.argv[2:4]))
     ran = qt_ui_main()
     if not ran:
         try:
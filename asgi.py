@@ -0,0 +1,252 @@
+import os
+import re
+import asyncio
+import hashlib
+from datetime import datetime
+from urllib.parse import parse_qsl
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except Exception:
+    AsyncIOMotorClient = None
+try:
+    from asgiref.sync import sync_to_async
+    from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+except Exception:
+    WsgiToAsgi = None
+import config
+import app as core
+from serializers import TASK_PROJECTION, COLUMN_PROJECTION, TASKLIST_PROJECTION, task_to_dict, column_to_dict, tasklist_to_dict, dumps
+
+FANOUT_COLUMNS = getattr(config, 'ASYNC_FANOUT_COLUMNS', 8)
+# threads for the Flask routes (every write) that have no Motor version
+WSGI_THREADS = getattr(config, 'ASYNC_WSGI_THREADS', 32)
+JSON = ('content-type', 'application/json')
+CORS_HEADERS = [('access-control-allow-origin', '*'), ('access-control-expose-headers', 'X-Next-Cursor, ETag')]
+
+_state = {'pid': None, 'db': None}
+
+async def get_adb():
+    if _state['db'] is not None and _state['pid'] == os.getpid():
+        return _state['db']
+    # the blocking ping, index build and seed run once, on a worker thread
+    await asyncio.to_thread(core.get_db)
+    if _state['pid'] != os.getpid():
+        client = AsyncIOMotorClient(core._db_state['uri'], **core._mongo_options())
+        _state.update(pid=os.getpid(), db=client[core.db_name])
+    return _state['db']
+
+class Request:
+    def __init__(self, scope):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope.get('query_string', b'')
+        self.args = dict(parse_qsl(self.query_string.decode('latin-1')))
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+
+    def arg_int(self, name):
+        try:
+            return int(self.args[name])
+        except (KeyError, ValueError):
+            return None
+
+    def variant(self):
+        return hashlib.sha1(self.query_string).hexdigest()[:12]
+
+    def etag_matches(self, etag):
+        inm = self.headers.get('if-none-match')
+        if not inm:
+            return False
+        if inm.strip() == '*':
+            return True
+        return any(t.strip().removeprefix('W/').strip('"') == etag for t in inm.split(','))
+
+async def send_response(send, status, body=b'', headers=()):
+    hs = [(b'content-length', str(len(body)).encode('ascii'))]
+    hs += [(k.encode('latin-1'), v.encode('latin-1')) for k, v in list(headers) + CORS_HEADERS]
+    await send({'type': 'http.response.start', 'status': status, 'headers': hs})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def conditional(req, send, etag, build):
+    validators = [('etag', f'"{etag}"'), ('cache-control', 'no-cache')]
+    if req.etag_matches(etag):
+        return await send_response(send, 304, b'', validators)
+    status, body, headers = await build()
+    await send_response(send, status, body, headers + (validators if status == 200 else []))
+
+def _bad_cursor():
+    return 400, dumps({'error': 'invalid cursor'}), [JSON]
+
+async def _board_tasks(db, col_ids):
+    async def chunk(ids):
+        return await db[core.tasks_col.name].find({'column_id': {'$in': ids}}, projection=TASK_PROJECTION).sort('position', 1).to_list(None)
+    # large boards: query groups of columns concurrently over separate pooled connections
+    groups = [col_ids[i:i + FANOUT_COLUMNS] for i in range(0, len(col_ids), FANOUT_COLUMNS)]
+    return [t for part in await asyncio.gather(*(chunk(g) for g in groups)) for t in part]
+
+async def _build_board(db, req, list_id):
+    task_limit = req.arg_int('task_limit')
+    limit, cursor, ok = core.parse_page_args(req.arg_int('limit'), req.args.get('after'))
+    if not ok:
+        return None
+    next_page = None
+    if limit is None and task_limit is None:
+        q = core._board_filter(list_id)
+        cols = await db[core.columns_col.name].find(q, projection=COLUMN_PROJECTION).sort('position', 1).to_list(None)
+        by_col = {c['id']: [] for c in cols}
+        for t in await _board_tasks(db, list(by_col)) if by_col else ():
+            by_col[t['column_id']].append(t)
+        now = datetime.utcnow()
+        result = [column_to_dict(c, by_col[c['id']], now) for c in cols]
+    else:
+        if task_limit is not None:
+            task_limit = max(1, min(task_limit, core.MAX_PAGE_LIMIT))
+        pipeline = core.board_page_pipeline(list_id, limit, cursor, task_limit, bool(req.arg_int('stats')))
+        cols = await db[core.columns_col.name].aggregate(pipeline).to_list(None)
+        result, next_page = core.shape_board_page(cols, limit, task_limit)
+    return dumps(result), next_page
+
+async def get_columns(req, send, receive):
+    db = await get_adb()
+    list_id = req.arg_int('list_id')
+    key = None
+    if list_id is not None:
+        # read the version before the board, so an ETag never labels older data
+        tl = await db[core.tasklists_col.name].find_one({'id': list_id}, projection={'_id': 0, 'version': 1})
+        if tl:
+            key = (list_id, tl.get('version', 0), req.variant())
+
+    async def build():
+        cached = core.board_cache.get(key) if key else None
+        if cached is None:
+            cached = await _build_board(db, req, list_id)
+            if cached is None:
+                return _bad_cursor()
+            if key:
+                core.board_cache.put(key, *cached)
+        body, next_page = cached
+        return 200, body, [JSON] + ([('x-next-cursor', next_page)] if next_page else [])
+
+    if list_id is None:
+        status, body, headers = await build()
+        return await send_response(send, status, body, headers)
+    etag = 'L%s-%s-%s' % key if key else f'L{list_id}-x-{req.variant()}'
+    await conditional(req, send, etag, build)
+
+async def _paged(req, col, q, field, projection, to_dict):
+    limit, cursor, ok = core.parse_page_args(req.arg_int('limit'), req.args.get('after'))
+    if not ok:
+        return _bad_cursor()
+    if cursor is not None:
+        q = {'$and': [q, core._after(field, cursor)]}
+    limit = limit or core.MAX_PAGE_LIMIT
+    found = col.find(q, projection=projection).sort([(field, 1), ('id', 1)])
+    docs = await found.limit(limit + 1).to_list(limit + 1)
+    headers = [JSON]
+    if len(docs) > limit:
+        docs = docs[:limit]
+        headers.append(('x-next-cursor', core.encode_cursor(docs[-1].get(field), docs[-1]['id'])))
+    now = datetime.utcnow()
+    return 200, dumps([to_dict(d, now) for d in docs]), headers
+
+async def _live_column(db, column_id):
+    c = await db[core.columns_col.name].find_one(dict(core.LIVE, id=column_id), projection={'_id': 0, 'task_list_id': 1})
+    if c is None or c.get('task_list_id') is not None and not await db[core.tasklists_col.name].find_one(dict(core.LIVE, id=c['task_list_id']), projection={'_id': 1}):
+        return None
+    return c
+
+async def get_tasks(req, send, receive, column_id):
+    db = await get_adb()
+    if await _live_column(db, int(column_id)) is None:
+        return await send_response(send, 404, dumps({'error': 'not found'}), [JSON])
+    status, body, headers = await _paged(req, db[core.tasks_col.name], {'column_id': int(column_id)}, 'position', TASK_PROJECTION, task_to_dict)
+    await send_response(send, status, body, headers)
+
+async def get_tasklists(req, send, receive):
+    db = await get_adb()
+    v = await db[core.counters_col.name].find_one({'_id': core.LISTS_VERSION_KEY}, projection={'seq': 1})
+    etag = f"T{v['seq'] if v else 0}-{req.variant()}"
+    await conditional(req, send, etag, lambda: _paged(req, db[core.tasklists_col.name], dict(core.LIVE), 'created_at', TASKLIST_PROJECTION, tasklist_to_dict))
+
+async def tasklist_events(req, send, receive, list_id):
+    if core.EVENTS_BACKEND == 'poll':
+        return await send_response(send, 204)
+    await get_adb()
+    core._start_change_watcher()
+    sub = core.bus.subscribe_async(int(list_id))
+    disconnected = asyncio.Event()
+
+    async def watch():
+        while True:
+            msg = await receive()
+            if msg['type'] == 'http.disconnect':
+                disconnected.set()
+                return
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no'),
+        ] + [(k.encode('latin-1'), v.encode('latin-1')) for k, v in CORS_HEADERS]})
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+        while not disconnected.is_set():
+            ev = await sub.get(core.SSE_KEEPALIVE)
+            if disconnected.is_set():
+                break
+            await send({'type': 'http.response.body', 'body': core.sse_frame(sub, ev), 'more_body': True})
+    except OSError:
+        pass
+    finally:
+        watcher.cancel()
+        core.bus.unsubscribe(sub)
+
+ROUTES = [
+    ('GET', re.compile(r'^/api/columns$'), get_columns),
+    ('GET', re.compile(r'^/api/columns/(\d+)/tasks$'), get_tasks),
+    ('GET', re.compile(r'^/api/tasklists$'), get_tasklists),
+    ('GET', re.compile(r'^/api/tasklists/(\d+)/events$'), tasklist_events),
+]
+
+if WsgiToAsgi is not None:
+    class _PooledWsgiInstance(WsgiToAsgiInstance):
+        # asgiref's default (thread_sensitive=True) runs every request on one shared thread, one at a time
+        run_wsgi_app = sync_to_async(WsgiToAsgiInstance.run_wsgi_app.__wrapped__, thread_sensitive=False)
+
+    class PooledWsgiToAsgi(WsgiToAsgi):
+        async def __call__(self, scope, receive, send):
+            await _PooledWsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+_wsgi = PooledWsgiToAsgi(core.app) if WsgiToAsgi is not None else None
+
+async def _lifespan(receive, send):
+    while True:
+        msg = await receive()
+        if msg['type'] == 'lifespan.startup':
+            # sync_to_async(thread_sensitive=False) and asyncio.to_thread share the loop's default pool
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(WSGI_THREADS, thread_name_prefix='wsgi'))
+            try:
+                await get_adb()
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif msg['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    method = scope['method']
+    path = scope['path']
+    for m, pattern, handler in ROUTES:
+        if method == m:
+            match = pattern.match(path)
+            if match:
+                return await handler(Request(scope), send, receive, *match.groups())
+    if _wsgi is None:
+        return await send_response(send, 501, dumps({'error': 'asgiref is required for this route in async mode'}), [JSON])
+    # writes and everything else: the Flask routes on a worker thread
+    await _wsgi(scope, receive, send)
@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import app as taskapp
+
+def _seed(list_id, n_cols, n_tasks, id_base):
+    now = datetime.utcnow()
+    cols = []
+    tasks = []
+    tid = id_base
+    for ci in range(n_cols):
+        cid = id_base + ci
+        cols.append({'id': cid, 'title': f'Col {ci}', 'position': ci + 1, 'created_at': now, 'task_list_id': list_id})
+        for ti in range(n_tasks):
+            tasks.append({'id': tid, 'title': f'Task {ti}', 'description': '', 'completed': False, 'position': ti + 1, 'column_id': cid, 'created_at': now, 'updated_at': now})
+            tid += 1
+    taskapp.columns_col.insert_many(cols)
+    if tasks:
+        taskapp.tasks_col.insert_many(tasks)
+    return [c['id'] for c in cols]
+
+def _cleanup(list_id, col_ids):
+    taskapp.tasks_col.delete_many({'column_id': {'$in': col_ids}})
+    taskapp.columns_col.delete_many({'task_list_id': list_id})
+
+def run(col_counts, n_tasks, repeat):
+    client = taskapp.app.test_client()
+    list_id = 10 ** 9
+    id_base = 10 ** 9
+    print(f"{'columns':>8} {'tasks':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for n_cols in col_counts:
+        col_ids = _seed(list_id, n_cols, n_tasks, id_base)
+        try:
+            client.get(f'/api/columns?list_id={list_id}')
+            samples = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                r = client.get(f'/api/columns?list_id={list_id}')
+                samples.append((time.perf_counter() - t0) * 1000)
+                assert r.status_code == 200
+            samples.sort()
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            print(f"{n_cols:>8} {n_cols * n_tasks:>8} {statistics.median(samples):>9.2f} {p95:>9.2f} {samples[-1]:>9.2f}")
+        finally:
+            _cleanup(list_id, col_ids)
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='GET /api/columns latency against column count')
+    ap.add_argument('--columns', default='1,5,10,20,40,80')
+    ap.add_argument('--tasks', type=int, default=20, help='tasks per column')
+    ap.add_argument('--repeat', type=int, default=50)
+    a = ap.parse_args()
+    run([int(x) for x in a.columns.split(',')], a.tasks, a.repeat)
@@ -0,0 +1,39 @@
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+HERE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEAVY = ('PySide6', 'PIL', 'tkinter', 'webview')
+LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def importtime(module):
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=HERE, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise SystemExit(out.stderr)
+    rows = []
+    for line in out.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2))
+    return rows
+
+def report(module, top, runs):
+    samples = [importtime(module) for _ in range(runs)]
+    totals = sorted(sum(r[1] for r in rows) for rows in samples)
+    rows = samples[0]
+    print(f'import {module}: {len(rows)} modules, total self time median {totals[len(totals)//2] / 1000:.1f} ms over {runs} run(s)')
+    heavy = sorted({r[0].split('.')[0] for r in rows if r[0].split('.')[0] in HEAVY})
+    print('GUI/imaging modules loaded:', ', '.join(heavy) if heavy else 'none')
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module (top-level imports of {module})")
+    for name, self_us, cum_us, depth in sorted((r for r in rows if r[3] <= 1), key=lambda r: -r[2])[:top]:
+        print(f'{cum_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}')
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='python -X importtime report for the server import path')
+    ap.add_argument('--module', default='app')
+    ap.add_argument('--top', type=int, default=25)
+    ap.add_argument('--runs', type=int, default=5)
+    a = ap.parse_args()
+    report(a.module, a.top, a.runs)
@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from pymongo import monitoring
+import app as taskapp
+
+class _OpCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+    def started(self, event):
+        with self._lock:
+            self.count += 1
+    def succeeded(self, event):
+        pass
+    def failed(self, event):
+        pass
+
+def _connect(db_name, engine):
+    taskapp.db_name = db_name
+    if engine != 'mongomock':
+        taskapp.STORAGE = engine
+        counter = _OpCounter() if engine == 'mongo' else None
+        if counter:
+            # listeners only attach to clients created afterwards, so register before the first get_db()
+            monitoring.register(counter)
+        taskapp.get_db()
+        return counter
+    import mongomock
+    client = mongomock.MongoClient()
+    db = client[db_name]
+    taskapp._on_connect(db)
+    taskapp._db_state.update(pid=os.getpid(), client=client, db=db, uri='mongomock://')
+    return None
+
+def seed(n_lists, n_cols, n_tasks, id_base=10 ** 6):
+    now = datetime.utcnow()
+    lists, cols, tasks = [], [], []
+    cid = tid = id_base
+    for li in range(n_lists):
+        list_id = id_base + li
+        lists.append({'id': list_id, 'title': f'Bench {li}', 'created_at': now, 'version': 0})
+        for ci in range(n_cols):
+            cols.append({'id': cid, 'title': f'Col {ci}', 'position': (ci + 1) * taskapp.POSITION_STEP, 'created_at': now, 'task_list_id': list_id})
+            for ti in range(n_tasks):
+                tasks.append({'id': tid, 'title': f'Task {ti}', 'description': '', 'completed': False,
+                              'position': (ti + 1) * taskapp.POSITION_STEP, 'column_id': cid, 'created_at': now, 'updated_at': now})
+                tid += 1
+            cid += 1
+    taskapp.tasklists_col.insert_many(lists)
+    taskapp.columns_col.insert_many(cols)
+    for i in range(0, len(tasks), 10000):
+        taskapp.tasks_col.insert_many(tasks[i:i + 10000])
+    # list -> column -> task ids, shared with the workers so they only touch documents that exist
+    board = {}
+    col_list = {}
+    for c in cols:
+        board.setdefault(c['task_list_id'], {})[c['id']] = []
+        col_list[c['id']] = c['task_list_id']
+    for t in tasks:
+        board[col_list[t['column_id']]][t['column_id']].append(t['id'])
+    return board
+
+class Scenario:
+    def __init__(self, board):
+        self.board = board
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def client(self):
+        c = getattr(self.local, 'client', None)
+        if c is None:
+            c = self.local.client = taskapp.app.test_client()
+        return c
+
+    def get_columns(self, rnd):
+        r = self.client().get(f'/api/columns?list_id={rnd.choice(list(self.board))}')
+        return r.status_code
+
+    def get_columns_uncached(self, rnd):
+        # the same read with the board cache emptied for the list first, so every request builds the board
+        list_id = rnd.choice(list(self.board))
+        taskapp.board_cache.invalidate(list_id)
+        return self.client().get(f'/api/columns?list_id={list_id}').status_code
+
+    def mixed(self, rnd):
+        # mostly board reads; the writes bump list versions and so turn some of the reads into misses
+        roll = rnd.random()
+        if roll < 0.1:
+            return self.reorder_tasks(rnd)
+        if roll < 0.15:
+            return self.create_task(rnd)
+        if roll < 0.2:
+            return self.toggle_task(rnd)
+        return self.get_columns(rnd)
+
+    def reorder_tasks(self, rnd):
+        list_id = rnd.choice(list(self.board))
+        col_id = rnd.choice(list(self.board[list_id]))
+        with self.lock:
+            ids = list(self.board[list_id][col_id])
+        if len(ids) > 1:
+            # move one task, the common drag-and-drop case
+            ids.insert(rnd.randrange(len(ids)), ids.pop(rnd.randrange(len(ids))))
+        r = self.client().post('/api/tasks/reorder', json={'changes': [{'column_id': col_id, 'ordered_ids': ids}]})
+        return r.status_code
+
+    def create_task(self, rnd):
+        list_id = rnd.choice(list(self.board))
+        col_id = rnd.choice(list(self.board[list_id]))
+        r = self.client().post(f'/api/columns/{col_id}/tasks', json={'title': 'bench', 'description': ''})
+        if r.status_code == 201:
+            with self.lock:
+                self.board[list_id][col_id].append(r.get_json()['id'])
+        return r.status_code
+
+    def toggle_task(self, rnd):
+        list_id = rnd.choice(list(self.board))
+        col_id = rnd.choice(list(self.board[list_id]))
+        with self.lock:
+            ids = self.board[list_id][col_id]
+            task_id = rnd.choice(ids) if ids else None
+        if task_id is None:
+            return 200
+        return self.client().post(f'/api/tasks/{task_id}/toggle').status_code
+
+WORKLOADS = ('get_columns', 'get_columns_uncached', 'mixed', 'reorder_tasks', 'create_task', 'toggle_task')
+
+def _pct(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else None
+
+def run_workload(scenario, name, requests, concurrency, counter, seed_value):
+    op = getattr(scenario, name)
+    per_worker = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+
+    def worker(i):
+        rnd = random.Random(seed_value + i)
+        out = []
+        for _ in range(per_worker[i]):
+            t0 = time.perf_counter()
+            status = op(rnd)
+            out.append(((time.perf_counter() - t0) * 1000, status))
+        return out
+
+    ops0 = counter.count if counter else None
+    hits0, misses0 = taskapp.board_cache.hits, taskapp.board_cache.misses
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = [s for part in pool.map(worker, range(concurrency)) for s in part]
+    elapsed = time.perf_counter() - t0
+    samples = sorted(ms for ms, _ in results)
+    errors = sum(1 for _, status in results if status >= 400)
+    lookups = taskapp.board_cache.hits - hits0 + taskapp.board_cache.misses - misses0
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(results) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(_pct(samples, 0.50), 3) if samples else None,
+        'p95_ms': round(_pct(samples, 0.95), 3) if samples else None,
+        'p99_ms': round(_pct(samples, 0.99), 3) if samples else None,
+        'max_ms': round(samples[-1], 3) if samples else None,
+        'mongo_ops_per_request': round((counter.count - ops0) / len(results), 2) if counter and results else None,
+        'cache_hit_rate': round((taskapp.board_cache.hits - hits0) / lookups, 3) if lookups else None,
+    }
+
+def _git_rev():
+    try:
+        here = os.path.dirname(os.path.abspath(__file__))
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=here, capture_output=True, text=True).stdout.strip() or None
+    except Exception:
+        return None
+
+def main():
+    ap = argparse.ArgumentParser(description='Concurrent load against the REST API (in-process WSGI client)')
+    ap.add_argument('--lists', type=int, default=5)
+    ap.add_argument('--columns', type=int, default=10, help='columns per list')
+    ap.add_argument('--tasks', type=int, default=50, help='tasks per column')
+    ap.add_argument('--requests', type=int, default=2000, help='requests per workload')
+    ap.add_argument('--concurrency', type=int, default=8)
+    ap.add_argument('--workloads', default=','.join(WORKLOADS))
+    ap.add_argument('--db', default='tasklist_bench', help='database to seed; dropped afterwards unless --keep')
+    ap.add_argument('--engine', choices=('mongo', 'memory', 'mongomock'), default='mongo',
+                    help='storage engine; ops/request is only reported for mongo (mongomock bulk reorders need a pymongo it still supports)')
+    ap.add_argument('--keep', action='store_true')
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--out', help='write the JSON report here (default: stdout)')
+    a = ap.parse_args()
+
+    counter = _connect(a.db, a.engine)
+    db = taskapp.get_db()
+    if db['columns'].count_documents({}):
+        print(f'database {a.db!r} is not empty; pick another --db', file=sys.stderr)
+        return 1
+    try:
+        t0 = time.perf_counter()
+        board = seed(a.lists, a.columns, a.tasks)
+        seed_s = time.perf_counter() - t0
+        scenario = Scenario(board)
+        report = {
+            'rev': _git_rev(),
+            'started_at': datetime.utcnow().isoformat(),
+            'backend': taskapp._db_state['uri'] or a.engine,
+            'size': {'lists': a.lists, 'columns_per_list': a.columns, 'tasks_per_column': a.tasks},
+            'seed_seconds': round(seed_s, 3),
+            'workloads': {},
+        }
+        for name in a.workloads.split(','):
+            name = name.strip()
+            if name not in WORKLOADS:
+                print(f'unknown workload {name!r}; choose from {", ".join(WORKLOADS)}', file=sys.stderr)
+                return 1
+            # warm the cache and connection pool so the first samples measure steady state
+            run_workload(scenario, name, a.concurrency, a.concurrency, None, a.seed)
+            stats = run_workload(scenario, name, a.requests, a.concurrency, counter, a.seed)
+            report['workloads'][name] = stats
+            print(f"{name:>20}: {stats['throughput_rps']:>8} rps  p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  "
+                  f"p99 {stats['p99_ms']:>8} ms  ops/req {stats['mongo_ops_per_request']}  hits {stats['cache_hit_rate']}  errors {stats['errors']}", file=sys.stderr)
+    finally:
+        if not a.keep and taskapp._db_state['client'] is not None:
+            taskapp._db_state['client'].drop_database(a.db)
+    body = json.dumps(report, indent=2)
+    if a.out:
+        with open(a.out, 'w') as f:
+            f.write(body + '\n')
+    else:
+        print(body)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import serializers
+
+def _tasks(n):
+    base = datetime(2024, 1, 1)
+    return [{'_id': i, 'id': i, 'title': f'Task {i}', 'description': 'x' * 40, 'completed': i % 3 == 0, 'position': i * 1024, 'column_id': i // 500, 'created_at': base + timedelta(seconds=i), 'updated_at': base + timedelta(seconds=i, microseconds=7)} for i in range(n)]
+
+def legacy(ts):
+    return json.dumps([{
+        'id': t['id'], 'title': t.get('title',''), 'description': t.get('description',''), 'completed': t.get('completed',False), 'position': t.get('position',0), 'column_id': t.get('column_id'), 'created_at': t.get('created_at', datetime.utcnow()).isoformat(), 'updated_at': t.get('updated_at', t.get('created_at', datetime.utcnow())).isoformat()
+    } for t in ts]).encode('utf-8')
+
+def shared(ts):
+    now = datetime.utcnow()
+    return serializers.dumps([serializers.task_to_dict(t, now) for t in ts])
+
+def streamed(ts):
+    now = datetime.utcnow()
+    size = 0
+    for chunk in serializers.iter_json_array(serializers.task_to_dict(t, now) for t in ts):
+        size += len(chunk)
+    return size
+
+def _time(fn, ts, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(ts)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='serialize N task documents to JSON')
+    ap.add_argument('-n', type=int, default=100000)
+    ap.add_argument('--repeat', type=int, default=5)
+    a = ap.parse_args()
+    ts = _tasks(a.n)
+    print(f"backend: {'orjson' if serializers.orjson is not None else 'json'}, tasks: {a.n}")
+    for name, fn in (('legacy inline + json', legacy), ('task_to_dict + dumps', shared), ('task_to_dict + stream', streamed)):
+        print(f'{name:>22}: {_time(fn, ts, a.repeat):8.1f} ms')
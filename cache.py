@@ -0,0 +1,80 @@
+import time
+import threading
+from collections import OrderedDict
+
+class BoardCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=60.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_list = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _drop(self, key):
+        body, _, _ = self._entries.pop(key)
+        self.size -= len(body)
+        keys = self._by_list.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_list[key[0]]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] < time.monotonic():
+                self._drop(key)
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key, body, meta=None):
+        if self.max_bytes <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (body, meta, time.monotonic() + self.ttl)
+            self._by_list.setdefault(key[0], set()).add(key)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, list_id):
+        with self._lock:
+            for key in list(self._by_list.get(list_id, ())):
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_list.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits / total) if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
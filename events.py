@@ -0,0 +1,125 @@
+import queue
+import asyncio
+import threading
+import itertools
+
+class Subscription:
+    def __init__(self, key, maxsize):
+        self.key = key
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # slow consumer: drop its backlog and tell it to refetch the board
+            self.overflowed = True
+            with self.queue.mutex:
+                self.queue.queue.clear()
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class AsyncSubscription:
+    def __init__(self, key, maxsize, loop):
+        self.key = key
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+
+    def deliver(self, event):
+        # publishers run on worker threads; hand the event to the subscriber's loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class EventBus:
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._subs = {}
+        self._seq = itertools.count(1)
+
+    def subscribe(self, key):
+        sub = Subscription(key, self.maxsize)
+        with self._lock:
+            self._subs.setdefault(key, set()).add(sub)
+        return sub
+
+    def subscribe_async(self, key, loop=None):
+        sub = AsyncSubscription(key, self.maxsize, loop or asyncio.get_running_loop())
+        with self._lock:
+            self._subs.setdefault(key, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subs.get(sub.key)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.key]
+
+    def subscriber_count(self, key=None):
+        with self._lock:
+            if key is None:
+                return sum(len(s) for s in self._subs.values())
+            return len(self._subs.get(key, ()))
+
+    def publish(self, key, kind, data, origin=None):
+        with self._lock:
+            subs = list(self._subs.get(key, ()))
+        if not subs:
+            return 0
+        event = {'seq': next(self._seq), 'kind': kind, 'data': data, 'origin': origin}
+        for sub in subs:
+            sub.deliver(event)
+        return len(subs)
+
+def watch_changes(db, bus, resolve, stop=None):
+    # MongoDB change stream backend (needs a replica set); resolve(coll, doc) -> (list_id, kind, data) or None
+    pipeline = [{'$match': {
+        'ns.coll': {'$in': ['tasklists', 'columns', 'tasks']},
+        # list version bumps only touch 'version'; they are not user-visible changes (renames and tombstones are)
+        '$nor': [{'ns.coll': 'tasklists', 'operationType': 'update',
+                  'updateDescription.updatedFields.title': {'$exists': False},
+                  'updateDescription.updatedFields.deleted_at': {'$exists': False}}],
+    }}]
+    opts = {'full_document': 'updateLookup'}
+    try:
+        stream = db.watch(pipeline, full_document_before_change='whenAvailable', **opts)
+    except Exception:
+        stream = db.watch(pipeline, **opts)
+    with stream:
+        for change in stream:
+            if stop is not None and stop.is_set():
+                break
+            doc = change.get('fullDocument') or change.get('fullDocumentBeforeChange')
+            if not doc:
+                continue
+            op = change.get('operationType')
+            updated = (change.get('updateDescription') or {}).get('updatedFields') or {}
+            # deletes are soft: setting deleted_at is what removes a list or column for clients
+            kind = 'deleted' if op == 'delete' or updated.get('deleted_at') else 'created' if op == 'insert' else 'updated'
+            resolved = resolve(change['ns']['coll'], doc, kind)
+            if resolved:
+                bus.publish(*resolved)
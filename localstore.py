@@ -0,0 +1,331 @@
+import json
+import time
+import random
+import sqlite3
+import threading
+from datetime import datetime
+from pymongo import ReturnDocument, UpdateOne, DeleteOne
+from memstore import MemoryStore, _cmp, _key
+
+SYNCED = ('tasklists', 'columns', 'tasks')
+# per-process bookkeeping that never leaves this machine
+LOCAL_FIELDS = ('version',)
+EPOCH = datetime(1970, 1, 1)
+
+def _shared(doc):
+    return {k: v for k, v in doc.items() if k not in LOCAL_FIELDS}
+
+def _encode(o):
+    if isinstance(o, datetime):
+        return {'$date': o.isoformat()}
+    return str(o)
+
+def _decode(d):
+    if len(d) == 1 and '$date' in d:
+        return datetime.fromisoformat(d['$date'])
+    return d
+
+def _dumps(doc):
+    return json.dumps(doc, default=_encode, separators=(',', ':'))
+
+def _loads(s):
+    return json.loads(s, object_hook=_decode)
+
+class LocalStore(MemoryStore):
+    engine = 'local'
+
+    def __init__(self, path, name='tasklist'):
+        super().__init__(name)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS docs (coll TEXT, key TEXT, doc TEXT, updated_at TEXT, PRIMARY KEY (coll, key));
+            CREATE TABLE IF NOT EXISTS outbox (seq INTEGER PRIMARY KEY AUTOINCREMENT, coll TEXT, key TEXT);
+            CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+        ''')
+        self.pending = set()
+        self.on_write = None
+        for coll, doc in self.conn.execute('SELECT coll, doc FROM docs WHERE doc IS NOT NULL'):
+            self[coll]._put(_loads(doc))
+        for coll, key in self.conn.execute('SELECT DISTINCT coll, key FROM outbox'):
+            self.pending.add((coll, _loads(key)))
+
+    def get_meta(self, k, default=None):
+        row = self.conn.execute('SELECT v FROM meta WHERE k = ?', (k,)).fetchone()
+        return _loads(row[0]) if row else default
+
+    def set_meta(self, k, v):
+        self.conn.execute('INSERT OR REPLACE INTO meta (k, v) VALUES (?, ?)', (k, _dumps(v)))
+
+    def _write_many(self, coll, docs, olds=None):
+        if not docs:
+            return
+        olds = olds or [None] * len(docs)
+        now = datetime.utcnow()
+        rows, queued = [], []
+        for doc, old in zip(docs, olds):
+            synced = coll.name in SYNCED
+            if synced and (old is None or _shared(doc) != _shared(old)):
+                # a real change: stamp it for last-writer-wins and queue it for the sync engine
+                if doc.get('updated_at') is None or (old is not None and doc['updated_at'] == old.get('updated_at')):
+                    doc['updated_at'] = now
+                queued.append(_key(doc))
+            coll._put(doc, old)
+            rows.append((coll.name, _dumps(_key(doc)), _dumps(doc), _dumps(doc.get('updated_at'))))
+        self._commit(rows, [(coll.name, k) for k in queued])
+
+    def _delete(self, coll, docs):
+        if not docs:
+            return
+        now = _dumps(datetime.utcnow())
+        rows, queued = [], []
+        for d in docs:
+            k = _key(d)
+            coll._remove(k)
+            if coll.name in SYNCED:
+                # keep a tombstone until the delete has reached the server
+                rows.append((coll.name, _dumps(k), None, now))
+                queued.append((coll.name, k))
+            else:
+                self.conn.execute('DELETE FROM docs WHERE coll = ? AND key = ?', (coll.name, _dumps(k)))
+        self._commit(rows, queued)
+
+    def _commit(self, rows, queued):
+        self.conn.execute('BEGIN')
+        try:
+            self.conn.executemany('INSERT OR REPLACE INTO docs (coll, key, doc, updated_at) VALUES (?, ?, ?, ?)', rows)
+            self.conn.executemany('INSERT INTO outbox (coll, key) VALUES (?, ?)', [(c, _dumps(k)) for c, k in queued])
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.pending.update(queued)
+        if queued and self.on_write:
+            self.on_write()
+
+    def reserve_ids(self, name, n):
+        with self.lock:
+            lease = self.get_meta('lease:' + name)
+            if lease and lease[1] - lease[0] + 1 >= n:
+                start = lease[0]
+                self.set_meta('lease:' + name, [start + n, lease[1]])
+                return range(start, start + n)
+            # offline with no lease left: ids from the clock, far above any server counter;
+            # the random low bits keep two offline clients from colliding in the same millisecond
+            start = max(max(self[name].docs, default=0) + 1, (int(time.time() * 1000) << 10) + random.randrange(1024))
+            return range(start, start + n)
+
+    def lease(self, name, ids):
+        with self.lock:
+            self.set_meta('lease:' + name, [ids.start, ids.stop - 1])
+
+    def lease_left(self, name):
+        lease = self.get_meta('lease:' + name)
+        return lease[1] - lease[0] + 1 if lease else 0
+
+    def outbox(self, limit):
+        with self.lock:
+            rows = self.conn.execute('SELECT seq, coll, key FROM outbox ORDER BY seq LIMIT ?', (limit,)).fetchall()
+            batch = {}
+            for seq, coll, key in rows:
+                k = _loads(key)
+                d = self[coll].docs.get(k)
+                if d is None:
+                    ts = self.conn.execute('SELECT updated_at FROM docs WHERE coll = ? AND key = ?', (coll, key)).fetchone()
+                    batch[(coll, k)] = (None, _loads(ts[0]) if ts and ts[0] else datetime.utcnow())
+                else:
+                    batch[(coll, k)] = (dict(d), d.get('updated_at') or EPOCH)
+            return [seq for seq, _, _ in rows], batch
+
+    def ack(self, seqs, keys):
+        with self.lock:
+            self.conn.execute('BEGIN')
+            self.conn.executemany('DELETE FROM outbox WHERE seq = ?', [(s,) for s in seqs])
+            still = {(c, _loads(k)) for c, k in self.conn.execute('SELECT DISTINCT coll, key FROM outbox')}
+            # pushed deletes no longer need their tombstone
+            self.conn.executemany('DELETE FROM docs WHERE coll = ? AND key = ? AND doc IS NULL',
+                                  [(c, _dumps(k)) for c, k in keys if (c, k) not in still])
+            self.conn.execute('COMMIT')
+            self.pending = still
+
+    def apply_remote(self, name, doc):
+        # last writer wins: the server copy replaces ours unless we hold a newer unsent edit
+        coll = self[name]
+        k = _key(doc)
+        with self.lock:
+            cur = coll.docs.get(k)
+            if (name, k) in self.pending:
+                mine = cur.get('updated_at') if cur else self._tombstone_ts(name, k)
+                if mine is not None and _cmp(mine, doc.get('updated_at') or EPOCH) == 1:
+                    return False
+            doc = dict(doc)
+            for f in LOCAL_FIELDS:
+                if cur and f in cur:
+                    doc[f] = cur[f]
+                else:
+                    doc.pop(f, None)
+            if cur == doc and (name, k) not in self.pending:
+                return False
+            coll._put(doc, cur)
+            self.conn.execute('BEGIN')
+            self.conn.execute('INSERT OR REPLACE INTO docs (coll, key, doc, updated_at) VALUES (?, ?, ?, ?)',
+                              (name, _dumps(k), _dumps(doc), _dumps(doc.get('updated_at'))))
+            self.conn.execute('DELETE FROM outbox WHERE coll = ? AND key = ?', (name, _dumps(k)))
+            self.conn.execute('COMMIT')
+            self.pending.discard((name, k))
+            return True
+
+    def drop_missing(self, name, remote_keys):
+        # full pull: anything we hold, have not touched, and the server no longer has was deleted there
+        coll = self[name]
+        with self.lock:
+            gone = [k for k in coll.docs if k not in remote_keys and (name, k) not in self.pending]
+            if gone:
+                self.conn.execute('BEGIN')
+                self.conn.executemany('DELETE FROM docs WHERE coll = ? AND key = ?', [(name, _dumps(k)) for k in gone])
+                self.conn.execute('COMMIT')
+            return [coll._remove(k) for k in gone]
+
+    def _tombstone_ts(self, name, k):
+        row = self.conn.execute('SELECT updated_at FROM docs WHERE coll = ? AND key = ? AND doc IS NULL', (name, _dumps(k))).fetchone()
+        return _loads(row[0]) if row and row[0] else None
+
+class SyncEngine:
+    def __init__(self, store, connect, notify=None, interval=5.0, batch=500, full_every=20, id_lease=1000, log=None):
+        self.store = store
+        self.connect = connect
+        self.notify = notify
+        self.interval = interval
+        self.batch = batch
+        self.full_every = full_every
+        self.id_lease = id_lease
+        self.log = log
+        self.remote = None
+        self.cycles = 0
+        self.status = {'online': False, 'last_sync': None, 'pending': len(store.pending), 'error': None, 'pushed': 0, 'pulled': 0}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        store.on_write = self.wake
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='tasklist-sync', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        self._wake.set()
+
+    def _loop(self):
+        backoff = self.interval
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+                backoff = self.interval
+            except Exception as e:
+                # offline or the server hiccuped: keep working locally, retry with backoff
+                self.remote = None
+                self.status.update(online=False, error=str(e) or e.__class__.__name__)
+                backoff = min(backoff * 2, 60.0)
+                if self.log:
+                    self.log(f'sync: {self.status["error"]}')
+            self._wake.wait(backoff)
+            self._wake.clear()
+            # let a burst of local writes land in one batch
+            self._stop.wait(0.2)
+
+    def sync_once(self):
+        if self.remote is None:
+            self.remote = self.connect()
+        self.status['online'] = True
+        lists = set()
+        pushed = self.push()
+        pulled = self.pull(lists, full=self.cycles % self.full_every == 0)
+        self.lease_ids()
+        self.cycles += 1
+        self.status.update(last_sync=datetime.utcnow(), pending=len(self.store.pending), error=None)
+        self.status['pushed'] += pushed
+        self.status['pulled'] += pulled
+        if lists and self.notify:
+            self.notify(lists)
+        return pushed, pulled
+
+    def _list_of(self, name, doc):
+        if name == 'tasklists':
+            return doc.get('id')
+        if name == 'columns':
+            return doc.get('task_list_id')
+        col = self.store['columns'].docs.get(doc.get('column_id'))
+        return col.get('task_list_id') if col else None
+
+    def push(self):
+        total = 0
+        while True:
+            seqs, batch = self.store.outbox(self.batch)
+            if not seqs:
+                return total
+            ops = {}
+            remote_lists = set()
+            for (name, k), (doc, ts) in batch.items():
+                if doc is None:
+                    op = DeleteOne({'id': k, '$or': [{'updated_at': {'$lte': ts}}, {'updated_at': {'$exists': False}}]})
+                else:
+                    body = {f: v for f, v in _shared(doc).items() if f != '_id'}
+                    newer = {'$gt': [{'$literal': ts}, {'$ifNull': ['$updated_at', EPOCH]}]}
+                    merged = {'$mergeObjects': ['$$ROOT', {'$literal': body}]}
+                    # conflict check runs on the server, in the same write: older pushes leave the document alone
+                    op = UpdateOne({'id': k}, [{'$replaceWith': {'$cond': [newer, merged, '$$ROOT']}}], upsert=True)
+                    lid = self._list_of(name, doc)
+                    if lid is not None:
+                        remote_lists.add(lid)
+                ops.setdefault(name, []).append(op)
+            for name, batch_ops in ops.items():
+                self.remote[name].bulk_write(batch_ops, ordered=False)
+            if remote_lists:
+                # server-side caches and ETags are keyed on the list version
+                self.remote['tasklists'].update_many({'id': {'$in': list(remote_lists)}}, {'$inc': {'version': 1}})
+            if 'tasklists' in ops:
+                self.remote['counters'].update_one({'_id': 'version:tasklists'}, {'$inc': {'seq': 1}}, upsert=True)
+            self.store.ack(seqs, list(batch))
+            total += len(batch)
+
+    def pull(self, touched, full=False):
+        n = 0
+        for name in SYNCED:
+            mark = None if full else self.store.get_meta('pull:' + name)
+            mark = datetime.fromisoformat(mark) if mark else None
+            q = {'updated_at': {'$gt': mark}} if mark else {}
+            keys = set()
+            newest = mark
+            for doc in self.remote[name].find(q, projection={'_id': 0}).sort('updated_at', 1):
+                keys.add(_key(doc))
+                ts = doc.get('updated_at')
+                if ts is not None and (newest is None or ts > newest):
+                    newest = ts
+                if self.store.apply_remote(name, doc):
+                    n += 1
+                    touched.add(self._list_of(name, doc))
+            if full:
+                for doc in self.store.drop_missing(name, keys):
+                    n += 1
+                    touched.add(self._list_of(name, doc))
+            if newest is not None:
+                self.store.set_meta('pull:' + name, newest.isoformat())
+        touched.discard(None)
+        return n
+
+    def lease_ids(self):
+        for name in SYNCED:
+            if self.store.lease_left(name) >= self.id_lease // 4:
+                continue
+            top = self.remote[name].find_one(sort=[('id', -1)], projection={'id': 1})
+            self.remote['counters'].update_one({'_id': name}, {'$max': {'seq': top['id'] if top else 0}}, upsert=True)
+            doc = self.remote['counters'].find_one_and_update({'_id': name}, {'$inc': {'seq': self.id_lease}}, upsert=True, return_document=ReturnDocument.AFTER)
+            self.store.lease(name, range(doc['seq'] - self.id_lease + 1, doc['seq'] + 1))
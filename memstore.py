@@ -0,0 +1,463 @@
+import bisect
+import threading
+from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+_TYPE_ORDER = {type(None): 0, bool: 5, int: 1, float: 1, str: 2, dict: 3, list: 4, datetime: 6}
+
+def _order(v):
+    return (_TYPE_ORDER.get(type(v), 7), v if v is not None else 0)
+
+def _cmp(a, b):
+    ka, kb = _order(a), _order(b)
+    if ka[0] != kb[0]:
+        return None
+    return (ka[1] > kb[1]) - (ka[1] < kb[1])
+
+_MISSING = object()
+
+_RANGE = ('$gt', '$gte', '$lt', '$lte')
+
+def _op(v, op, arg):
+    if v is _MISSING:
+        # a missing field behaves like null for equality and never satisfies a range
+        if op == '$exists':
+            return not arg
+        v = None
+        if op in _RANGE:
+            return False
+    if op == '$eq':
+        return v == arg
+    if op == '$ne':
+        return v != arg
+    if op == '$in':
+        return v in arg
+    if op == '$nin':
+        return v not in arg
+    if op == '$exists':
+        return bool(arg)
+    if op not in _RANGE:
+        raise ValueError(f'query operator {op} is not supported by the in-memory engine')
+    c = _cmp(v, arg)
+    if c is None:
+        return False
+    return {'$gt': c > 0, '$gte': c >= 0, '$lt': c < 0, '$lte': c <= 0}[op]
+
+def _is_ops(cond):
+    return isinstance(cond, dict) and cond and all(op.startswith('$') for op in cond)
+
+def matches(doc, q):
+    for k, cond in q.items():
+        if k == '$and':
+            if not all(matches(doc, s) for s in cond):
+                return False
+        elif k == '$or':
+            if not any(matches(doc, s) for s in cond):
+                return False
+        elif k == '$nor':
+            if any(matches(doc, s) for s in cond):
+                return False
+        elif k.startswith('$'):
+            raise ValueError(f'query operator {k} is not supported by the in-memory engine')
+        elif _is_ops(cond):
+            v = doc.get(k, _MISSING)
+            if not all(_op(v, op, arg) for op, arg in cond.items()):
+                return False
+        elif doc.get(k) != cond:
+            return False
+    return True
+
+def evaluate(expr, doc):
+    if isinstance(expr, str) and expr.startswith('$'):
+        return doc.get(expr[1:])
+    if isinstance(expr, dict) and len(expr) == 1:
+        (op, args), = expr.items()
+        if op == '$literal':
+            return args
+        if op == '$not':
+            return not evaluate(args[0] if isinstance(args, list) else args, doc)
+        if op == '$ifNull':
+            v = evaluate(args[0], doc)
+            return evaluate(args[1], doc) if v is None else v
+        if op == '$cond':
+            cond, yes, no = args if isinstance(args, list) else (args['if'], args['then'], args['else'])
+            return evaluate(yes, doc) if evaluate(cond, doc) else evaluate(no, doc)
+        if op == '$add':
+            return sum(evaluate(a, doc) for a in args)
+        if op == '$eq':
+            return evaluate(args[0], doc) == evaluate(args[1], doc)
+        if op.startswith('$'):
+            raise ValueError(f'expression operator {op} is not supported by the in-memory engine')
+    return expr
+
+def apply_update(doc, update, inserting=False):
+    if isinstance(update, list):
+        for stage in update:
+            (name, fields), = stage.items()
+            if name not in ('$set', '$addFields'):
+                raise ValueError(f'pipeline stage {name} is not supported by the in-memory engine')
+            values = {k: evaluate(v, doc) for k, v in fields.items()}
+            doc.update(values)
+        return doc
+    for op, fields in update.items():
+        for k, v in fields.items():
+            if op == '$set' or (op == '$setOnInsert' and inserting):
+                doc[k] = v
+            elif op == '$unset':
+                doc.pop(k, None)
+            elif op == '$inc':
+                doc[k] = doc.get(k, 0) + v
+            elif op == '$max':
+                if k not in doc or _cmp(v, doc[k]) == 1:
+                    doc[k] = v
+            elif op == '$min':
+                if k not in doc or _cmp(v, doc[k]) == -1:
+                    doc[k] = v
+            elif op != '$setOnInsert':
+                raise ValueError(f'update operator {op} is not supported by the in-memory engine')
+    return doc
+
+def project(doc, projection):
+    if not projection:
+        return dict(doc)
+    include = {k for k, v in projection.items() if v and k != '_id'}
+    if include:
+        out = {k: doc[k] for k in include if k in doc}
+        if projection.get('_id', 1) and '_id' in doc:
+            out['_id'] = doc['_id']
+        return out
+    return {k: v for k, v in doc.items() if k not in projection}
+
+def _sort_spec(key, direction=None):
+    if isinstance(key, str):
+        return [(key, direction or 1)]
+    if isinstance(key, dict):
+        return list(key.items())
+    return list(key)
+
+def sort_docs(docs, spec):
+    for field, direction in reversed(spec):
+        docs.sort(key=lambda d: _order(d.get(field)), reverse=direction < 0)
+    return docs
+
+def _seed_from_filter(q):
+    return {k: v for k, v in q.items() if not k.startswith('$') and not isinstance(v, dict)}
+
+def _key(doc):
+    return doc['id'] if 'id' in doc else doc['_id']
+
+def _equalities(q):
+    # field -> candidate values, from top-level terms and $and branches; everything else is left to matches()
+    out = {}
+    terms = [q] + [s for s in q.get('$and', ()) if isinstance(s, dict)]
+    for t in terms:
+        for k, cond in t.items():
+            if k.startswith('$'):
+                continue
+            if not _is_ops(cond) and not isinstance(cond, dict):
+                out.setdefault(k, [cond])
+            elif _is_ops(cond) and set(cond) == {'$in'}:
+                out.setdefault(k, list(cond['$in']))
+            elif _is_ops(cond) and set(cond) == {'$eq'}:
+                out.setdefault(k, [cond['$eq']])
+    return out
+
+class Result:
+    def __init__(self, **kw):
+        self.acknowledged = True
+        self.matched_count = self.modified_count = self.deleted_count = self.upserted_count = 0
+        self.inserted_id = self.inserted_ids = self.upserted_id = None
+        self.__dict__.update(kw)
+
+class Index:
+    def __init__(self, field, order=()):
+        self.field = field
+        self.order = tuple(order)
+        # value -> set of keys, or, with order fields, value -> [(sort key, key)] kept sorted
+        self.groups = {}
+
+    def _entry(self, doc):
+        return (tuple(_order(doc.get(f)) for f in self.order), _key(doc))
+
+    def add(self, doc):
+        v = doc.get(self.field)
+        if self.order:
+            bisect.insort(self.groups.setdefault(v, []), self._entry(doc))
+        else:
+            self.groups.setdefault(v, set()).add(_key(doc))
+
+    def remove(self, doc):
+        v = doc.get(self.field)
+        group = self.groups.get(v)
+        if group is None:
+            return
+        if self.order:
+            e = self._entry(doc)
+            i = bisect.bisect_left(group, e)
+            if i < len(group) and group[i] == e:
+                del group[i]
+        else:
+            group.discard(_key(doc))
+        if not group:
+            del self.groups[v]
+
+    def keys(self, values, reverse=False):
+        for v in values:
+            group = self.groups.get(v, ())
+            if self.order:
+                for _, k in (reversed(group) if reverse else group):
+                    yield k
+            else:
+                yield from group
+
+    def sorts(self, spec):
+        # can this index hand back one group already in `spec` order (all ascending, or all descending)?
+        fields = tuple(f for f, _ in spec)
+        dirs = {d for _, d in spec}
+        return bool(self.order) and fields == self.order[:len(fields)] and len(dirs) == 1
+
+class MemoryCursor:
+    def __init__(self, coll, q, projection):
+        self._coll = coll
+        self._q = q or {}
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=None):
+        self._sort = _sort_spec(key, direction)
+        return self
+
+    def skip(self, n):
+        self._skip = n
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def explain(self):
+        # Mongo's shape, so explain_hot_queries can report which in-memory index a query would use
+        return {'queryPlanner': {'winningPlan': self._coll._explain(self._q, self._sort)}}
+
+    def __iter__(self):
+        docs = self._coll._select(self._q, self._sort, self._skip + self._limit if self._limit else None)
+        docs = docs[self._skip:self._skip + self._limit] if self._limit else docs[self._skip:]
+        return iter([project(d, self._projection) for d in docs])
+
+class MemoryCollection:
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+        self.docs = {}
+        self.indexes = {}
+
+    def _put(self, doc, old=None):
+        old = old if old is not None else self.docs.get(_key(doc))
+        for ix in self.indexes.values():
+            if old is not None:
+                ix.remove(old)
+            ix.add(doc)
+        self.docs[_key(doc)] = doc
+
+    def _remove(self, k):
+        doc = self.docs.pop(k)
+        for ix in self.indexes.values():
+            ix.remove(doc)
+        return doc
+
+    def _choose(self, q, sort):
+        # (primary key field or index name or None, ordered, equalities)
+        eq = _equalities(q)
+        for pk in ('id', '_id'):
+            if pk in eq:
+                return pk, False, eq
+        best = (None, False)
+        for name, ix in self.indexes.items():
+            if ix.field in eq:
+                ordered = bool(sort) and len(eq[ix.field]) == 1 and ix.sorts(sort)
+                if best[0] is None or (ordered and not best[1]):
+                    best = (name, ordered)
+        return best + (eq,)
+
+    def _plan(self, q, sort):
+        # (candidate docs, already in sort order); falls back to a scan of every document
+        how, ordered, eq = self._choose(q, sort)
+        if how in ('id', '_id'):
+            return [self.docs[v] for v in dict.fromkeys(eq[how]) if v in self.docs], False
+        if how is None:
+            return self.docs.values(), False
+        ix = self.indexes[how]
+        reverse = ordered and sort[0][1] < 0
+        return (self.docs[k] for k in ix.keys(dict.fromkeys(eq[ix.field]), reverse)), ordered
+
+    def _explain(self, q, sort):
+        how, ordered, _ = self._choose(q or {}, sort)
+        if how in ('id', '_id'):
+            plan = {'stage': 'IDHACK'}
+        elif how is None:
+            plan = {'stage': 'COLLSCAN'}
+        else:
+            plan = {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': how}}
+        return {'stage': 'SORT', 'inputStage': plan} if sort and not ordered else plan
+
+    def _select(self, q, sort=None, limit=None):
+        q = q or {}
+        with self.store.lock:
+            candidates, ordered = self._plan(q, sort)
+            docs = []
+            for d in candidates:
+                if matches(d, q):
+                    docs.append(d)
+                    if ordered and limit and len(docs) >= limit:
+                        break
+        return docs if ordered or not sort else sort_docs(docs, sort)
+
+    def _first(self, q, sort=None):
+        docs = self._select(q, _sort_spec(sort) if sort else None, 1)
+        return docs[0] if docs else None
+
+    def find(self, filter=None, projection=None, sort=None, limit=0, skip=0, batch_size=None):
+        cur = MemoryCursor(self, filter, projection)
+        if sort:
+            cur.sort(sort)
+        return cur.skip(skip).limit(limit)
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        d = self._first(filter or {}, sort)
+        return project(d, projection) if d is not None else None
+
+    def count_documents(self, filter, **kw):
+        return len(self._select(filter))
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def create_index(self, keys, **kw):
+        spec = _sort_spec(keys)
+        name = kw.get('name') or '_'.join(f'{k}_{v}' for k, v in spec)
+        field = spec[0][0]
+        # the primary key is the docs dict itself
+        if field not in ('id', '_id') and name not in self.indexes:
+            with self.store.lock:
+                ix = Index(field, [f for f, _ in spec[1:]])
+                for d in self.docs.values():
+                    ix.add(d)
+                self.indexes[name] = ix
+        return name
+
+    def insert_one(self, doc):
+        with self.store.lock:
+            if _key(doc) in self.docs:
+                raise DuplicateKeyError(f'duplicate id {_key(doc)!r} in {self.name}')
+            self.store._write(self, dict(doc))
+        return Result(inserted_id=_key(doc))
+
+    def insert_many(self, docs, ordered=True):
+        docs = list(docs)
+        with self.store.lock:
+            for doc in docs:
+                if _key(doc) in self.docs:
+                    raise DuplicateKeyError(f'duplicate id {_key(doc)!r} in {self.name}')
+            self.store._write_many(self, [dict(d) for d in docs])
+        return Result(inserted_ids=[_key(d) for d in docs])
+
+    def _update(self, q, update, upsert=False, many=False, sort=None):
+        with self.store.lock:
+            targets = self._select(q, _sort_spec(sort) if sort else None, None if many else 1)
+            if not many:
+                targets = targets[:1]
+            if not targets and upsert:
+                doc = apply_update(_seed_from_filter(q), update, inserting=True)
+                self.store._write(self, doc)
+                return None, doc, Result(upserted_id=_key(doc), upserted_count=1)
+            before = dict(targets[0]) if targets else None
+            changed = []
+            for cur in targets:
+                new = apply_update(dict(cur), update)
+                if new != cur:
+                    changed.append((cur, new))
+            self.store._write_many(self, [new for _, new in changed], [cur for cur, _ in changed])
+            after = changed[0][1] if changed else (targets[0] if targets else None)
+            return before, after, Result(matched_count=len(targets), modified_count=len(changed))
+
+    def update_one(self, filter, update, upsert=False):
+        return self._update(filter, update, upsert)[2]
+
+    def update_many(self, filter, update, upsert=False):
+        return self._update(filter, update, upsert, many=True)[2]
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False, return_document=ReturnDocument.BEFORE):
+        before, after, _ = self._update(filter, update, upsert, sort=sort)
+        doc = after if return_document == ReturnDocument.AFTER else before
+        return project(doc, projection) if doc is not None else None
+
+    def delete_one(self, filter):
+        with self.store.lock:
+            d = self._first(filter)
+            if d is not None:
+                self.store._delete(self, [d])
+        return Result(deleted_count=int(d is not None))
+
+    def delete_many(self, filter):
+        with self.store.lock:
+            docs = self._select(filter)
+            self.store._delete(self, docs)
+        return Result(deleted_count=len(docs))
+
+    def find_one_and_delete(self, filter, projection=None, sort=None):
+        with self.store.lock:
+            d = self._first(filter, sort)
+            if d is not None:
+                self.store._delete(self, [d])
+        return project(d, projection) if d is not None else None
+
+    def bulk_write(self, ops, ordered=True):
+        # updates only, as (filter, update[, upsert]) tuples or {'filter', 'update', 'upsert'} dicts
+        modified = matched = 0
+        with self.store.lock:
+            for op in ops:
+                if isinstance(op, dict):
+                    op = (op['filter'], op['update'], op.get('upsert', False))
+                if not isinstance(op, tuple) or len(op) not in (2, 3):
+                    raise TypeError(f'bulk_write takes (filter, update) pairs in the in-memory engine, not {type(op).__name__}')
+                r = self._update(*op)[2]
+                modified += r.modified_count
+                matched += r.matched_count
+        return Result(modified_count=modified, matched_count=matched)
+
+    def aggregate(self, pipeline, **kw):
+        raise TypeError('the in-memory engine has no aggregation pipeline; branch on the storage engine and use find()')
+
+class MemoryStore:
+    engine = 'memory'
+
+    def __init__(self, name='tasklist'):
+        self.name = name
+        self.lock = threading.RLock()
+        self.collections = {}
+
+    def __getitem__(self, name):
+        c = self.collections.get(name)
+        if c is None:
+            c = self.collections[name] = MemoryCollection(self, name)
+        return c
+
+    def list_collection_names(self):
+        return list(self.collections)
+
+    def _write(self, coll, doc, old=None):
+        self._write_many(coll, [doc], [old])
+
+    def _write_many(self, coll, docs, olds=None):
+        for doc, old in zip(docs, olds or [None] * len(docs)):
+            coll._put(doc, old)
+
+    def _delete(self, coll, docs):
+        for d in docs:
+            coll._remove(_key(d))
@@ -0,0 +1,73 @@
+from datetime import datetime
+import json
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+TASK_FIELDS = ('id', 'title', 'description', 'completed', 'position', 'column_id', 'created_at', 'updated_at')
+COLUMN_FIELDS = ('id', 'title', 'position', 'created_at', 'task_list_id')
+TASKLIST_FIELDS = ('id', 'title', 'created_at')
+
+def _projection(fields):
+    p = dict.fromkeys(fields, 1)
+    p['_id'] = 0
+    return p
+
+TASK_PROJECTION = _projection(TASK_FIELDS)
+COLUMN_PROJECTION = _projection(COLUMN_FIELDS)
+TASKLIST_PROJECTION = _projection(TASKLIST_FIELDS)
+
+def task_to_dict(t, now=None):
+    created = t.get('created_at') or now or datetime.utcnow()
+    return {
+        'id': t['id'],
+        'title': t.get('title', ''),
+        'description': t.get('description', ''),
+        'completed': t.get('completed', False),
+        'position': t.get('position', 0),
+        'column_id': t.get('column_id'),
+        'created_at': created,
+        'updated_at': t.get('updated_at') or created,
+    }
+
+def column_to_dict(c, tasks=(), now=None):
+    now = now or datetime.utcnow()
+    return {
+        'id': c['id'],
+        'title': c.get('title', ''),
+        'position': c.get('position', 0),
+        'created_at': c.get('created_at') or now,
+        'tasks': [task_to_dict(t, now) for t in tasks],
+    }
+
+def tasklist_to_dict(l, now=None):
+    return {'id': l['id'], 'title': l.get('title', ''), 'created_at': l.get('created_at') or now or datetime.utcnow()}
+
+def _default(o):
+    if isinstance(o, datetime):
+        return o.isoformat()
+    return str(o)
+
+if orjson is not None:
+    def dumps(obj):
+        return orjson.dumps(obj, default=_default)
+else:
+    def dumps(obj):
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def iter_json_array(items, chunk=1000):
+    # an error mid-stream propagates: the server drops the connection without the final chunk,
+    # so clients see a failed body instead of a short but well-formed array
+    yield b'['
+    buf = []
+    first = True
+    for item in items:
+        buf.append(dumps(item))
+        if len(buf) >= chunk:
+            yield (b',' if not first else b'') + b','.join(buf)
+            first = False
+            buf = []
+    if buf:
+        yield (b',' if not first else b'') + b','.join(buf)
+    yield b']'
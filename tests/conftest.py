@@ -0,0 +1,23 @@
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+@pytest.fixture(scope='session')
+def app_module():
+    pytest.importorskip('flask')
+    pytest.importorskip('pymongo')
+    # the app reads its settings from a config module at import time; run it on the in-memory engine
+    cfg = types.ModuleType('config')
+    cfg.STORAGE = 'memory'
+    cfg.REAPER = False
+    sys.modules['config'] = cfg
+    import app
+    return app
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
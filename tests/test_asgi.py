@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('asgiref')
+
+def _call(asgi, method, path):
+    messages = [{'type': 'http.request', 'body': b''}]
+    sent = []
+
+    async def receive():
+        return messages.pop() if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'headers': [], 'http_version': '1.1', 'root_path': ''}
+    return asgi.application(scope, receive, send), sent
+
+def test_flask_routes_run_concurrently_in_async_mode(app_module, monkeypatch):
+    import asgi
+
+    def slow():
+        time.sleep(0.2)
+        return '', 204
+    monkeypatch.setitem(app_module.app.view_functions, 'create_tasklist', slow)
+
+    async def main():
+        asyncio.get_running_loop().set_default_executor(asgi.ThreadPoolExecutor(8))
+        calls = [_call(asgi, 'POST', '/api/tasklists') for _ in range(4)]
+        started = time.perf_counter()
+        await asyncio.gather(*(c for c, _ in calls))
+        return time.perf_counter() - started, [sent[0]['status'] for _, sent in calls]
+
+    elapsed, statuses = asyncio.run(main())
+    assert statuses == [204] * 4
+    # one shared thread would take 4 x 0.2s
+    assert elapsed < 0.6
@@ -0,0 +1,25 @@
+import pytest
+
+@pytest.fixture
+def column(client):
+    list_id = client.post('/api/tasklists', json={'title': 'Batch'}).json['id']
+    return client.post('/api/columns', json={'title': 'C', 'task_list_id': list_id}).json['id']
+
+def test_batch_creates_tasks_in_order(client, column):
+    res = client.post(f'/api/columns/{column}/tasks:batch', json=['a', {'title': 'b', 'description': 'd'}, {}])
+    assert res.status_code == 201
+    assert [(t['title'], t['description']) for t in res.json] == [('a', ''), ('b', 'd'), ('New Task', '')]
+
+@pytest.mark.parametrize('bad', [
+    {'title': 5},
+    {'title': ''},
+    {'title': '   '},
+    {'title': None},
+    {'title': 'ok', 'description': ['x']},
+    {'title': 'ok', 'description': None},
+    '',
+])
+def test_batch_rejects_mistyped_fields(client, column, bad):
+    res = client.post(f'/api/columns/{column}/tasks:batch', json=['fine', bad])
+    assert res.status_code == 400
+    assert client.get(f'/api/columns/{column}/tasks').json == []
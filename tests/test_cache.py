@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from cache import BoardCache
+
+def test_get_returns_what_was_put():
+    cache = BoardCache()
+    cache.put((1, 0, 'full'), b'[]', 'cursor')
+    assert cache.get((1, 0, 'full')) == (b'[]', 'cursor')
+    assert cache.get((1, 1, 'full')) is None
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+def test_invalidate_drops_only_that_lists_entries():
+    cache = BoardCache()
+    cache.put((1, 0, 'full'), b'a')
+    cache.put((1, 0, 'page'), b'b')
+    cache.put((2, 0, 'full'), b'c')
+    cache.invalidate(1)
+    assert cache.get((1, 0, 'full')) is None and cache.get((1, 0, 'page')) is None
+    assert cache.get((2, 0, 'full')) == (b'c', None)
+    assert cache.stats()['invalidations'] == 2 and cache.size == 1
+    cache.invalidate(99)
+
+def test_entries_expire():
+    cache = BoardCache(ttl=0.01)
+    cache.put((1, 0), b'a')
+    time.sleep(0.02)
+    assert cache.get((1, 0)) is None
+    assert cache.stats()['entries'] == 0
+
+def test_least_recently_used_entries_go_first():
+    cache = BoardCache(max_bytes=10)
+    cache.put((1, 0), b'aaaa')
+    cache.put((2, 0), b'bbbb')
+    cache.get((1, 0))
+    cache.put((3, 0), b'cccc')
+    assert cache.get((2, 0)) is None
+    assert cache.get((1, 0)) and cache.get((3, 0))
+    assert cache.size == 8
+    # bodies bigger than the whole cache are never stored
+    cache.put((4, 0), b'x' * 11)
+    assert cache.get((4, 0)) is None and cache.size == 8
+
+def test_replacing_a_key_keeps_the_size_right():
+    cache = BoardCache()
+    cache.put((1, 0), b'aaaa')
+    cache.put((1, 0), b'bb')
+    assert cache.size == 2 and cache.get((1, 0)) == (b'bb', None)
+    cache.clear()
+    assert cache.size == 0 and cache.get((1, 0)) is None
+
+@pytest.fixture
+def board(client):
+    list_id = client.post('/api/tasklists', json={'title': 'Cached'}).json['id']
+    client.post('/api/columns', json={'title': 'Todo', 'task_list_id': list_id})
+    return list_id
+
+def _get(client, list_id, **headers):
+    return client.get(f'/api/columns?list_id={list_id}', headers=headers)
+
+def test_board_changes_move_the_etag_and_drop_the_cached_body(app_module, client, board):
+    first = _get(client, board)
+    etag = first.headers['ETag']
+    assert _get(client, board, **{'If-None-Match': etag}).status_code == 304
+    before = app_module.board_cache.stats()['invalidations']
+    client.post('/api/columns', json={'title': 'Done', 'task_list_id': board})
+    assert app_module.board_cache.stats()['invalidations'] > before
+    second = _get(client, board, **{'If-None-Match': etag})
+    assert second.status_code == 200 and second.headers['ETag'] != etag
+    assert [c['title'] for c in second.json] == ['Todo', 'Done']
+
+def test_a_version_touched_elsewhere_is_never_served_stale(app_module, client, board):
+    etag = _get(client, board).headers['ETag']
+    # another worker's write: the shared version moves, but this process' cache was never told
+    col = app_module.columns_col.find_one({'task_list_id': board})
+    app_module.columns_col.update_one({'id': col['id']}, {'$set': {'title': 'Renamed'}})
+    assert _get(client, board).json[0]['title'] == 'Todo'
+    app_module.touch_list(board)
+    fresh = _get(client, board)
+    assert fresh.headers['ETag'] != etag
+    assert fresh.json[0]['title'] == 'Renamed'
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from events import EventBus, watch_changes
+
+def test_publish_reaches_subscribers_of_that_key_only():
+    bus = EventBus()
+    a, b = bus.subscribe(1), bus.subscribe(1)
+    other = bus.subscribe(2)
+    assert bus.publish(1, 'task.created', {'id': 5}, origin='c1') == 2
+    for sub in (a, b):
+        event = sub.get(0.1)
+        assert (event['kind'], event['data'], event['origin']) == ('task.created', {'id': 5}, 'c1')
+    assert other.get(0.01) is None
+
+def test_events_carry_increasing_sequence_numbers():
+    bus = EventBus()
+    sub = bus.subscribe(1)
+    bus.publish(1, 'a', {})
+    bus.publish(1, 'b', {})
+    first, second = sub.get(0.1), sub.get(0.1)
+    assert second['seq'] > first['seq']
+
+def test_unsubscribe_stops_delivery_and_forgets_the_key():
+    bus = EventBus()
+    a, b = bus.subscribe(1), bus.subscribe(1)
+    assert (bus.subscriber_count(1), bus.subscriber_count()) == (2, 2)
+    bus.unsubscribe(a)
+    assert bus.publish(1, 'x', {}) == 1
+    assert a.get(0.01) is None and b.get(0.1)['kind'] == 'x'
+    bus.unsubscribe(b)
+    bus.unsubscribe(b)
+    assert bus.subscriber_count(1) == bus.subscriber_count() == 0
+    assert bus.publish(1, 'x', {}) == 0
+
+def test_slow_subscriber_is_flagged_instead_of_blocking():
+    bus = EventBus(maxsize=2)
+    sub = bus.subscribe(1)
+    for i in range(3):
+        bus.publish(1, 'x', {'i': i})
+    assert sub.overflowed
+    assert sub.get(0.01) is None
+
+def test_async_subscriber_gets_events_published_from_threads():
+    async def main():
+        bus = EventBus()
+        sub = bus.subscribe_async(1)
+        await asyncio.get_running_loop().run_in_executor(None, bus.publish, 1, 'task.updated', {'id': 3})
+        event = await sub.get(1)
+        bus.unsubscribe(sub)
+        return event, bus.subscriber_count(1)
+    event, left = asyncio.run(main())
+    assert event['data'] == {'id': 3} and left == 0
+
+class Stream(list):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class Database:
+    def __init__(self, changes):
+        self.changes = changes
+        self.pipeline = None
+        self.options = None
+        self.commands = []
+
+    def watch(self, pipeline, **kw):
+        self.pipeline, self.options = pipeline, kw
+        return Stream(self.changes)
+
+    def command(self, name, coll, **kw):
+        self.commands.append((name, coll, kw))
+
+def _change(coll, op, doc, fields=None, before=None):
+    # the shape Mongo sends: deletes have no fullDocument, only the key and (with pre-images on) the old document
+    change = {'ns': {'coll': coll}, 'operationType': op, 'documentKey': {'_id': 'oid-%s' % (doc or before)['id']}}
+    if op != 'delete':
+        change['fullDocument'] = doc
+    if before is not None:
+        change['fullDocumentBeforeChange'] = before
+    if fields is not None:
+        change['updateDescription'] = {'updatedFields': fields}
+    return change
+
+CHANGES = [
+    _change('tasklists', 'update', {'id': 1, 'version': 4}, {'version': 4}),
+    _change('tasklists', 'update', {'id': 1, 'title': 'New'}, {'title': 'New'}),
+    _change('tasklists', 'update', {'id': 1, 'deleted_at': 1}, {'deleted_at': 1}),
+    _change('columns', 'update', {'id': 7, 'task_list_id': 1, 'deleted_at': 1}, {'deleted_at': 1, 'purged': 0}),
+    _change('columns', 'insert', {'id': 8, 'task_list_id': 1}),
+    _change('tasks', 'delete', None, before={'id': 9, 'column_id': 8}),
+]
+
+def test_watch_changes_reports_tombstones_and_deletes():
+    mongomock = pytest.importorskip('mongomock')
+    db = Database(CHANGES)
+    seen = []
+    watch_changes(db, EventBus(), lambda coll, doc, kind: seen.append((coll, doc['id'], kind)))
+    assert seen[2:] == [('tasklists', 1, 'deleted'), ('columns', 7, 'deleted'), ('columns', 8, 'created'), ('tasks', 9, 'deleted')]
+    assert db.options['full_document_before_change'] == 'whenAvailable'
+    # the server-side filter passes renames and tombstones but not version bumps
+    stream = mongomock.MongoClient().db.changes
+    stream.insert_many([dict(c, n=i) for i, c in enumerate(CHANGES)])
+    assert [c['n'] for c in stream.find(db.pipeline[0]['$match']).sort('n', 1)] == [1, 2, 3, 4, 5]
+
+def test_deletes_without_a_pre_image_are_skipped():
+    db = Database([{'ns': {'coll': 'tasks'}, 'operationType': 'delete', 'documentKey': {'_id': 'oid-9'}}])
+    seen = []
+    watch_changes(db, EventBus(), lambda *a: seen.append(a))
+    assert seen == []
+
+def test_task_deletes_get_pre_images(app_module):
+    db = Database([])
+    app_module.enable_change_preimages(db)
+    assert db.commands == [('collMod', 'tasks', {'changeStreamPreAndPostImages': {'enabled': True}})]
+
+def test_event_streams_are_capped_below_the_thread_count(app_module, client):
+    cap = app_module.SSE_MAX_STREAMS
+    assert cap < app_module.THREADS
+    streams = [client.get('/api/tasklists/1/events') for _ in range(cap)]
+    assert [r.status_code for r in streams] == [200] * cap
+    full = client.get('/api/tasklists/1/events')
+    assert full.status_code == 503 and full.headers['Retry-After']
+    # API requests are still served while every stream slot is taken
+    assert client.get('/api/tasklists').status_code == 200
+    streams.pop().close()
+    streams.append(client.get('/api/tasklists/1/events'))
+    assert streams[-1].status_code == 200
+    for r in streams:
+        r.close()
+    assert app_module.bus.subscriber_count(1) == 0
+
+def test_poll_backend_turns_streams_away(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'EVENTS_BACKEND', 'poll')
+    assert client.get('/api/tasklists/1/events').status_code == 204
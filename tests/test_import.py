@@ -0,0 +1,32 @@
+import json
+
+def _ndjson(tasks, bad_at=None):
+    lines = [{'type': 'tasklist', 'id': 1, 'title': 'Imported'}, {'type': 'column', 'id': 1, 'title': 'C', 'position': 1024}]
+    for i in range(tasks):
+        task = {'type': 'task', 'id': i, 'column_id': 1, 'title': f't{i}', 'position': i}
+        if i == bad_at:
+            task['created_at'] = 'not a date'
+        lines.append(task)
+    return '\n'.join(json.dumps(l) for l in lines).encode()
+
+def _live_titles(client):
+    return [l['title'] for l in client.get('/api/tasklists').json]
+
+def test_import_writes_in_batches(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'IMPORT_BATCH', 10)
+    res = client.post('/api/tasklists/import?title=Batched', data=_ndjson(35))
+    assert res.status_code == 201 and res.json['tasks'] == 35
+    col = client.get(f"/api/columns?list_id={res.json['tasklist']}").json[0]
+    assert len(col['tasks']) == 35
+
+def test_failed_import_hides_what_it_already_wrote(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'IMPORT_BATCH', 10)
+    res = client.post('/api/tasklists/import?title=Broken', data=_ndjson(35, bad_at=25))
+    assert res.status_code == 400 and 'line' in res.json['error']
+    assert 'Broken' not in _live_titles(client)
+    broken = app_module.tasklists_col.find_one({'title': 'Broken'})
+    # two batches had landed; the tombstone hands them to the reaper
+    assert broken['deleted_at'] is not None
+    col = app_module.columns_col.find_one({'task_list_id': broken['id']})
+    assert col['deleted_at'] is not None
+    assert app_module.tasks_col.count_documents({'column_id': col['id']}) == 20
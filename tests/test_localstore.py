@@ -0,0 +1,200 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('pymongo')
+mongomock = pytest.importorskip('mongomock')
+
+from localstore import LocalStore, SyncEngine
+
+T0 = datetime(2026, 1, 1)
+
+class RemoteCollection:
+    def __init__(self, remote, coll):
+        self._remote = remote
+        self._coll = coll
+
+    def __getattr__(self, attr):
+        return getattr(self._coll, attr)
+
+    def bulk_write(self, ops, ordered=True):
+        # mongomock cannot run the pipeline upsert push sends; record what reached the server instead
+        if self._remote.down:
+            raise ConnectionError('server unreachable')
+        self._remote.pushed.extend((self._coll.name, type(op).__name__) for op in ops)
+
+class Remote:
+    def __init__(self):
+        self.db = mongomock.MongoClient().db
+        self.pushed = []
+        self.down = False
+
+    def __getitem__(self, name):
+        return RemoteCollection(self, self.db[name])
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'local.db')
+
+@pytest.fixture
+def remote():
+    return Remote()
+
+def _engine(store, remote, **kw):
+    engine = SyncEngine(store, lambda: remote, **kw)
+    engine.remote = remote
+    return engine
+
+def _outbox_rows(store):
+    return store.conn.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+def test_writes_queue_and_survive_a_restart(path):
+    store = LocalStore(path)
+    store['tasklists'].insert_one({'id': 1, 'title': 'L'})
+    store['tasks'].insert_one({'id': 10, 'title': 'a', 'column_id': 5})
+    store['tasks'].update_one({'id': 10}, {'$set': {'title': 'b'}})
+    store['tasks'].insert_one({'id': 11, 'title': 'gone', 'column_id': 5})
+    store['tasks'].delete_one({'id': 11})
+    # unchanged writes and local-only fields are not sync traffic
+    store['tasks'].update_one({'id': 10}, {'$set': {'title': 'b'}})
+    store['tasklists'].update_one({'id': 1}, {'$inc': {'version': 1}})
+    assert store.pending == {('tasklists', 1), ('tasks', 10), ('tasks', 11)}
+    store.conn.close()
+
+    again = LocalStore(path)
+    assert again.pending == {('tasklists', 1), ('tasks', 10), ('tasks', 11)}
+    assert again['tasks'].find_one({'id': 10}, {'_id': 0, 'title': 1}) == {'title': 'b'}
+    assert again['tasks'].find_one({'id': 11}) is None
+    _, batch = again.outbox(100)
+    # one entry per document, carrying its latest state; the delete as a timestamped tombstone
+    assert batch[('tasks', 10)][0]['title'] == 'b'
+    doc, ts = batch[('tasks', 11)]
+    assert doc is None and isinstance(ts, datetime)
+
+def test_push_replays_the_outbox_and_acks(path, remote):
+    store = LocalStore(path)
+    store['tasklists'].insert_one({'id': 1, 'title': 'L'})
+    store['columns'].insert_one({'id': 5, 'title': 'C', 'task_list_id': 1})
+    store['tasks'].insert_one({'id': 10, 'title': 'a', 'column_id': 5})
+    store['tasks'].delete_one({'id': 10})
+    assert _engine(store, remote).push() == 3
+    assert sorted(remote.pushed) == [('columns', 'UpdateOne'), ('tasklists', 'UpdateOne'), ('tasks', 'DeleteOne')]
+    assert store.pending == set() and _outbox_rows(store) == 0
+    # the tombstone is dropped once the delete reached the server
+    assert store.conn.execute('SELECT COUNT(*) FROM docs WHERE doc IS NULL').fetchone()[0] == 0
+    assert remote.db['counters'].find_one({'_id': 'version:tasklists'})['seq'] == 1
+
+def test_failed_push_keeps_everything_for_the_next_attempt(path, remote):
+    store = LocalStore(path)
+    store['tasks'].insert_one({'id': 10, 'title': 'a', 'column_id': 5})
+    store['tasks'].insert_one({'id': 11, 'title': 'b', 'column_id': 5})
+    engine = _engine(store, remote, batch=1)
+    remote.down = True
+    with pytest.raises(ConnectionError):
+        engine.push()
+    assert store.pending == {('tasks', 10), ('tasks', 11)} and _outbox_rows(store) == 2
+    remote.down = False
+    assert engine.push() == 2
+    assert remote.pushed == [('tasks', 'UpdateOne'), ('tasks', 'UpdateOne')]
+    assert store.pending == set()
+
+def test_remote_change_replaces_an_untouched_document(path):
+    store = LocalStore(path)
+    store.apply_remote('tasks', {'id': 10, 'title': 'a', 'updated_at': T0})
+    store['tasks'].update_one({'id': 10}, {'$inc': {'version': 3}})
+    assert store.apply_remote('tasks', {'id': 10, 'title': 'server', 'updated_at': T0 - timedelta(days=1), 'version': 99})
+    doc = store['tasks'].find_one({'id': 10})
+    # the server copy wins, but per-process bookkeeping stays ours
+    assert (doc['title'], doc['version']) == ('server', 3)
+    assert not store.apply_remote('tasks', dict(doc))
+
+def test_newer_local_edit_beats_an_older_remote_one(path):
+    store = LocalStore(path)
+    store['tasks'].insert_one({'id': 10, 'title': 'mine', 'updated_at': T0 + timedelta(hours=2)})
+    assert not store.apply_remote('tasks', {'id': 10, 'title': 'theirs', 'updated_at': T0 + timedelta(hours=1)})
+    assert store['tasks'].find_one({'id': 10})['title'] == 'mine'
+    assert ('tasks', 10) in store.pending
+
+def test_newer_remote_edit_beats_a_pending_local_one(path):
+    store = LocalStore(path)
+    store['tasks'].insert_one({'id': 10, 'title': 'mine', 'updated_at': T0})
+    assert store.apply_remote('tasks', {'id': 10, 'title': 'theirs', 'updated_at': T0 + timedelta(hours=1)})
+    assert store['tasks'].find_one({'id': 10})['title'] == 'theirs'
+    # the losing local edit is no longer pushed
+    assert store.pending == set() and _outbox_rows(store) == 0
+
+def test_local_delete_wins_against_an_older_remote_copy(path):
+    store = LocalStore(path)
+    store.apply_remote('tasks', {'id': 10, 'title': 'a', 'updated_at': T0})
+    store['tasks'].delete_one({'id': 10})
+    assert not store.apply_remote('tasks', {'id': 10, 'title': 'a', 'updated_at': T0})
+    assert store['tasks'].find_one({'id': 10}) is None
+    # an edit made on the server after the delete brings the task back
+    assert store.apply_remote('tasks', {'id': 10, 'title': 'edited', 'updated_at': datetime.utcnow() + timedelta(hours=1)})
+    assert store['tasks'].find_one({'id': 10})['title'] == 'edited'
+
+def test_pull_follows_the_watermark_and_full_pulls_drop_deleted(path, remote):
+    store = LocalStore(path)
+    remote.db['tasklists'].insert_one({'id': 1, 'title': 'L', 'updated_at': T0})
+    remote.db['columns'].insert_one({'id': 5, 'title': 'C', 'task_list_id': 1, 'updated_at': T0})
+    remote.db['tasks'].insert_many([{'id': 10, 'title': 'a', 'column_id': 5, 'updated_at': T0},
+                                    {'id': 11, 'title': 'b', 'column_id': 5, 'updated_at': T0}])
+    engine = _engine(store, remote)
+    touched = set()
+    assert engine.pull(touched) == 4
+    assert touched == {1}
+    assert store.get_meta('pull:tasks') == T0.isoformat()
+
+    remote.db['tasks'].update_one({'id': 10}, {'$set': {'title': 'a2', 'updated_at': T0 + timedelta(minutes=1)}})
+    remote.db['tasks'].delete_one({'id': 11})
+    store['tasks'].insert_one({'id': 12, 'title': 'offline', 'column_id': 5})
+    assert engine.pull(set()) == 1
+    assert store['tasks'].find_one({'id': 11}) is not None
+    assert engine.pull(set(), full=True) == 1
+    assert store['tasks'].find_one({'id': 10})['title'] == 'a2'
+    assert store['tasks'].find_one({'id': 11}) is None
+    # never pushed yet, so a full pull must not treat it as deleted on the server
+    assert store['tasks'].find_one({'id': 12}) is not None
+
+def test_sync_once_leases_ids_above_the_server_counter(path, remote):
+    store = LocalStore(path)
+    remote.db['tasks'].insert_one({'id': 500, 'title': 'x', 'column_id': 5, 'updated_at': T0})
+    seen = []
+    engine = _engine(store, remote, id_lease=100, notify=seen.append)
+    engine.sync_once()
+    assert store.lease_left('tasks') == 100
+    assert list(store.reserve_ids('tasks', 3)) == [501, 502, 503]
+    assert store.lease_left('tasks') == 97
+    assert engine.status['online'] and engine.status['pulled'] == 1
+    assert seen == []
+
+def test_offline_ids_come_from_the_clock(path):
+    store = LocalStore(path)
+    store['tasks'].insert_one({'id': 7, 'title': 'a'})
+    ids = store.reserve_ids('tasks', 2)
+    assert ids.start > 7 and len(ids) == 2
+
+def test_server_side_edits_arrive_on_an_incremental_pull(path, app_module, client):
+    # the app on the in-memory engine plays the server
+    list_id = client.post('/api/tasklists', json={'title': 'L'}).json['id']
+    col = client.post('/api/columns', json={'title': 'C', 'task_list_id': list_id}).json['id']
+    doomed = client.post('/api/columns', json={'title': 'D', 'task_list_id': list_id}).json['id']
+    a, b = (client.post(f'/api/columns/{col}/tasks', json={'title': t}).json['id'] for t in 'ab')
+    store = LocalStore(path)
+    engine = _engine(store, app_module.get_db())
+    engine.pull(set())
+    assert store.get_meta('pull:columns')
+
+    time.sleep(0.002)
+    client.put(f'/api/tasklists/{list_id}', json={'title': 'L2'})
+    client.put(f'/api/columns/{col}', json={'title': 'C2'})
+    client.post('/api/tasks/reorder', json={'changes': [{'column_id': col, 'ordered_ids': [b, a]}]})
+    client.delete(f'/api/columns/{doomed}')
+    touched = set()
+    assert engine.pull(touched) >= 5
+    assert touched == {list_id}
+    assert store['tasklists'].find_one({'id': list_id})['title'] == 'L2'
+    assert store['columns'].find_one({'id': col})['title'] == 'C2'
+    assert [t['id'] for t in store['tasks'].find({'column_id': col}).sort('position', 1)] == [b, a]
+    assert store['columns'].find_one({'id': doomed})['deleted_at'] is not None
@@ -0,0 +1,178 @@
+from datetime import datetime
+
+import pytest
+
+pymongo = pytest.importorskip('pymongo')
+mongomock = pytest.importorskip('mongomock')
+
+from memstore import MemoryStore
+
+DOCS = [
+    {'id': 1, 'title': 'a', 'column_id': 1, 'position': 1024, 'completed': False},
+    {'id': 2, 'title': 'b', 'column_id': 1, 'position': 2048, 'completed': True},
+    {'id': 3, 'title': 'c', 'column_id': 1, 'position': 1536.5, 'completed': False, 'deleted_at': None},
+    {'id': 4, 'title': 'd', 'column_id': 2, 'position': 1024, 'completed': True},
+    {'id': 5, 'title': 'e', 'column_id': 2, 'completed': False},
+    {'id': 6, 'title': 'f', 'column_id': 2, 'position': 4096, 'deleted_at': datetime(2026, 1, 2)},
+    {'id': 7, 'title': 'b', 'column_id': 3, 'position': 'x'},
+    {'id': 8, 'title': 'h', 'column_id': None, 'position': 512},
+]
+
+QUERIES = [
+    {},
+    {'column_id': 1},
+    {'column_id': {'$in': [1, 2]}},
+    {'column_id': {'$nin': [1, None]}},
+    {'column_id': None},
+    {'position': {'$gt': 1024}},
+    {'position': {'$gte': 1024, '$lt': 4096}},
+    {'position': {'$lte': 1024}},
+    {'position': {'$gt': 'a'}},
+    {'position': {'$gt': None}},
+    {'position': {'$ne': None}},
+    {'deleted_at': None},
+    {'deleted_at': {'$exists': True}},
+    {'deleted_at': {'$exists': False}},
+    {'title': {'$ne': 'b'}},
+    {'title': 'b', 'column_id': 3},
+    {'$or': [{'column_id': 1}, {'completed': True}]},
+    {'$and': [{'column_id': 2}, {'position': {'$lte': 2048}}]},
+    {'$nor': [{'completed': True}, {'column_id': 3}]},
+    {'$and': [{'deleted_at': None, 'column_id': 1}, {'$or': [{'position': {'$gt': 1024}}, {'position': 1024, 'id': {'$gt': 0}}]}]},
+    {'id': {'$in': [2, 5, 99]}},
+    {'id': 3, 'column_id': 2},
+]
+
+SORTS = [
+    [('id', 1)],
+    [('position', 1), ('id', 1)],
+    [('position', -1), ('id', -1)],
+    [('column_id', 1), ('position', -1), ('id', 1)],
+    [('title', 1), ('id', -1)],
+]
+
+INDEXES = [
+    [('column_id', 1), ('position', 1), ('id', 1)],
+    [('deleted_at', 1)],
+]
+
+@pytest.fixture(params=[False, True], ids=['scan', 'indexed'])
+def pair(request):
+    mem = MemoryStore()['tasks']
+    mock = mongomock.MongoClient().db.tasks
+    for coll in (mem, mock):
+        if request.param:
+            for keys in INDEXES:
+                coll.create_index(keys)
+        coll.insert_many([dict(d) for d in DOCS])
+    return mem, mock
+
+def _ids(cursor):
+    return [d['id'] for d in cursor]
+
+@pytest.mark.parametrize('q', QUERIES)
+def test_find_matches_mongo(pair, q):
+    mem, mock = pair
+    assert sorted(_ids(mem.find(q))) == sorted(_ids(mock.find(q)))
+    assert mem.count_documents(q) == mock.count_documents(q)
+
+@pytest.mark.parametrize('sort', SORTS)
+@pytest.mark.parametrize('q', [{}, {'column_id': 1}, {'column_id': {'$in': [1, 2]}}, {'deleted_at': None}])
+def test_sort_and_limit_match_mongo(pair, q, sort):
+    mem, mock = pair
+    assert _ids(mem.find(q).sort(sort)) == _ids(mock.find(q).sort(sort))
+    assert _ids(mem.find(q).sort(sort).limit(2)) == _ids(mock.find(q).sort(sort).limit(2))
+    assert _ids(mem.find(q).sort(sort).skip(1).limit(2)) == _ids(mock.find(q).sort(sort).skip(1).limit(2))
+
+def test_find_one_with_sort_and_projection(pair):
+    mem, mock = pair
+    for sort in ([('position', -1)], [('position', 1)]):
+        kw = {'sort': sort, 'projection': {'_id': 0, 'id': 1, 'position': 1}}
+        assert mem.find_one({'column_id': 1}, **kw) == mock.find_one({'column_id': 1}, **kw)
+    assert mem.find_one({'id': 99}) is None
+
+@pytest.mark.parametrize('update', [
+    {'$set': {'title': 'z', 'completed': True}},
+    {'$inc': {'position': 10, 'hits': 1}},
+    {'$max': {'position': 1500}},
+    {'$min': {'position': 1500}},
+    {'$unset': {'deleted_at': ''}},
+])
+def test_updates_match_mongo(pair, update):
+    mem, mock = pair
+    r1, r2 = mem.update_many({'column_id': {'$in': [1, 2]}}, update), mock.update_many({'column_id': {'$in': [1, 2]}}, update)
+    assert (r1.matched_count, r1.modified_count) == (r2.matched_count, r2.modified_count)
+    proj = {'_id': 0}
+    assert list(mem.find({}, proj).sort('id', 1)) == list(mock.find({}, proj).sort('id', 1))
+
+def test_find_one_and_update_and_upsert(pair):
+    mem, mock = pair
+    for coll in (mem, mock):
+        before = coll.find_one_and_update({'id': 2}, {'$set': {'title': 'B'}}, projection={'_id': 0, 'title': 1})
+        after = coll.find_one_and_update({'id': 2}, {'$inc': {'position': 1}}, projection={'_id': 0, 'position': 1}, return_document=pymongo.ReturnDocument.AFTER)
+        assert (before, after) == ({'title': 'b'}, {'position': 2049})
+        coll.update_one({'id': 50, 'column_id': 9}, {'$set': {'title': 'new'}, '$setOnInsert': {'position': 1}}, upsert=True)
+    proj = {'_id': 0}
+    assert mem.find_one({'id': 50}, proj) == mock.find_one({'id': 50}, proj) == {'id': 50, 'column_id': 9, 'title': 'new', 'position': 1}
+
+def test_deletes_match_mongo(pair):
+    mem, mock = pair
+    assert mem.delete_many({'column_id': 2}).deleted_count == mock.delete_many({'column_id': 2}).deleted_count == 3
+    assert mem.delete_one({'column_id': 1}).deleted_count == mock.delete_one({'column_id': 1}).deleted_count == 1
+    assert sorted(_ids(mem.find({}))) == sorted(_ids(mock.find({})))
+    # the indexes follow the removals
+    assert _ids(mem.find({'column_id': 2})) == []
+
+def test_index_tracks_position_changes():
+    coll = MemoryStore()['tasks']
+    coll.create_index([('column_id', 1), ('position', 1), ('id', 1)])
+    coll.insert_many([{'id': i, 'column_id': 1, 'position': i * 10} for i in range(1, 6)])
+    coll.update_one({'id': 1}, {'$set': {'position': 100}})
+    coll.update_one({'id': 5}, {'$set': {'column_id': 2}})
+    assert _ids(coll.find({'column_id': 1}).sort([('position', 1), ('id', 1)])) == [2, 3, 4, 1]
+    assert _ids(coll.find({'column_id': 1}).sort([('position', -1), ('id', -1)]).limit(2)) == [1, 4]
+    assert _ids(coll.find({'column_id': 2})) == [5]
+
+def test_pipeline_update_toggles():
+    coll = MemoryStore()['tasks']
+    coll.insert_many([{'id': 1, 'completed': True}, {'id': 2}])
+    toggle = [{'$set': {'completed': {'$not': [{'$ifNull': ['$completed', False]}]}}}]
+    assert coll.find_one_and_update({'id': 1}, toggle, return_document=pymongo.ReturnDocument.AFTER)['completed'] is False
+    assert coll.find_one_and_update({'id': 2}, toggle, return_document=pymongo.ReturnDocument.AFTER)['completed'] is True
+
+def test_bulk_write_takes_plain_pairs():
+    coll = MemoryStore()['tasks']
+    coll.insert_many([{'id': 1, 'position': 1}, {'id': 2, 'position': 2}])
+    r = coll.bulk_write([({'id': 1, 'position': 1}, {'$set': {'position': 20}}),
+                         {'filter': {'id': 2, 'position': 99}, 'update': {'$set': {'position': 10}}},
+                         ({'id': 3}, {'$set': {'position': 30}}, True)])
+    assert (r.matched_count, r.modified_count) == (1, 1)
+    assert {d['id']: d['position'] for d in coll.find({})} == {1: 20, 2: 2, 3: 30}
+    with pytest.raises(TypeError):
+        coll.bulk_write([object()])
+
+@pytest.mark.parametrize('q', [{'title': {'$regex': 'a'}}, {'$where': 'true'}, {'$expr': {'$eq': ['$id', 1]}}])
+def test_unsupported_query_operators_raise(q):
+    coll = MemoryStore()['tasks']
+    coll.insert_one({'id': 1, 'title': 'a'})
+    with pytest.raises(ValueError):
+        list(coll.find(q))
+
+def test_unsupported_updates_and_aggregate_raise():
+    coll = MemoryStore()['tasks']
+    coll.insert_one({'id': 1, 'tags': []})
+    with pytest.raises(ValueError):
+        coll.update_one({'id': 1}, {'$push': {'tags': 'x'}})
+    with pytest.raises(ValueError):
+        coll.update_one({'id': 1}, [{'$set': {'n': {'$size': '$tags'}}}])
+    with pytest.raises(TypeError):
+        coll.aggregate([{'$match': {}}])
+
+def test_explain_reports_the_plan():
+    coll = MemoryStore()['tasks']
+    coll.create_index([('column_id', 1), ('position', 1), ('id', 1)])
+    plan = lambda cur: cur.explain()['queryPlanner']['winningPlan']
+    assert plan(coll.find({'id': 1})) == {'stage': 'IDHACK'}
+    assert plan(coll.find({'column_id': 1}).sort('position', 1)) == {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'column_id_1_position_1_id_1'}}
+    assert plan(coll.find({'column_id': {'$in': [1, 2]}}).sort('position', 1))['stage'] == 'SORT'
+    assert plan(coll.find({'title': 'a'})) == {'stage': 'COLLSCAN'}
@@ -0,0 +1,23 @@
+def test_reads_without_a_limit_are_paged(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'MAX_PAGE_LIMIT', 3)
+    list_id = client.post('/api/tasklists', json={'title': 'Paged'}).json['id']
+    col = client.post('/api/columns', json={'title': 'C', 'task_list_id': list_id}).json['id']
+    tasks = [client.post(f'/api/columns/{col}/tasks', json={'title': str(i)}).json['id'] for i in range(7)]
+
+    seen, url = [], f'/api/columns/{col}/tasks'
+    while True:
+        res = client.get(url)
+        assert len(res.json) <= 3
+        seen += [t['id'] for t in res.json]
+        cursor = res.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+        url = f'/api/columns/{col}/tasks?after={cursor}'
+    assert seen == tasks
+
+def test_list_index_is_paged(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'MAX_PAGE_LIMIT', 1)
+    for t in 'ab':
+        client.post('/api/tasklists', json={'title': t})
+    res = client.get('/api/tasklists')
+    assert len(res.json) == 1 and res.headers['X-Next-Cursor']
@@ -0,0 +1,36 @@
+import pytest
+
+@pytest.fixture
+def column(client):
+    list_id = client.post('/api/tasklists', json={'title': 'Moves'}).json['id']
+    col = client.post('/api/columns', json={'title': 'C', 'task_list_id': list_id}).json['id']
+    tasks = [client.post(f'/api/columns/{col}/tasks', json={'title': str(i)}).json['id'] for i in range(4)]
+    return col, tasks
+
+def _order(client, col):
+    return [t['id'] for t in client.get(f'/api/columns/{col}/tasks').json]
+
+def test_move_between_neighbours(client, column):
+    col, (a, b, c, d) = column
+    res = client.post(f'/api/tasks/{d}/move', json={'after_id': a, 'before_id': b})
+    assert res.status_code == 200
+    assert _order(client, col) == [a, d, b, c]
+
+@pytest.mark.parametrize('neighbours', [
+    lambda a, b, c, d: {'after_id': c, 'before_id': a},
+    lambda a, b, c, d: {'after_id': b, 'before_id': b},
+    lambda a, b, c, d: {'after_id': d},
+    lambda a, b, c, d: {'after_id': a, 'before_id': d},
+])
+def test_bad_neighbours_are_rejected(client, column, neighbours):
+    col, tasks = column
+    res = client.post(f'/api/tasks/{tasks[3]}/move', json=neighbours(*tasks))
+    assert res.status_code == 400
+    assert _order(client, col) == tasks
+
+def test_columns_reject_inverted_neighbours(client):
+    list_id = client.post('/api/tasklists', json={'title': 'Cols'}).json['id']
+    a, b, c = (client.post('/api/columns', json={'title': t, 'task_list_id': list_id}).json['id'] for t in 'abc')
+    assert client.post(f'/api/columns/{a}/move', json={'after_id': c, 'before_id': b}).status_code == 400
+    assert client.post(f'/api/columns/{a}/move', json={'before_id': a}).status_code == 400
+    assert client.post(f'/api/columns/{a}/move', json={'after_id': b, 'before_id': c}).status_code == 200
@@ -0,0 +1,20 @@
+import json
+
+import pytest
+
+from serializers import iter_json_array
+
+def test_streamed_array_is_valid_json():
+    assert json.loads(b''.join(iter_json_array(({'i': i} for i in range(2500)), chunk=1000))) == [{'i': i} for i in range(2500)]
+    assert json.loads(b''.join(iter_json_array(iter(())))) == []
+
+def test_a_failure_mid_stream_is_not_hidden_in_the_array():
+    def items():
+        yield {'i': 0}
+        raise RuntimeError('db went away')
+    chunks = []
+    with pytest.raises(RuntimeError):
+        for c in iter_json_array(items(), chunk=1):
+            chunks.append(c)
+    # the server drops the connection here; the body never closes
+    assert not b''.join(chunks).endswith(b']')
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+def test_tombstoned_parents_resolve_to_deletes(app_module):
+    now = datetime.utcnow()
+    assert app_module._resolve_change('columns', {'id': 7, 'task_list_id': 1, 'deleted_at': now}, 'updated') == (1, 'column.deleted', {'id': 7})
+    assert app_module._resolve_change('tasklists', {'id': 1, 'title': 'L', 'deleted_at': now}, 'updated') == (1, 'tasklist.deleted', {'id': 1})
+    assert app_module._resolve_change('columns', {'id': 7, 'task_list_id': 1, 'title': 'C', 'deleted_at': None}, 'updated')[1] == 'column.updated'
+
+@pytest.fixture
+def board(client):
+    list_id = client.post('/api/tasklists', json={'title': 'Doomed'}).json['id']
+    columns = [client.post('/api/columns', json={'title': t, 'task_list_id': list_id}).json['id'] for t in ('A', 'B')]
+    task = client.post(f'/api/columns/{columns[0]}/tasks', json={'title': 't'}).json['id']
+    return list_id, columns, task
+
+def _writes_into(column_id, task_id):
+    return [
+        ('get', f'/api/columns/{column_id}/tasks', None),
+        ('post', f'/api/columns/{column_id}/tasks', {'title': 'x'}),
+        ('post', f'/api/columns/{column_id}/tasks:batch', ['x']),
+        ('put', f'/api/columns/{column_id}', {'title': 'x'}),
+        ('post', f'/api/columns/{column_id}/move', {}),
+        ('post', f'/api/tasks/{task_id}/move', {'column_id': column_id}),
+        ('put', f'/api/tasks/{task_id}', {'column_id': column_id}),
+        ('post', '/api/tasks/reorder', {'changes': [{'column_id': column_id, 'ordered_ids': [task_id]}]}),
+    ]
+
+def test_tombstoned_column_is_gone_for_every_route(client, board):
+    _, (doomed, alive), _ = board
+    task = client.post(f'/api/columns/{alive}/tasks', json={'title': 'keep'}).json['id']
+    assert client.delete(f'/api/columns/{doomed}').status_code == 204
+    for method, url, body in _writes_into(doomed, task):
+        assert getattr(client, method)(url, json=body).status_code == 404, url
+    assert client.get(f'/api/columns/{alive}/tasks').json[0]['column_id'] == alive
+
+def test_columns_of_a_tombstoned_list_are_gone(app_module, client, board):
+    list_id, (column, _), task = board
+    # as if the cascade onto the columns had not happened yet
+    app_module.tasklists_col.update_one({'id': list_id}, {'$set': {'deleted_at': datetime.utcnow()}})
+    for method, url, body in _writes_into(column, task):
+        assert getattr(client, method)(url, json=body).status_code == 404, url
+    assert client.post('/api/columns', json={'title': 'x', 'task_list_id': list_id}).status_code == 404
+
+def test_columns_cannot_move_into_a_tombstoned_list(client, board):
+    list_id, (column, _), _ = board
+    other = client.post('/api/tasklists', json={'title': 'Other'}).json['id']
+    client.delete(f'/api/tasklists/{list_id}')
+    fresh = client.post('/api/columns', json={'title': 'C', 'task_list_id': other}).json['id']
+    assert client.put(f'/api/columns/{fresh}', json={'task_list_id': list_id}).status_code == 404
+    assert client.put(f'/api/columns/{fresh}', json={'title': 'ok'}).status_code == 200
+
+def test_only_one_process_holds_the_reaper_lease(app_module, monkeypatch):
+    mongomock = pytest.importorskip('mongomock')
+    counters = mongomock.MongoClient().db.counters
+    monkeypatch.setattr(app_module, 'STORAGE', 'mongo')
+    monkeypatch.setattr(app_module, 'counters_col', counters)
+    monkeypatch.setattr(app_module, '_reap_owner', lambda: 'host:1')
+    assert app_module.claim_reap_lease()
+    assert app_module.claim_reap_lease()
+    monkeypatch.setattr(app_module, '_reap_owner', lambda: 'host:2')
+    assert not app_module.claim_reap_lease()
+    # a holder that stopped renewing is taken over once its lease runs out
+    counters.update_one({'_id': app_module.REAP_LEASE_KEY}, {'$set': {'expires': datetime.utcnow() - timedelta(seconds=1)}})
+    assert app_module.claim_reap_lease()
+    assert counters.find_one({'_id': app_module.REAP_LEASE_KEY})['owner'] == 'host:2'